@@ -27,6 +27,9 @@ def app_init():
     from libs.controls.status import Status
     from libs.controls.zone import Zone, ZTYPE_OBJ_WAVEGEN, ZTYPE_OBJ_ARRANGEMENT
 
+    # Import latency tracer
+    from libs.trace import LatencyTracer, DEFAULT_TRACE_FILE
+
     # Initialize the pygame module
     pygame.init()
 
@@ -38,8 +41,41 @@ def app_init():
     # Initialise full screen
     screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
 
+    # Read command line arguments needed before the camera is created
+    camera_options = {}
+    try:
+        for arg in sys.argv[1:]:
+            if arg.startswith("-backend="):
+                camera_options["backend"] = arg[len("-backend=") :]
+            elif arg.startswith("-cameras="):
+                camera_options["camera_numbers"] = [
+                    int(camera_no) for camera_no in arg[len("-cameras=") :].split(",")
+                ]
+            elif arg.startswith("-source="):
+                camera_options["sources"] = arg[len("-source=") :].split(",")
+            elif arg.startswith("-record="):
+                camera_options["record"] = arg[len("-record=") :]
+            elif arg == "-fast":
+                camera_options["realtime"] = False
+            elif arg == "-sharedworker":
+                camera_options["shared_worker"] = True
+            elif arg.startswith("-batchwindow="):
+                camera_options["batch_window"] = float(arg[len("-batchwindow=") :])
+            elif arg.startswith("-motion="):
+                camera_options["motion_threshold"] = float(arg[len("-motion=") :])
+            elif arg.startswith("-staleness="):
+                camera_options["max_staleness"] = float(arg[len("-staleness=") :])
+            elif arg.startswith("-warmup="):
+                camera_options["warmup_inferences"] = int(arg[len("-warmup=") :])
+            elif arg.startswith("-detectevery="):
+                camera_options["detection_interval"] = int(
+                    arg[len("-detectevery=") :]
+                )
+    except:
+        print("Invalid command-line arguments")
+
     # Main loop (runs infinitely until window exits)
-    controller = AppController(screen)
+    controller = AppController(screen, camera_options)
 
     # Read command line arguments
     try:
@@ -51,13 +87,19 @@ def app_init():
             elif arg == "-test":
                 controller.use_test_control = True
             elif arg == "-nodark":
-                controller.camera.filter_enabled = False
+                controller.camera.set_filter_enabled(False)
             elif arg == "-nocameraerror":
                 controller.show_camera_error = False
             elif arg == "-noboarderror":
                 controller.show_board_error = False
             elif arg == "-nomodelerror":
                 controller.show_model_error = False
+            elif arg == "-trace":
+                controller.tracer = LatencyTracer(DEFAULT_TRACE_FILE)
+            elif arg.startswith("-tickrate="):
+                controller.scheduler.set_tick_rate(float(arg[len("-tickrate=") :]))
+            elif arg.startswith("-fps="):
+                controller.scheduler.set_fps(float(arg[len("-fps=") :]))
             
     except:
         print("Invalid command-line arguments")
@@ -134,6 +176,8 @@ def app_init():
     threading.Thread(target=app_render, args=[controller, screen]).start()
 
     while controller.is_running():
+        controller.scheduler.begin_tick()
+
         # Update camera objects and basic logic
         controller.update()
 
@@ -152,6 +196,9 @@ def app_init():
         for lc in controller.get_controllers():
             lc.update(controller)
 
+        # Record latency of the frame traced in this iteration (if any)
+        controller.tracer.finish()
+
         # Get all events from pygame, and exit if QUIT event exists.
         # Pass all events to controls.
         for event in pygame.event.get():
@@ -185,12 +232,13 @@ def app_init():
         # Update controller to clean state (no removed/added controls)
         controller.set_clean_state()
 
-        # Single update (to allow rendering)
-        controller.single_update = True
+        # Hand the frame to the renderer, then wait for the next iteration
+        controller.scheduler.end_tick()
 
     # Release resources
     controller.destroy_all_controls()
     controller.camera.destroy()
+    controller.tracer.close()
 
     print("App Exiting...")
 
@@ -199,30 +247,18 @@ def app_render(controller, screen):
     """
     Continuously renders the app.
     """
-    import time
-    import pygame
+    from libs.render import DirtyRenderer
 
+    renderer = DirtyRenderer()
     while controller.is_running():
-        if not controller.single_update:
-            time.sleep(0.06)
+        # Wait until the next frame is due and the app has been updated
+        if not controller.scheduler.wait_for_frame():
             continue
 
-        # Clear screen
-        screen.fill(pygame.Color(0, 0, 0))
-
-        # Render all controls
-        for control in controller.get_controls():
-            control.render(controller, screen)
-
-        # Render global zone control
-        # controller.global_zone.render(controller, screen)
-
-        # Render all overlaying controls (all controls that must be on top of everything else)
-        for control in controller.get_static_controls():
-            control.render(controller, screen)
-
-        # Update the screen
-        pygame.display.flip()
+        # Render all controls, then all overlaying controls (all controls that
+        # must be on top of everything else), repainting only what changed
+        renderer.render(controller, screen)
+        controller.scheduler.end_frame()
     print("Render thread exiting...")
 
 
@@ -0,0 +1,263 @@
+"""
+    benchmark.py - benchmarks the detection pipeline (capture, YOLO
+    sub-process, result conversion and Camera.update) without a display
+    or camera, and saves the results as JSON.
+
+    Usage: python benchmark.py [-source=PATH] [-resolution=640x480,1280x720]
+           [-duration=SEC] [-backend=NAME] [-motion=PERC] [-fast] [-output=PATH]
+"""
+
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from libs.devices.camera import Camera
+from libs.devices.sources import SYNTHETIC_SOURCE
+from libs.trace import LatencyTracer, get_peak_rss
+
+BENCHMARK_RESOLUTIONS = [(640, 480), (1280, 720)]  # Sizes of generated frames
+BENCHMARK_DURATION = 30  # Seconds each run is measured for
+BENCHMARK_WARMUP = 5  # Seconds the model runs before measuring starts
+BENCHMARK_LOAD_TIMEOUT = 600  # Max seconds to wait for the model to load
+BENCHMARK_STATS_TIMEOUT = 5  # Max seconds to wait for stats of the sub-process
+BENCHMARK_POLL_INTERVAL = 0.001  # Seconds between updates of the camera
+BENCHMARK_SCREEN_SIZE = (1920, 1080)  # Screen size objects are calibrated to
+BENCHMARK_OUTPUT_FILE = "benchmark.json"
+
+
+class BenchmarkController:
+    """
+    Stands in for the AppController, providing what Camera.update needs
+    (the screen size, the play area and the latency tracer).
+    """
+
+    def __init__(self, screen_size=BENCHMARK_SCREEN_SIZE):
+        self.screen_size = screen_size
+        self.tracer = LatencyTracer()
+
+    def get_screen_size(self):
+        return self.screen_size
+
+    def get_play_area(self):
+        return None  # Run the model on the full frame
+
+
+def get_commit():
+    """
+    Gets the git commit being benchmarked (or None outside of a repository).
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except Exception:
+        return None
+
+
+def wait_for_stats(camera, controller, timeout=BENCHMARK_STATS_TIMEOUT):
+    """
+    Requests the stats of the camera's YOLO sub-process and waits for them.
+
+    Returns:
+        the stats (see DetectionWorker.get_stats), or None if there was no reply.
+    """
+    camera.worker_stats = None
+    camera.request_stats()
+    start = time.monotonic()
+    while camera.worker_stats is None and time.monotonic() - start < timeout:
+        camera.update(controller)
+        time.sleep(BENCHMARK_POLL_INTERVAL)
+    return camera.worker_stats
+
+
+def subtract_stats(end, start):
+    """
+    Gets the CPU seconds of each stage and the frames counted between two
+    stats of a YOLO sub-process.
+    """
+    if end is None or start is None:
+        return {}
+    return {
+        "cpu_times": {
+            stage: end["cpu_times"][stage] - start["cpu_times"][stage]
+            for stage in end["cpu_times"]
+        },
+        "inferences": end["inferences"] - start["inferences"],
+        "skipped": end["skipped"] - start["skipped"],
+    }
+
+
+def run_benchmark(source, options, duration=BENCHMARK_DURATION):
+    """
+    Runs the detection pipeline on a source and measures it.
+
+    Arguments:
+        source -- the source frames are read from (see sources.py)
+        options -- keyword arguments the camera is created with
+        duration -- the seconds to measure for (after the warm up)
+
+    Returns:
+        a dictionary of the results, or None if the model failed to load.
+    """
+    print("Benchmarking " + source + "...")
+    controller = BenchmarkController()
+    camera = Camera(source=source, **options)
+
+    # Wait for the camera and model to load
+    start = time.monotonic()
+    while camera.loading or camera.model_loading:
+        if time.monotonic() - start > BENCHMARK_LOAD_TIMEOUT:
+            break
+        camera.update(controller)
+        time.sleep(BENCHMARK_POLL_INTERVAL)
+    if camera.model is None or not camera.valid:
+        print("Failed to load " + source + " (or its model)")
+        if camera.active:
+            camera.destroy()
+        return None
+
+    # Let the model warm up, then measure from a clean slate
+    warmup_end = time.monotonic() + BENCHMARK_WARMUP
+    while time.monotonic() < warmup_end and camera.active:
+        camera.update(controller)
+        time.sleep(BENCHMARK_POLL_INTERVAL)
+    (sequence, timestamp, frame) = camera.capture.get_latest_frame()
+    (width, height) = frame.shape[1::-1] if frame is not None else (0, 0)
+    start_stats = wait_for_stats(camera, controller)
+    controller.tracer = LatencyTracer()
+    capture_cpu_start = camera.capture.cpu_time
+
+    results = 0
+    detections = 0
+    update_cpu_time = 0.0
+    end_stats = start_stats
+    last_stats_time = time.monotonic()
+    start = time.monotonic()
+    while time.monotonic() - start < duration and camera.active:
+        sequence = camera.detection_sequence
+        cpu_start = time.thread_time()
+        objects = camera.update(controller)
+        update_cpu_time += time.thread_time() - cpu_start
+        if camera.detection_sequence != sequence:
+            results += 1
+            detections += len(objects)
+            controller.tracer.stamp("camera")
+            controller.tracer.finish()
+
+        # Keep the latest stats, in case the source ends (closing the camera)
+        if camera.worker_stats is not None:
+            end_stats = camera.worker_stats
+        if time.monotonic() - last_stats_time >= 1:
+            last_stats_time = time.monotonic()
+            camera.request_stats()
+        time.sleep(BENCHMARK_POLL_INTERVAL)
+    elapsed = time.monotonic() - start
+
+    if camera.active:
+        end_stats = wait_for_stats(camera, controller) or end_stats
+    worker_stats = subtract_stats(end_stats, start_stats)
+    cpu_times = dict(worker_stats.get("cpu_times", {}))
+    cpu_times["capture"] = camera.capture.cpu_time - capture_cpu_start
+    cpu_times["camera_update"] = update_cpu_time
+
+    if camera.active:
+        camera.destroy()
+
+    summary = controller.tracer.get_summary()
+    return {
+        "source": source,
+        "resolution": [width, height],
+        "duration": elapsed,
+        "results": results,
+        "results_per_second": results / elapsed if elapsed > 0 else 0.0,
+        "inferences": worker_stats.get("inferences"),
+        "skipped_frames": worker_stats.get("skipped"),
+        "detections_per_second": detections / elapsed if elapsed > 0 else 0.0,
+        "latency": {
+            stage: summary[stage] for stage in summary if summary[stage]["count"] > 0
+        },
+        "cpu_times": cpu_times,
+        "peak_rss_kb": {
+            "main": get_peak_rss(),
+            "worker": end_stats.get("peak_rss_kb") if end_stats else None,
+        },
+    }
+
+
+def benchmark_init():
+    """
+    Runs the benchmark with the options of the command line.
+    """
+    sources = None
+    resolutions = BENCHMARK_RESOLUTIONS
+    duration = BENCHMARK_DURATION
+    output = BENCHMARK_OUTPUT_FILE
+    options = {}
+    try:
+        for arg in sys.argv[1:]:
+            if arg.startswith("-source="):
+                sources = arg[len("-source=") :].split(",")
+            elif arg.startswith("-resolution="):
+                resolutions = [
+                    tuple([int(value) for value in size.split("x")])
+                    for size in arg[len("-resolution=") :].split(",")
+                ]
+            elif arg.startswith("-duration="):
+                duration = float(arg[len("-duration=") :])
+            elif arg.startswith("-output="):
+                output = arg[len("-output=") :]
+            elif arg.startswith("-backend="):
+                options["backend"] = arg[len("-backend=") :]
+            elif arg.startswith("-motion="):
+                options["motion_threshold"] = float(arg[len("-motion=") :])
+            elif arg == "-fast":
+                options["realtime"] = False
+    except:
+        print("Invalid command-line arguments")
+
+    if sources is None:
+        sources = [
+            SYNTHETIC_SOURCE + ":" + str(width) + "x" + str(height)
+            for (width, height) in resolutions
+        ]
+
+    runs = []
+    for source in sources:
+        run = run_benchmark(source, options, duration)
+        if run is not None:
+            runs.append(run)
+            total = run["latency"].get("total", {})
+            print(
+                "{}: {:.1f} results/s, {:.1f} detections/s, "
+                "p50 {:.1f}ms, p95 {:.1f}ms, p99 {:.1f}ms".format(
+                    source,
+                    run["results_per_second"],
+                    run["detections_per_second"],
+                    total.get("p50", 0) * 1000,
+                    total.get("p95", 0) * 1000,
+                    total.get("p99", 0) * 1000,
+                )
+            )
+
+    with open(output, "w") as file:
+        json.dump(
+            {
+                "commit": get_commit(),
+                "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "platform": platform.platform(),
+                "processor": platform.processor(),
+                "options": options,
+                "runs": runs,
+            },
+            file,
+            indent=2,
+        )
+    print("Benchmark results saved to " + output)
+
+
+if __name__ == "__main__":
+    benchmark_init()
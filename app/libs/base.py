@@ -9,7 +9,7 @@ import pygame
 # import screeninfo
 
 # Import camera
-from .devices.camera import Camera
+from .devices.camera_group import CameraGroup
 
 # Import audio system
 from .sound import *
@@ -20,6 +20,13 @@ from .devices.control_board import ControlBoard
 # Import camera object
 from .object import *
 
+# Import latency tracer
+from .trace import LatencyTracer
+
+# Import spatial index of objects
+from .spatial import SpatialGrid
+from .scheduler import FrameScheduler
+
 # Create partial implementation of zone control
 
 MOUSE_LEFT = 1  # Left pygame mouse button
@@ -41,10 +48,17 @@ class AppController:
     (including controls currently existing)
     """
 
-    def __init__(self, screen: pygame.Surface):
+    def __init__(self, screen: pygame.Surface, camera_options=None):
         """
         Creates the controller
+
+        Arguments:
+            screen -- the surface of the window
+            camera_options -- keyword arguments the cameras are created with
+                              (see CameraGroup), or None for the defaults
         """
+        if camera_options is None:
+            camera_options = {}
         self.controls = []  # Control list
         self.static_controls = []  # Static control list
         self.controllers = []  # Controller list (for app logic)
@@ -53,9 +67,10 @@ class AppController:
         self.running = True
         self.calibrating = False
         self.playback_checkmark_required = True
-        self.camera = Camera()
+        self.tracer = LatencyTracer()  # Latency from camera capture to sound
+        self.camera = CameraGroup(**camera_options)
         self.board = ControlBoard()
-        self.single_update = False
+        self.scheduler = FrameScheduler()  # Paces the update loop and rendering
         self.screen = screen
         self.sound_player = Sound()
         self.show_camera_error = True
@@ -63,6 +78,8 @@ class AppController:
         self.show_board_error = True
 
         self.objects = []
+        self.object_grid = SpatialGrid()  # Objects indexed by position
+        self.bounds_objects = {}  # Objects within each bounds queried (by bounds)
         self.use_test_control = False
         self.zones = []  # A list of zones (derived from controls)
         self.hover_control = None
@@ -185,12 +202,12 @@ class AppController:
 
         # Add persistent objects for testing
         for persistent_object in self.persistent_objects:
-            self.objects.append(persistent_object)
+            self.add_cam_object(persistent_object)
 
         # Add mouse object for testing
         if self.add_mouse_object:
             (mx, my) = pygame.mouse.get_pos()
-            self.objects.append(CamObject("mouse", (mx, my, 12, 20), 1))
+            self.add_cam_object(CamObject("mouse", (mx, my, 12, 20), 1))
 
         # Update currently (mouse) hovered control
         self.hover_control = None
@@ -219,9 +236,21 @@ class AppController:
 
     def set_cam_objects(self, object_list):
         """
-        Updates the app's currently recognized objects.
+        Updates the app's currently recognized objects,
+        indexing them by position (see SpatialGrid).
         """
         self.objects = object_list
+        self.object_grid.build(object_list)
+        self.bounds_objects = {}
+
+    def add_cam_object(self, object):
+        """
+        Adds a single object to the app's currently recognized objects
+        (e.g. testing objects), until the objects are next updated.
+        """
+        self.objects.append(object)
+        self.object_grid.add(object)
+        self.bounds_objects = {}
 
     def get_cam_objects(self):
         """
@@ -232,14 +261,17 @@ class AppController:
     def get_cam_objects_in_bounds(self, bounds):
         """
         Gets the app's currently recognized objects within
-        the specified bounds
-        """
-        object_list = []
-        for object in self.objects:
-            if object.within(bounds):
-                object_list.append(object)
+        the specified bounds.
 
-        return object_list
+        The objects of each bounds are only looked up once
+        until the objects are next updated.
+        """
+        key = tuple(bounds)
+        object_list = self.bounds_objects.get(key)
+        if object_list is None:
+            object_list = self.object_grid.query(key)
+            self.bounds_objects[key] = object_list
+        return list(object_list)
 
     def has_object_in_bounds(self, tag, bounds):
         """
@@ -250,8 +282,8 @@ class AppController:
             tag - the tag of objects to check
             bounds - the bounds to check for
         """
-        for object in self.objects:
-            if object.tag == tag and object.within(bounds):
+        for object in self.get_cam_objects_in_bounds(bounds):
+            if object.tag == tag:
                 return True
         return False
 
@@ -260,21 +292,40 @@ class AppController:
         Gets the list of camera objects that are in the 'global zone'.
         i.e. all objects that are not contained within a zone.
         """
-        object_list = []
+        # Objects that belong in a zone
+        zone_objects = set()
+        for zone in self.zones:
+            for object in self.get_cam_objects_in_bounds(
+                (zone.x, zone.y, zone.w, zone.h)
+            ):
+                zone_objects.add(id(object))
 
         # Add objects that do not belong in any zone.
-        for object in self.objects:
-            zone_object = False
-            # Detect whether object belongs in zone
-            for zone in self.zones:
-                if object.within((zone.x, zone.y, zone.w, zone.h)):
-                    zone_object = True
-                    break
+        return [object for object in self.objects if id(object) not in zone_objects]
 
-            if not zone_object:
-                object_list.append(object)
+    def get_play_area(self):
+        """
+        Gets the bounds (x, y, w, h) containing every zone and its playback box,
+        i.e. the only area objects are used in.
 
-        return object_list
+        Returns None if objects are used anywhere on screen
+        (e.g. while calibrating, or if there is a global zone).
+        """
+        if self.calibrating or len(self.zones) == 0:
+            return None
+
+        rects = []
+        for zone in self.zones:
+            if zone.is_global:
+                return None
+            rects.append(zone.get_bounds())
+            rects.append(zone.get_playback_box_bounds(self))
+
+        xmin = min([x for (x, y, w, h) in rects])
+        ymin = min([y for (x, y, w, h) in rects])
+        xmax = max([x + w for (x, y, w, h) in rects])
+        ymax = max([y + h for (x, y, w, h) in rects])
+        return (xmin, ymin, xmax - xmin, ymax - ymin)
 
     def get_screen_size(self):
         """
@@ -386,6 +437,7 @@ class AppController:
         will exit.
         """
         self.running = False
+        self.scheduler.stop()
 
     def is_mouse_over(self, bounds):
         """
@@ -450,6 +502,8 @@ class Control:
         self.h = 0
         self.is_zone = False
         self.interactive = False  # Set to True if this control interacts in any way
+        self.render_bounds = None  # Area drawn in the last rendered frame
+        self.render_key = None  # Render key of the last rendered frame
         pass
 
     def get_center(self):
@@ -528,6 +582,53 @@ class Control:
         """
         pass
 
+    def get_render_bounds(self, controller: AppController):
+        """
+        Gets the area (x, y, w, h) of the screen the control draws in,
+        or None if it may draw anywhere (so the whole screen is redrawn).
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        return None
+
+    def get_render_key(self, controller: AppController):
+        """
+        Gets a value that only changes when the drawing of the control
+        changes (so the control is only redrawn when it changes), or None
+        if the control changes on every frame.
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        return None
+
+    def get_dirty_rects(self, controller: AppController):
+        """
+        Gets the areas (x, y, w, h) of the screen the control has changed
+        since the last rendered frame (see get_render_bounds and get_render_key).
+
+        Arguments:
+            controller -- the app controller this control runs from
+
+        Returns:
+            a list of areas, or None if the whole screen must be redrawn.
+        """
+        bounds = self.get_render_bounds(controller)
+        if bounds is None:
+            self.render_bounds = None
+            return None
+
+        key = self.get_render_key(controller)
+        rects = []
+        if key is None or key != self.render_key or bounds != self.render_bounds:
+            rects.append(bounds)
+            if self.render_bounds is not None and self.render_bounds != bounds:
+                rects.append(self.render_bounds)  # Clear where it was drawn
+        self.render_bounds = bounds
+        self.render_key = key
+        return rects
+
     def event(self, controller: AppController, event: pygame.event.Event):
         """
         Receives an event from the pygame interface.
@@ -71,6 +71,8 @@ class SoundController(Controller):
         Arguments:
             controller -- the app controller this controller runs from
         """
+        controller.tracer.stamp("sound_controller")
+
         # self.play_sounds(controller, self.current_objects, controller.sound_player)
         waves = []
         for zone in controller.zones:
@@ -104,7 +106,8 @@ class SoundController(Controller):
                                 pass
                             
                         if obj_wave.buffer is not None:
-                            controller.sound_player.play(obj_wave)
+                            if controller.sound_player.play(obj_wave):
+                                controller.tracer.stamp("sound_play")
                             
                 # Make sure waves are kept in cache until invalidated again
                 if zone.invalidate_waves:
@@ -107,6 +107,25 @@ class AppBorder(Control):
             (self.x + corner_width, self.y + self.h - border_width),
         )
 
+    def get_render_bounds(self, controller: AppController):
+        """
+        Gets the area of the border (the whole screen).
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        (w, h) = controller.get_screen_size()
+        return (0, 0, w, h)
+
+    def get_render_key(self, controller: AppController):
+        """
+        Gets the size of the border (which only changes with the screen).
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        return controller.get_screen_size()
+
     def event(self, controller: AppController, event: pygame.event.Event):
         """
         Receives an event from the pygame interface.
@@ -5,6 +5,8 @@
     involves displaying the current input of the camera.
 """
 import pygame
+import numpy as np
+from scipy.optimize import linear_sum_assignment
 
 # Import app controller, control base class and camera
 from ..base import *
@@ -14,6 +16,10 @@ from ..assets import *
 
 DISPLAY_OFFSET_FROM_BOTTOM = 300
 NO_OF_CALIBRATION_STEPS = 5
+CALIBRATION_CIRCLE_MARGIN = 50  # Distance of corner circles from the screen edges
+CALIBRATION_FIT_KEY = pygame.K_f  # Fits the calibration to the placed circles (step 1)
+CALIBRATION_RESET_KEY = pygame.K_r  # Clears the calibration fit to circles (step 1)
+FIT_MESSAGE_COLOUR = (255, 255, 255)
 
 
 class Calibration(Control):
@@ -38,6 +44,7 @@ class Calibration(Control):
         self.current_step = 0
         self.adjust_mode = 0  # 0 for x, 1 for y.
         self.step_tip_offset = 0
+        self.fit_message = None  # Result of the last fit to the calibration circles
         self.last_time_updated = datetime.datetime.now()
 
     def update(self, controller: AppController):
@@ -73,33 +80,19 @@ class Calibration(Control):
         (screen_w, screen_h) = controller.get_screen_size()
 
         if self.current_step == 0:
-            feed = controller.camera.capture_video_pygame()
+            feed = controller.camera.get_preview((screen_w, screen_h))
             if feed is not None:
-                screen.blit(pygame.transform.scale(feed, (screen_w, screen_h)), (0, 0))
+                screen.blit(feed, (0, 0))
         else:
             # Display calibration circles
             cc_width = asset_calibration_circle.get_width()
             cc_height = asset_calibration_circle.get_height()
 
-            screen.blit(
-                asset_calibration_circle, (50 - cc_width / 2, 50 - cc_height / 2)
-            )
-            screen.blit(
-                asset_calibration_circle,
-                (screen_w - 50 - cc_width / 2, 50 - cc_height / 2),
-            )
-            screen.blit(
-                asset_calibration_circle,
-                (50 - cc_width / 2, screen_h - 50 - cc_height / 2),
-            )
-            screen.blit(
-                asset_calibration_circle,
-                (screen_w - 50 - cc_width / 2, screen_h - 50 - cc_height / 2),
-            )
-            screen.blit(
-                asset_calibration_circle,
-                (screen_w / 2 - cc_width / 2, screen_h / 2 - cc_height / 2),
-            )
+            for circle_x, circle_y in self.get_circle_positions(controller):
+                screen.blit(
+                    asset_calibration_circle,
+                    (circle_x - cc_width / 2, circle_y - cc_height / 2),
+                )
 
             # Display circles shapes
             for obj in controller.get_cam_objects():
@@ -143,8 +136,76 @@ class Calibration(Control):
 
         if step_img is not None:
             screen.blit(step_img, (placement_x, screen_h - self.step_tip_offset))
+
+        # Display result of the last fit to the calibration circles
+        if self.current_step == 1 and self.fit_message is not None:
+            text = asset_small_font.render(self.fit_message, True, FIT_MESSAGE_COLOUR)
+            screen.blit(
+                text,
+                (
+                    screen_w / 2 - text.get_width() / 2,
+                    screen_h - self.step_tip_offset - text.get_height() * 2,
+                ),
+            )
         pass
 
+    def get_circle_positions(self, controller: AppController):
+        """
+        Gets the centers of the calibration circles on screen.
+        """
+        (screen_w, screen_h) = controller.get_screen_size()
+        margin = CALIBRATION_CIRCLE_MARGIN
+        return [
+            (margin, margin),
+            (screen_w - margin, margin),
+            (margin, screen_h - margin),
+            (screen_w - margin, screen_h - margin),
+            (screen_w / 2, screen_h / 2),
+        ]
+
+    def fit_circles(self, controller: AppController):
+        """
+        Fits the camera calibration to the circle objects placed on the
+        calibration circles (each circle is matched with at most one object,
+        minimising the total distance to the calibrated objects).
+        """
+        camera = controller.camera.get_active()
+        objects = [obj for obj in camera.objects if obj.tag == Tag.CIRCLE.value]
+        circles = np.array(self.get_circle_positions(controller), dtype=np.float64)
+        if len(objects) == 0:
+            self.fit_message = "No circles found, calibration unchanged"
+            return
+
+        centers = np.array(
+            [(obj.x + obj.w / 2, obj.y + obj.h / 2) for obj in objects],
+            dtype=np.float64,
+        )
+        cost = np.linalg.norm(circles[:, None, :] - centers[None, :, :], axis=2)
+        (circle_indices, object_indices) = linear_sum_assignment(cost)
+
+        camera_points = [
+            (
+                objects[index].base_x + objects[index].base_w / 2,
+                objects[index].base_y + objects[index].base_h / 2,
+            )
+            for index in object_indices
+        ]
+        screen_points = circles[circle_indices]
+
+        if camera.fit_calibration_points(camera_points, screen_points):
+            self.fit_message = (
+                "Calibration fit to " + str(len(camera_points)) + " circles"
+            )
+        else:
+            self.fit_message = "Circles could not be fit, calibration unchanged"
+
+    def reset_circles(self, controller: AppController):
+        """
+        Clears the camera calibration fit to the calibration circles.
+        """
+        controller.camera.get_active().reset_calibration_points()
+        self.fit_message = "Calibration fit to circles cleared"
+
     def next_step(self, controller: AppController):
         """
         Moves onto the next step
@@ -174,6 +235,7 @@ class Calibration(Control):
             controller -- the app controller this control runs from
             event -- the pygame event that happened
         """
+        camera = controller.camera.get_active()  # Camera being calibrated
         if event.type == pygame.MOUSEBUTTONDOWN:
             if event.button == MOUSE_LEFT:
                 self.next_step(controller)
@@ -182,44 +244,46 @@ class Calibration(Control):
                 self.adjust_mode = 1 - self.adjust_mode
                 if self.current_step == 0:
                     # Reset threshold
-                    controller.camera.dark_threshold = 20
+                    camera.dark_threshold = 20
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_RIGHT:
                 self.next_step(controller)
             elif event.key == pygame.K_LEFT:
                 self.last_step(controller)
+            elif event.key == CALIBRATION_FIT_KEY and self.current_step == 1:
+                self.fit_circles(controller)
+            elif event.key == CALIBRATION_RESET_KEY and self.current_step == 1:
+                self.reset_circles(controller)
         elif event.type == pygame.MOUSEWHEEL:
             if self.current_step == 0:
                 # Darkness threshold
-                next_threshold = controller.camera.dark_threshold + (
-                    1 if event.y > 0 else -1
-                )
+                next_threshold = camera.dark_threshold + (1 if event.y > 0 else -1)
                 if next_threshold < 0:
                     next_threshold = 0
                 if next_threshold > 255:
                     next_threshold = 255
-                controller.camera.dark_threshold = next_threshold
+                camera.dark_threshold = next_threshold
             elif self.current_step == 2:
                 # Center offset
                 if self.adjust_mode == 0:
-                    controller.camera.offset_x += event.y / 500
+                    camera.offset_x += event.y / 500
                 else:
-                    controller.camera.offset_y += event.y / 500
+                    camera.offset_y += event.y / 500
             elif self.current_step == 3:
                 # Object sizing
                 if self.adjust_mode == 0:
-                    controller.camera.scale_x += event.y / 50
+                    camera.scale_x += event.y / 50
                 else:
-                    controller.camera.scale_y += event.y / 50
+                    camera.scale_y += event.y / 50
             elif self.current_step == 4:
                 if self.adjust_mode == 0:
-                    controller.camera.skew_top += event.y / 500
+                    camera.skew_top += event.y / 500
                 else:
-                    controller.camera.skew_left += event.y / 500
+                    camera.skew_left += event.y / 500
             elif self.current_step == 5:
                 if self.adjust_mode == 0:
-                    controller.camera.skew_bottom += event.y / 500
+                    camera.skew_bottom += event.y / 500
                 else:
-                    controller.camera.skew_right += event.y / 500
+                    camera.skew_right += event.y / 500
 
         pass
@@ -128,6 +128,30 @@ class Menu(Control):
 
         return state_hover
 
+    def get_render_bounds(self, controller: AppController):
+        """
+        Gets the area of the menu bar and (expanded) popup.
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        (screen_w, screen_h) = controller.get_screen_size()
+        menu_w = max(self.w, asset_menu_popup_container.get_width())
+        menu_h = self.h + asset_menu_popup_container.get_height()
+        return (screen_w - menu_w, screen_h - menu_h, menu_w, menu_h)
+
+    def get_render_key(self, controller: AppController):
+        """
+        Gets the state of the menu (its position and the mouse over it).
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        mouse = None
+        if controller.is_mouse_over(self.get_render_bounds(controller)):
+            mouse = pygame.mouse.get_pos()
+        return (self.x, self.y, self.menu_offset, self.mouse_down, mouse)
+
     def render(self, controller: AppController, screen: pygame.Surface):
         """
         Renders the control on every loop iteration.
@@ -12,6 +12,8 @@ from ..devices.camera import *
 from ..object import *
 from ..assets import *
 
+STATUS_BOUNDS = (0, 0, 400, 110)  # Area status overlays are drawn in
+
 
 class Status(Control):
     """
@@ -38,7 +40,7 @@ class Status(Control):
         Arguments:
             controller -- the app controller this control runs from
         """
-        if controller.camera.model_loading:
+        if controller.camera.is_model_loading():
             self.camera_verified = False
         pass
 
@@ -52,7 +54,7 @@ class Status(Control):
         """
         overlay_y = 5
         # Check if camera is loading, and if so display loading image
-        if controller.camera.loading:
+        if controller.camera.is_loading():
             screen.blit(asset_loading_camera_overlay, (5, overlay_y))
             overlay_y += 20
         elif controller.show_camera_error:
@@ -67,10 +69,19 @@ class Status(Control):
                 overlay_y += 20
 
         # Check if model is loading, and if so display loading image.
-        if controller.camera.model_loading:
+        if controller.camera.is_model_loading():
             screen.blit(asset_loading_model_overlay, (5, overlay_y))
             overlay_y += 20
-        elif controller.show_model_error and controller.camera.model is None:
+
+            # Display the stage the model is loading at (e.g. exporting, warming up)
+            progress = controller.camera.get_model_progress()
+            if progress is not None:
+                text = asset_small_font.render(
+                    progress + "...", True, pygame.Color(255, 255, 255)
+                )
+                screen.blit(text, (5, overlay_y))
+                overlay_y += 20
+        elif controller.show_model_error and not controller.camera.has_model():
             screen.blit(asset_invalid_model_overlay, (5, overlay_y))
             overlay_y += 20
 
@@ -81,6 +92,33 @@ class Status(Control):
 
         pass
 
+    def get_render_bounds(self, controller: AppController):
+        """
+        Gets the area the status overlays are drawn in.
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        return STATUS_BOUNDS
+
+    def get_render_key(self, controller: AppController):
+        """
+        Gets the statuses displayed, or None while the camera
+        is still being verified.
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        if controller.show_camera_error and not self.camera_verified:
+            return None
+        return (
+            controller.camera.is_loading(),
+            controller.camera.is_model_loading(),
+            controller.camera.get_model_progress(),
+            controller.show_model_error and not controller.camera.has_model(),
+            controller.show_board_error and not controller.board_connected(),
+        )
+
     def event(self, controller: AppController, event: pygame.event.Event):
         """
         Receives an event from the pygame interface.
@@ -57,12 +57,9 @@ class TestControl(Control):
 
         # Draw outcome slightly
         if controller.display_feed:
-            feed = controller.camera.capture_video_pygame()
+            feed = controller.camera.get_preview(controller.get_screen_size(), 50)
             if feed is not None:
-                feed.set_alpha(50)
-                screen.blit(
-                    pygame.transform.scale(feed, controller.get_screen_size()), (0, 0)
-                )
+                screen.blit(feed, (0, 0))
 
         # Test every object location (draw location)
         for object in controller.objects:
@@ -5,7 +5,6 @@ import pygame
 from ..geometry import *
 from datetime import *
 from random import randint
-from mpmath import cot
 import threading
 import math
 import numpy as np
@@ -19,6 +18,7 @@ from ..devices.camera import *
 from ..object import *
 from ..sound import *
 from ..tone_generator import ToneGenerator, CHORDS
+from ..sprites import SpriteCache
 from ..assets import *
 
 ZTYPE_OBJ_WAVEGEN = 0  # Generate waves for an object
@@ -40,6 +40,10 @@ WAVE_QUALITY = (
     4  # The quality of the wave (larger numbers are faster but less visually appealing)
 )
 WAVE_CYCLES = 2  # How many cycles of a wave is displayed
+WAVE_COLOUR_BUCKETS = 4  # Colours each wave's gradient is drawn in (one line each)
+PULSE_DUTY_CYCLE = 0.125  # Fraction of a pulse wave's cycle that is high
+RENDER_MARGIN = 128  # Pixels effects (e.g. ripples) can be drawn outside of the zone
+RIPPLE_RADIUS_STEP = 2  # Pixels between the radii of cached ripple sprites
 
 # Time taken to complete one cycle revolution
 # = (1 / FREQ) * WAVE_TIME_FREQUENCY_RATIO
@@ -68,8 +72,10 @@ def sine_factor(d, time, dist_per_cycle, time_per_cycle):
     """
     Gets the sine wave factor for the given distance d.
     i.e. the y position (percentage) should display at given dist using max amplitude.
+
+    Every argument can be a number or a numpy array (of distances and times).
     """
-    return math.sin(
+    return np.sin(
         2 * math.pi * d / dist_per_cycle + 2 * math.pi * time / time_per_cycle
     )
 
@@ -79,14 +85,7 @@ def square_factor(d, time, dist_per_cycle, time_per_cycle):
     Gets the square wave factor for the given distance d.
     i.e. the y position (percentage) should display at given dist using max amplitude.
     """
-    factor = math.sin(
-        2 * math.pi * d / dist_per_cycle + 2 * math.pi * time / time_per_cycle
-    )
-    if factor < 0:
-        factor = -1
-    if factor > 0:
-        factor = 1
-    return factor
+    return np.sign(sine_factor(d, time, dist_per_cycle, time_per_cycle))
 
 
 def pulse_factor(duty_cycle, d, time, dist_per_cycle, time_per_cycle):
@@ -94,14 +93,8 @@ def pulse_factor(duty_cycle, d, time, dist_per_cycle, time_per_cycle):
     Gets the pulse wave factor for the given distance d and duty cycle.
     i.e. the y position (percentage) should display at given dist using max amplitude.
     """
-    factor = math.sin(
-        2 * math.pi * d / dist_per_cycle + 2 * math.pi * time / time_per_cycle
-    )
-    if factor > (2 * duty_cycle - 1):
-        factor = -1
-    else:
-        factor = 1
-    return factor
+    factor = sine_factor(d, time, dist_per_cycle, time_per_cycle)
+    return np.where(factor > (2 * duty_cycle - 1), -1.0, 1.0)
 
 
 def triangle_factor(d, time, dist_per_cycle, time_per_cycle):
@@ -109,9 +102,7 @@ def triangle_factor(d, time, dist_per_cycle, time_per_cycle):
     Gets the triangle wave factor for the given distance d.
     i.e. the y position (percentage) should display at given dist using max amplitude.
     """
-    return math.sinh(
-        math.sin(2 * math.pi * d / dist_per_cycle + 2 * math.pi * time / time_per_cycle)
-    )
+    return np.sinh(sine_factor(d, time, dist_per_cycle, time_per_cycle))
 
 
 def sawtooth_factor(d, time, dist_per_cycle, time_per_cycle):
@@ -119,9 +110,54 @@ def sawtooth_factor(d, time, dist_per_cycle, time_per_cycle):
     Gets the sawtooth wave factor for the given distance d.
     i.e. the y position (percentage) should display at given dist using max amplitude.
     """
-    return math.tanh(
-        cot(2 * math.pi * d / dist_per_cycle + 2 * math.pi * time / time_per_cycle)
-    )
+    phase = 2 * math.pi * d / dist_per_cycle + 2 * math.pi * time / time_per_cycle
+    with np.errstate(divide="ignore"):
+        return np.tanh(1 / np.tan(phase))  # tanh of the cotangent
+
+
+def wave_factor(type, d, time, dist_per_cycle, time_per_cycle):
+    """
+    Gets the wave factor of the given wave type (see ObjectNode.sound_type)
+    for the given distance d, or None if the type has no wave.
+    """
+    if type == TYPE_SINE:
+        return sine_factor(d, time, dist_per_cycle, time_per_cycle)
+    elif type == TYPE_SQUARE:
+        return square_factor(d, time, dist_per_cycle, time_per_cycle)
+    elif type == TYPE_PULSE:
+        return pulse_factor(PULSE_DUTY_CYCLE, d, time, dist_per_cycle, time_per_cycle)
+    elif type == TYPE_TRIANGLE:
+        return triangle_factor(d, time, dist_per_cycle, time_per_cycle)
+    elif type == TYPE_SAWTOOTH:
+        return sawtooth_factor(d, time, dist_per_cycle, time_per_cycle)
+    return None
+
+
+def build_ripple_sprite(key):
+    """
+    Builds a white ripple ring sprite (a filled circle) for the ripple
+    sprite cache, which is tinted to the colour of a ripple when drawn.
+
+    Arguments:
+        key -- a tuple (radius, alpha) of the ring
+    """
+    (radius, alpha) = key
+    sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, (255, 255, 255, alpha), (radius, radius), radius)
+    return sprite
+
+
+def build_tint_surface(radius):
+    """
+    Builds a surface the size of a ripple ring, which white rings are
+    tinted on before they are drawn.
+    """
+    return pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+
+
+# Used from the render thread
+ripple_sprites = SpriteCache(build_ripple_sprite)
+ripple_tints = SpriteCache(build_tint_surface)
 
 
 def line_rotation(d, origin_x, origin_y, rot):
@@ -136,8 +172,8 @@ def line_rotation(d, origin_x, origin_y, rot):
     """
 
     # Store cos and sin for computational efficiency
-    rot_cos = math.cos(rot)
-    rot_sin = math.sin(rot)
+    rot_cos = np.cos(rot)
+    rot_sin = np.sin(rot)
 
     # Perform 2D rotation around the origin
     return (origin_x + d * rot_cos, origin_y + d * rot_sin)
@@ -161,8 +197,8 @@ def wave_rotation(factor, d, dist, amp_dist, origin_x, origin_y, rot):
     amp_percentage = 1 - abs(dist / 2 - d) / (dist / 2)
 
     # Store cos and sin for computational efficiency
-    rot_cos = math.cos(rot)
-    rot_sin = math.sin(rot)
+    rot_cos = np.cos(rot)
+    rot_sin = np.sin(rot)
 
     # Calculate the height (amplitude) of the wave at d (from center)
     y = factor * amp_percentage * amp_dist
@@ -219,6 +255,9 @@ class Zone(Control):
         # self.time_since_playback_placed = datetime.datetime.min
         self.arrange_thread = None
         self.selected = False
+        self.static_layer = None  # Cached static decoration (see get_static_layer)
+        self.static_layer_key = None
+        self.metre_indicator = None
 
     def get_max_dist(self):
         """Returns min distance from centre to edge (max for tone generator to use)."""
@@ -429,6 +468,7 @@ class Zone(Control):
                     with highlighted_zones_rlock:
                         highlighted_zones[object.tag] = play_sounds
 
+        controller.tracer.stamp("zone")
         return
 
     def metre_count(self, controller):
@@ -515,19 +555,73 @@ class Zone(Control):
             (x + corner_width, y + h - border_width),
         )
 
-    def render(self, controller: AppController, screen: pygame.Surface):
+    def get_static_layer(self, controller: AppController):
         """
-        Renders the control on every loop iteration.
+        Gets the surface of the static decoration of the zone (its border,
+        playback box, icons, octave circles and chord lines), which is only
+        drawn again when the size, chord, selection or type of the zone changes.
 
         Arguments:
             controller -- the app controller this control runs from
-            screen -- the surface this control is drawn on.
+
+        Returns:
+            a tuple (layer, (x, y)) of the surface and where it is drawn.
+        """
+        # Position of the layer from the zone (includes the playback box)
+        (offset_x, offset_y) = (0, 0)
+        (w, h) = (self.w, self.h)
+        if self.type == ZTYPE_OBJ_WAVEGEN:
+            (px, py, pw, ph) = self.get_playback_box_bounds(controller)
+            (offset_x, offset_y) = (min(0, px - self.x), min(0, py - self.y))
+            w = max(self.w, px - self.x + pw) - offset_x
+            h = max(self.h, py - self.y + ph * 2.5) - offset_y  # Includes icon
+
+        # Layer is drawn at whole pixels, so the zone keeps its fraction of a pixel.
+        # It only covers the part on screen, so anything off screen is clipped
+        # (and pygame truncates negative positions) exactly as on the screen.
+        (screen_w, screen_h) = controller.get_screen_size()
+        layer_x = max(0, math.floor(self.x + offset_x))
+        layer_y = max(0, math.floor(self.y + offset_y))
+        (x, y) = (self.x - layer_x, self.y - layer_y)
+        size = (
+            min(screen_w - layer_x, math.ceil(x + offset_x + w)),
+            min(screen_h - layer_y, math.ceil(y + offset_y + h)),
+        )
+
+        key = (
+            (x, y, self.w, self.h),
+            size,
+            self.chord,
+            self.selected,
+            self.type,
+            self.wave_gen_tag,
+        )
+        if self.static_layer is None or self.static_layer_key != key:
+            self.static_layer = pygame.Surface(
+                (max(1, size[0]), max(1, size[1])), pygame.SRCALPHA
+            )
+            self.static_layer.fill((0, 0, 0, 0))
+            self.draw_static(controller, self.static_layer, x, y)
+            self.static_layer_key = key
+
+        return (self.static_layer, (layer_x, layer_y))
+
+    def draw_static(self, controller: AppController, surface: pygame.Surface, x, y):
+        """
+        Draws the static decoration of the zone (see get_static_layer).
+
+        Arguments:
+            controller -- the app controller this control runs from
+            surface -- the surface the decoration is drawn on
+            x -- the position of the zone on the surface
+            y -- the position of the zone on the surface
         """
-        self.draw_border(screen, self.x, self.y, self.w, self.h)
+        self.draw_border(surface, x, y, self.w, self.h)
 
         if self.type == ZTYPE_OBJ_WAVEGEN:
             (px, py, pw, ph) = self.get_playback_box_bounds(controller)
-            self.draw_border(screen, px, py, pw, ph)
+            (px, py) = (px - self.x + x, py - self.y + y)
+            self.draw_border(surface, px, py, pw, ph)
 
             objimg = None
             if self.wave_gen_tag == Tag.STAR.value:
@@ -540,43 +634,39 @@ class Zone(Control):
                 objimg = asset_objimg_circle
 
             if objimg is not None:
-                screen.blit(
+                surface.blit(
                     objimg,
                     (
                         px + pw / 2 - objimg.get_width() / 2,
                         py + ph * 1.5 + 10 - objimg.get_height() / 2,
                     ),
                 )
-                screen.blit(
+                surface.blit(
                     objimg,
                     (
-                        self.x + self.w / 2 - objimg.get_width() / 2,
-                        self.y + self.h / 2 - objimg.get_height() / 2,
-                    ),
-                )
-
-            if self.sound_enabled:
-                screen.blit(
-                    asset_playback,
-                    (
-                        px + pw / 2 - asset_playback.get_width() / 2,
-                        py + ph * 2.5 + 10 - asset_playback.get_height() / 2,
+                        x + self.w / 2 - objimg.get_width() / 2,
+                        y + self.h / 2 - objimg.get_height() / 2,
                     ),
                 )
 
             # Draw octave circles
+            (cx, cy) = (x + self.w / 2, y + self.h / 2)
             max_dist = self.get_max_dist()
             for i in range(2):
                 dist = (i + 1) * max_dist / 3
                 pygame.draw.circle(
-                    screen, pygame.Color(255, 255, 255), self.get_center(), dist, 2
+                    surface, pygame.Color(255, 255, 255), (cx, cy), dist, 2
                 )
 
+            # Chord lines are worked out on screen and then moved onto the
+            # surface (by whole pixels), so they round exactly as if they were
+            # drawn on the screen (e.g. cos(3pi/2) is not exactly 0)
+            (origin_x, origin_y) = (round(self.x - x), round(self.y - y))
+            (cx, cy) = (self.x + self.w / 2, self.y + self.h / 2)
             lines = 3 if self.chord == "major" or self.chord == "minor" else 4
             rot_per_line = math.pi * 2 / lines
             rot = 0
             for i in range(lines):
-                (cx, cy) = self.get_center()
                 max_length = math.sqrt((self.x - cx) ** 2 + (self.y - cy) ** 2)
                 line = (
                     (cx, cy),
@@ -605,29 +695,57 @@ class Zone(Control):
                     )
                     length = max_length
                     if intersection is not None:
-                        (px, py) = intersection
+                        (ix, iy) = intersection
                         # Calculate length according to distance to intersection
-                        length = math.sqrt((px - cx) ** 2 + (py - cy) ** 2)
+                        length = math.sqrt((ix - cx) ** 2 + (iy - cy) ** 2)
 
                 if length > max_length:
                     length = max_length
 
                 length -= 2  # Reduce length so that it doesn't draw over the border
 
+                (end_x, end_y) = (
+                    length * math.cos(rot) + cx,
+                    length * math.sin(rot) + cy,
+                )
                 pygame.draw.line(
-                    screen,
+                    surface,
                     pygame.Color(255, 255, 255),
-                    (cx, cy),
-                    (length * math.cos(rot) + cx, length * math.sin(rot) + cy),
+                    (cx - origin_x, cy - origin_y),
+                    (end_x - origin_x, end_y - origin_y),
                     2,
                 )
                 rot += rot_per_line
 
         if self.type == ZTYPE_OBJ_ARRANGEMENT:
-            zone_metre_indicator = pygame.Surface((self.w / 8, self.h), pygame.SRCALPHA)
-            zone_metre_indicator.fill((255, 255, 255, 96))
+            # Highlight of the current bar (moved along by the metre)
+            self.metre_indicator = pygame.Surface((self.w / 8, self.h), pygame.SRCALPHA)
+            self.metre_indicator.fill((255, 255, 255, 96))
+
+    def render(self, controller: AppController, screen: pygame.Surface):
+        """
+        Renders the control on every loop iteration.
+
+        Arguments:
+            controller -- the app controller this control runs from
+            screen -- the surface this control is drawn on.
+        """
+        (layer, position) = self.get_static_layer(controller)
+        screen.blit(layer, position)
+
+        if self.type == ZTYPE_OBJ_WAVEGEN and self.sound_enabled:
+            (px, py, pw, ph) = self.get_playback_box_bounds(controller)
+            screen.blit(
+                asset_playback,
+                (
+                    px + pw / 2 - asset_playback.get_width() / 2,
+                    py + ph * 2.5 + 10 - asset_playback.get_height() / 2,
+                ),
+            )
+
+        if self.type == ZTYPE_OBJ_ARRANGEMENT:
             screen.blit(
-                zone_metre_indicator, (self.x + self.metre * self.w / 8, self.y)
+                self.metre_indicator, (self.x + self.metre * self.w / 8, self.y)
             )
             
             for object in self.current_objects:
@@ -664,6 +782,42 @@ class Zone(Control):
             text_rect.center = (self.x + 5 + text_rect.width / 2, +  self.y + 7)
             screen.blit(text, text_rect)
 
+    def get_render_bounds(self, controller: AppController):
+        """
+        Gets the area the zone draws in (the zone, its playback box and
+        the effects of its objects).
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        (px, py, pw, ph) = self.get_playback_box_bounds(controller)
+        rect = pygame.Rect(self.x, self.y, self.w, self.h).union(
+            pygame.Rect(px, py, pw, ph * 4)  # Box, marker image and playback image
+        )
+        return tuple(rect.inflate(RENDER_MARGIN * 2, RENDER_MARGIN * 2))
+
+    def get_render_key(self, controller: AppController):
+        """
+        Gets a value that changes when the drawing of the zone changes,
+        or None while objects in the zone are animated.
+
+        Arguments:
+            controller -- the app controller this control runs from
+        """
+        if len(self.current_objects) > 0:
+            return None
+        if self.graph is not None and len(self.graph.connections) > 0:
+            return None
+        return (
+            self.type,
+            self.chord,
+            self.selected,
+            self.sound_enabled,
+            self.wave_gen_tag,
+            self.metre,
+            self.is_global and not controller.use_global_zone,
+        )
+
     def generate_ripples(self, screen: pygame.Surface, obj: CamObject):
         """
         Generates a ripple effect on the given object.
@@ -676,15 +830,25 @@ class Zone(Control):
         if colour is None:
             colour = pygame.Color(255, 255, 255, 100)
 
+        (cx, cy) = obj.get_center()
         for i in range(ripple_count):
-            colour.a = 100 - (i * 20)  # Update alpha
+            alpha = 100 - (i * 20)
             adj_state = state + (i * 10)
-            rect = pygame.Rect(obj.get_center(), (0, 0)).inflate(
-                (adj_state * 2, adj_state * 2)
+
+            # Pick the cached ring of the nearest radius
+            radius = round(adj_state / RIPPLE_RADIUS_STEP) * RIPPLE_RADIUS_STEP
+            if radius < 1:
+                continue
+
+            # Tint the white ring with the colour of the ripple
+            tint = ripple_tints.get(radius)
+            tint.fill((colour.r, colour.g, colour.b, 255))
+            tint.blit(
+                ripple_sprites.get((radius, alpha)),
+                (0, 0),
+                special_flags=pygame.BLEND_RGBA_MULT,
             )
-            surf = pygame.Surface(rect.size, pygame.SRCALPHA)
-            pygame.draw.circle(surf, colour, (adj_state, adj_state), adj_state)
-            screen.blit(surf, rect)
+            screen.blit(tint, (int(cx) - radius, int(cy) - radius))
 
     def event(self, controller: AppController, event: pygame.event.Event):
         """
@@ -762,195 +926,131 @@ class ObjectNode:
         """
         An alternate update method using a different thread for expensive operations for
         the sole-purpose of generating drawing data.
+
+        The wave lines of every connection are generated at once (as numpy arrays).
         """
+        if len(self.connections) > 0:
+            self.update_wave_lines()
+
         for connection in self.connections:
-            # At moment, visualisation produce the wave line of the object connected to.
-            type_from = self.sound_type()
-            type_to = connection.sound_type()
+            connection.prerender_update(controller)
 
-            # Get colours from ripples
-            color_from = pygame.Color(255, 255, 255, 100)
-            if self.object is not None:
-                color_from = self.object.get_object_attribute("ripple_colour")
-                if color_from is None:
-                    color_from = pygame.Color(255, 255, 255, 100)
+        self.completed = True
+
+    def update_wave_lines(self):
+        """
+        Generates the wave line of every connection (the wave of the object
+        connected to), split into a few lines of a single colour each
+        (see WAVE_COLOUR_BUCKETS), so each is drawn with a single call.
+        """
+        # Get colours from ripples
+        color_from = pygame.Color(255, 255, 255, 100)
+        if self.object is not None:
+            color_from = self.object.get_object_attribute("ripple_colour")
+            if color_from is None:
+                color_from = pygame.Color(255, 255, 255, 100)
+
+        types = np.array([connection.sound_type() for connection in self.connections])
+        times = np.array(
+            [
+                connection.object.get_time_since_creation()
+                if connection.object is not None
+                else 0
+                for connection in self.connections
+            ],
+            dtype=np.float64,
+        )
+        centers = np.array(
+            [connection.center for connection in self.connections], dtype=np.float64
+        )
+        (cx1, cy1) = self.center
+        (dx, dy) = (centers[:, 0] - cx1, centers[:, 1] - cy1)
+
+        amplitude = 2000  # to be edited later
+
+        dists = np.floor(np.sqrt(dx * dx + dy * dy))
+        amp_dists = (dists / 4) * (amplitude / HIGH_AMP)
+        freq = 2400
+        slope_rots = np.arctan2(dy, dx)
+
+        dist_per_cycle = WAVE_SPAN / WAVE_CYCLES
+        time_per_cycle = (1 / freq) * WAVE_TIME_FREQUENCY_RATIO
+        wave_spans = np.minimum(WAVE_SPAN, dists)
+
+        # Generate wave points (one row per connection) from wave rotation and factor
+        d = np.arange(0, WAVE_SPAN, WAVE_QUALITY, dtype=np.float64)
+        factors = np.zeros((len(self.connections), len(d)))
+        has_wave = np.zeros(len(self.connections), dtype=bool)
+        for type in np.unique(types):
+            rows = types == type
+            factor = wave_factor(
+                type, d[None, :], times[rows, None], dist_per_cycle, time_per_cycle
+            )
+            if factor is not None:
+                factors[rows] = factor
+                has_wave[rows] = True
+
+        (wsx, wsy) = line_rotation(dists / 2 - wave_spans / 2, cx1, cy1, slope_rots)
+        (wex, wey) = line_rotation(wave_spans, wsx, wsy, slope_rots)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            (xs, ys) = wave_rotation(
+                factors,
+                d[None, :],
+                wave_spans[:, None],
+                amp_dists[:, None],
+                wsx[:, None],
+                wsy[:, None],
+                slope_rots[:, None],
+            )
+            gradient = d[None, :] / wave_spans[:, None]
+
+        # Lines without a wave go straight from the center to the connection
+        (wsx, wsy) = (np.where(has_wave, wsx, cx1), np.where(has_wave, wsy, cy1))
+        (wex, wey) = (np.where(has_wave, wex, cx1), np.where(has_wave, wey, cy1))
+
+        # Samples past the end of a wave are moved onto its end (so every line
+        # has the same number of points)
+        past_end = (d[None, :] >= wave_spans[:, None]) | ~has_wave[:, None]
+        xs = np.where(past_end, wex[:, None], xs)
+        ys = np.where(past_end, wey[:, None], ys)
+
+        count = len(self.connections)
+        xs = np.column_stack([np.full(count, cx1), wsx, xs, wex, centers[:, 0]])
+        ys = np.column_stack([np.full(count, cy1), wsy, ys, wey, centers[:, 1]])
+        points = np.stack([xs, ys], axis=2).tolist()
+
+        # Each segment is drawn in the colour of the point it ends at (from 0 for
+        # the colour of this object to 1 for the colour of the connected object)
+        gradient = np.where(past_end, 1, gradient)
+        gradient = np.column_stack([np.zeros((count, 2)), gradient, np.ones((count, 2))])
+        gradient[~has_wave] = 1
+        buckets = np.rint(gradient * (WAVE_COLOUR_BUCKETS - 1)).astype(int)
+        ends = np.column_stack(
+            [
+                np.count_nonzero(buckets <= bucket, axis=1)
+                for bucket in range(WAVE_COLOUR_BUCKETS)
+            ]
+        ).tolist()
 
+        for i, connection in enumerate(self.connections):
             color_to = color_from
             if connection.object is not None:
                 color_to = connection.object.get_object_attribute("ripple_colour")
                 if color_to is None:
                     color_to = pygame.Color(255, 255, 255, 100)
 
-            (cx1, cy1) = self.center
-            (cx2, cy2) = connection.center
-
-            amplitude = 2000  # to be edited later
-
-            dist = int(math.sqrt((cx2 - cx1) * (cx2 - cx1) + (cy2 - cy1) * (cy2 - cy1)))
-            amp_dist = (dist / 4) * (amplitude / HIGH_AMP)
-            freq = 2400
-            slope_rot = math.atan2(cy2 - cy1, cx2 - cx1)
-            points = []
-            add_point = points.append
-
-            time = 0
-
-            if connection.object is not None:
-                time = connection.object.get_time_since_creation()
-
-            dist_per_cycle = WAVE_SPAN / WAVE_CYCLES
-            time_per_cycle = (1 / freq) * WAVE_TIME_FREQUENCY_RATIO
-            wave_span = WAVE_SPAN
-            if wave_span > dist:
-                wave_span = dist
-            # t = datetime.datetime.now()
-
-            # Generate wave points from wave rotation and factor
-            if type_to == TYPE_SINE:
-                add_point((self.center, color_from))
-                wave_start = line_rotation(
-                    dist / 2 - wave_span / 2, cx1, cy1, slope_rot
-                )
-                add_point((wave_start, color_from))
-                (wsx, wsy) = wave_start
-                for d in range(0, wave_span, WAVE_QUALITY):
-                    add_point(
-                        (
-                            wave_rotation(
-                                sine_factor(d, time, dist_per_cycle, time_per_cycle),
-                                d,
-                                wave_span,
-                                amp_dist,
-                                wsx,
-                                wsy,
-                                slope_rot,
-                            ),  # get position of sine wave at distance.
-                            color_from.lerp(color_to, d / wave_span),
-                        )
-                    )
-
-                add_point((line_rotation(wave_span, wsx, wsy, slope_rot), color_to))
-                add_point((connection.center, color_to))
-            elif type_to == TYPE_SQUARE:
-                add_point((self.center, color_from))
-                wave_start = line_rotation(
-                    dist / 2 - wave_span / 2, cx1, cy1, slope_rot
-                )
-                add_point((wave_start, color_from))
-                (wsx, wsy) = wave_start
-                for d in range(0, wave_span, WAVE_QUALITY):
-                    add_point(
-                        (
-                            wave_rotation(
-                                square_factor(d, time, dist_per_cycle, time_per_cycle),
-                                d,
-                                wave_span,
-                                amp_dist,
-                                wsx,
-                                wsy,
-                                slope_rot,
-                            ),  # get position of sine wave at distance.
-                            color_from.lerp(color_to, d / wave_span),
-                        )
+            # Points of the segments of each colour (the colour only increases)
+            lines = []
+            start = 1
+            for bucket, end in enumerate(ends[i]):
+                if end > start:
+                    amount = bucket / (WAVE_COLOUR_BUCKETS - 1)
+                    lines.append(
+                        (color_from.lerp(color_to, amount), points[i][start - 1 : end])
                     )
+                    start = end
 
-                add_point((line_rotation(wave_span, wsx, wsy, slope_rot), color_to))
-                add_point((connection.center, color_to))
-            elif type_to == TYPE_PULSE:
-                duty_cycle = 0.125
-                add_point((self.center, color_from))
-                wave_start = line_rotation(
-                    dist / 2 - wave_span / 2, cx1, cy1, slope_rot
-                )
-                add_point((wave_start, color_from))
-                (wsx, wsy) = wave_start
-                for d in range(0, wave_span, WAVE_QUALITY):
-                    add_point(
-                        (
-                            wave_rotation(
-                                pulse_factor(
-                                    duty_cycle, d, time, dist_per_cycle, time_per_cycle
-                                ),
-                                d,
-                                wave_span,
-                                amp_dist,
-                                wsx,
-                                wsy,
-                                slope_rot,
-                            ),  # get position of sine wave at distance.
-                            color_from.lerp(color_to, d / wave_span),
-                        )
-                    )
-
-                add_point((line_rotation(wave_span, wsx, wsy, slope_rot), color_to))
-                add_point((connection.center, color_to))
-            elif type_to == TYPE_TRIANGLE:
-                add_point((self.center, color_from))
-                wave_start = line_rotation(
-                    dist / 2 - wave_span / 2, cx1, cy1, slope_rot
-                )
-                add_point((wave_start, color_from))
-                (wsx, wsy) = wave_start
-                for d in range(0, wave_span, WAVE_QUALITY):
-                    add_point(
-                        (
-                            wave_rotation(
-                                triangle_factor(
-                                    d, time, dist_per_cycle, time_per_cycle
-                                ),
-                                d,
-                                wave_span,
-                                amp_dist,
-                                wsx,
-                                wsy,
-                                slope_rot,
-                            ),  # get position of sine wave at distance.
-                            color_from.lerp(color_to, d / wave_span),
-                        )
-                    )
-
-                add_point((line_rotation(wave_span, wsx, wsy, slope_rot), color_to))
-                add_point((connection.center, color_to))
-            elif type_to == TYPE_SAWTOOTH:
-                add_point((self.center, color_from))
-                wave_start = line_rotation(
-                    dist / 2 - wave_span / 2, cx1, cy1, slope_rot
-                )
-                add_point((wave_start, color_from))
-                (wsx, wsy) = wave_start
-                for d in range(0, wave_span, WAVE_QUALITY):
-                    add_point(
-                        (
-                            wave_rotation(
-                                sawtooth_factor(
-                                    d, time, dist_per_cycle, time_per_cycle
-                                ),
-                                d,
-                                wave_span,
-                                amp_dist,
-                                wsx,
-                                wsy,
-                                slope_rot,
-                            ),  # get position of sine wave at distance.
-                            color_from.lerp(color_to, d / wave_span),
-                        )
-                    )
-
-                add_point((line_rotation(wave_span, wsx, wsy, slope_rot), color_to))
-                add_point((connection.center, color_to))
-            else:
-                points = [(self.center, color_from)]  # Single line
-
-            points.append((connection.center, color_to))
-
-            if len(points) == 0:
-                pass
-
-            connection.wave_lines = points  # Update to new wave list.
-
-            connection.prerender_update(controller)
-
-        self.completed = True
+            connection.wave_lines = lines  # Update to new wave list.
 
     def render(self, controller, screen, zone: Zone):
         """
@@ -960,20 +1060,12 @@ class ObjectNode:
 
         for connection in self.connections:
             # Render all lines in wave lines
-            last_center = self.center
-            wave_lines = connection.wave_lines
-
-            # pygame.draw.aalines(screen, pygame.Color(255,255,255,255), False, wave_lines)
-
-            for line in wave_lines:
-                (center, color) = line
-                pygame.draw.aaline(screen, color, last_center, center)
-                last_center = center
-
-                wave_img = None
+            for color, points in connection.wave_lines:
+                pygame.draw.aalines(screen, color, False, points)
 
             zone.generate_ripples(screen, connection.object)
 
+            wave_img = None
             type = connection.sound_type()
 
             if type == TYPE_SINE:
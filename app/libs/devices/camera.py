@@ -12,263 +12,631 @@ import threading
 import os
 from ..object import *
 import time
-from multiprocessing import Process, Queue, Manager
-from ultralytics import YOLO
-from collections import defaultdict
-from ..mp import Message
+from multiprocessing import Process, Pipe
+
+try:
+    import psutil  # Optional (pins worker processes on Windows)
+except ImportError:
+    psutil = None
+from ..mp import Message, FrameRingBuffer, DetectionMailbox
+from ..trace import get_peak_rss
+from .capture import CaptureService, CAPTURE_BUFFERS
+from .tracks import TrackTable
+from .detector import Detector, BACKEND_AUTO
+from .motion import MotionGate, MOTION_THRESHOLD, MOTION_MAX_STALENESS
+from .tracker import KalmanTracker, DETECTION_INTERVAL
+from .sources import (
+    open_source,
+    get_swap_recording_file,
+    RecordingWriter,
+    RecordedSource,
+)
+from .homography import (
+    calibrate_boxes,
+    uncalibrate_points,
+    fit_point_homography,
+    transform_boxes,
+)
 
 ASSET_TRAINED_MODEL = os.path.abspath("assets/model.pt")
 MODEL_CONFIDENCE_THRESHOLD = 0.5
 OBJECT_PERSISTENCE = (
     3  # Objects that were not found should still persist for a few seconds
 )
+TRACK_EVICTION_GRACE = (
+    2  # Seconds after persistence ends until a track is forgotten by the model
+)
 CAMERA_UPDATE_DELAY = 0.1  # Number of seconds until camera is allowed to update again.
 CAMERA_BW_THRESHOLD = 20  # Threshold on darkness to consider black
-MAX_ITEMS_IN_MP_QUEUE = (
-    3  # Number of items that can be queued until results are forcibly popped.
+CALIBRATION_FILE = "calibration.map"  # Calibration settings of the first camera
+FRAME_WAIT_TIMEOUT = (
+    0.5  # Max seconds the model waits for a new frame before checking messages.
 )
+MODEL_IMGSZ = 640  # Input size of the model when run on the full frame
+ROI_MIN_IMGSZ = 320  # Smallest input size the model is run at on a region of interest
+ROI_MARGIN = 0.05  # Margin around the region of interest (as perc of screen)
+ROI_MAX_AREA = 0.9  # Regions covering more of the frame (perc) run on the full frame
+BATCH_WINDOW = 0.01  # Max seconds a shared model waits for frames of other cameras
+BATCH_POLL_INTERVAL = 0.002  # Seconds between checks for frames of other cameras
+WARMUP_INFERENCES = 3  # Blank frames the model is run on before it is announced loaded
+
+GRAY_PALETTE = [(i, i, i) for i in range(256)]  # Palette of filtered (gray) frames
 
 MP_MSG_YOLO_ERROR = 0
 MP_MSG_YOLO_MODEL_LOADED = 1
 MP_MSG_SIZEX = 2
 MP_MSG_SIZEY = 3
+MP_MSG_CLASS_NAMES = 4
+MP_MSG_ROI = 5
+MP_MSG_STATS = 6  # Request (and reply) of the worker's CPU time and memory stats
+MP_MSG_YOLO_PROGRESS = 7  # Description of the stage the model is loading at
 MP_MSG_QUIT = 100
 
 
 class CameraQueueManager:
     """
-    Wrapper for the four camera/yolo queues.
+    Wrapper for the camera/yolo channels: the shared frame buffer,
+    the shared detection mailbox and the control message pipe.
     """
 
     def __init__(self):
         """
-        Initialises the four camera/yolo queues.
+        Initialises the camera/yolo channels.
         """
-        self.camera_feed_queue = Manager().Queue(1)  # Sending camera feed to YOLO
-        self.object_detection_queue = Manager().Queue(
-            5
-        )  # Sending object results to main process
-        self.message_camera_queue = Manager().Queue(5)  # From camera to yolo
-        self.message_yolo_queue = Manager().Queue(5)  # From yolo to camera
+        self.frames = FrameRingBuffer()  # Sending camera feed to YOLO
+        self.detections = DetectionMailbox()  # Sending object results to main process
 
+        # Control messages (both directions)
+        (self.message_camera_connection, self.message_yolo_connection) = Pipe()
 
-queues = None
+    def close(self):
+        """
+        Releases the shared memory used by the channels.
+        """
+        self.frames.close()
+        self.detections.close()
 
 
-def load_yolo_model(path):
+
+def get_roi_sizes():
+    """
+    Gets every input size the model may be run at on a region of interest
+    (see get_roi_crop), smaller than the full frame size.
     """
-    Loads the YOLOv8 trained model into runtime.
+    return list(range(ROI_MIN_IMGSZ, MODEL_IMGSZ, 32))
 
-    If self.has_model is set to False, then the
-    path is ignored and YOLOv8n is loaded.
+
+def get_roi_crop(roi, width, height):
+    """
+    Gets the pixels of a frame the model is run on, and the input size
+    of the model (smaller regions run at a smaller size, keeping the same
+    pixels per input as the full frame).
 
     Arguments:
-        path -- the path that contains the trained model.
+        roi -- the region of interest (xmin, ymin, xmax, ymax) as perc of frame,
+               or None for the full frame.
+        width, height -- the size of the frame
+
+    Returns:
+        a tuple (xmin, ymin, xmax, ymax, imgsz) in pixels.
     """
-    global queues
+    if roi is None:
+        return (0, 0, width, height, MODEL_IMGSZ)
+
+    (xmin, ymin, xmax, ymax) = roi
+    xmin = int(max(0, min(width, xmin * width)))
+    ymin = int(max(0, min(height, ymin * height)))
+    xmax = int(max(xmin, min(width, np.ceil(xmax * width))))
+    ymax = int(max(ymin, min(height, np.ceil(ymax * height))))
+
+    roi_w = xmax - xmin
+    roi_h = ymax - ymin
+    if roi_w * roi_h > width * height * ROI_MAX_AREA or roi_w == 0 or roi_h == 0:
+        return (0, 0, width, height, MODEL_IMGSZ)
+
+    # Keep pixels per input the same, rounded up to the model stride (32)
+    imgsz = MODEL_IMGSZ * max(roi_w / width, roi_h / height)
+    imgsz = max(ROI_MIN_IMGSZ, int(np.ceil(imgsz / 32)) * 32)
+    return (xmin, ymin, xmax, ymax, imgsz)
+
+
+def pin_process(cores):
+    """
+    Pins the current process to the given cores (if supported).
+
+    Arguments:
+        cores -- a list of core indices, or None to run on any core.
+    """
+    if not cores:
+        return
     try:
-        print("YOLOv8 Model Initialising...")
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+        elif psutil is not None:
+            psutil.Process().cpu_affinity(list(cores))
+    except Exception as e:
+        print("Failed to pin YOLO process to cores " + str(cores) + ": " + str(e))
 
-        # Load the model from a file
-        model = None
-        if path is not None:
-            model = YOLO(ASSET_TRAINED_MODEL)
-        else:
-            model = YOLO("yolov8n.pt")
 
-        print("YOLOv8 Model Initialised.")
+class DetectionWorker:
+    """
+    Runs in the YOLO sub-process, turning the frames of a single camera
+    into detection records: reads frames from the shared frame buffer,
+    crops them to the region of interest, skips frames without motion,
+    and converts model results into averaged tracks for the camera.
 
-        # Tell main process that yolo was successfully initialised
-        queues.message_yolo_queue.put(Message(MP_MSG_YOLO_MODEL_LOADED))
+    The model is only run on every few frames, with the boxes of the
+    frames between predicted by the tracker (see tracker.py).
+    """
 
-        camera_feed = None
+    def __init__(
+        self,
+        queues,
+        motion_threshold=MOTION_THRESHOLD,
+        max_staleness=MOTION_MAX_STALENESS,
+        detection_interval=DETECTION_INTERVAL,
+    ):
+        """
+        Creates the worker of a camera.
 
-        # Initialize the dictionaries
-        track_histories = defaultdict(list)
-        track_averages = defaultdict(list)
-        registered_results = {}
+        Arguments:
+            queues -- the channels shared with the camera (see CameraQueueManager)
+            motion_threshold -- the perc of changed pixels needed to run the model
+                                (see motion.py, 0 runs the model on every frame)
+            max_staleness -- the max seconds between model runs without motion
+            detection_interval -- the frames per model run
+                                  (1 runs the model on every frame with motion)
+        """
+        self.queues = queues
+        self.connection = queues.message_yolo_connection
+        self.last_frame_sequence = 0  # Last frame the model was run on
+
+        # Initialize the track state (averaged boxes of each tracked object)
+        self.tracks = TrackTable()
+        self.last_timestamp = 0.0  # Time of the last model results
+
+        # Skip frames where nothing has moved since the model last ran
+        self.motion_gate = MotionGate(motion_threshold, max_staleness)
+
+        # Assigns track ids, and predicts tracks between model runs
+        self.tracker = KalmanTracker()
+        self.detection_interval = max(1, detection_interval)
+        self.frames_since_detection = self.detection_interval  # Detect first frame
+
+        self.screen_x = 1920
+        self.screen_y = 1080
+        self.roi = None  # Region of interest (as perc of frame)
+
+        # Frame held by the worker (see acquire())
+        self.frame_sequence = 0
+        self.feed = None  # Region of the frame the model is run on
+        self.crop = (0, 0, 0, 0)  # Region (xmin, ymin, xmax, ymax) in pixels
+        self.frame_size = (0, 0)
+        self.imgsz = MODEL_IMGSZ
+        self.trace_points = (0, 0, 0)  # Capture, queue and dequeue times
+        self.frame_time = 0.0  # Monotonic time the held frame was captured
+
+        # CPU seconds spent in each stage (see get_stats)
+        self.cpu_times = {
+            "acquire": 0.0,
+            "model": 0.0,
+            "tracking": 0.0,
+            "conversion": 0.0,
+        }
+        self.inferences = 0  # Number of frames the model was run on
+
+    def send(self, type, data=0):
+        """
+        Sends a message to the camera.
+        """
+        self.connection.send(Message(type, data))
 
-        screen_x = 1920
-        screen_y = 1080
-        # Repeatedly get object detection results in this thread
-        while True:
-            # Process messages from main thread
-            while queues.message_camera_queue.qsize() > 0:
-                msg = queues.message_camera_queue.get()
-                if msg.type == MP_MSG_QUIT:
-                    return
-                elif msg.type == MP_MSG_SIZEX:
-                    screen_x = msg.data
-                elif msg.type == MP_MSG_SIZEY:
-                    screen_y = msg.data
+    def process_messages(self):
+        """
+        Processes messages from the camera.
+
+        Returns:
+            False if the camera has asked the worker to quit.
+        """
+        while self.connection.poll():
+            msg = self.connection.recv()
+            if msg.type == MP_MSG_QUIT:
+                return False
+            elif msg.type == MP_MSG_SIZEX:
+                self.screen_x = msg.data
+            elif msg.type == MP_MSG_SIZEY:
+                self.screen_y = msg.data
+            elif msg.type == MP_MSG_ROI:
+                self.roi = msg.data
+            elif msg.type == MP_MSG_STATS:
+                self.send(MP_MSG_STATS, self.get_stats())
+        return True
+
+    def add_model_time(self, cpu_time):
+        """
+        Adds the CPU seconds of a model run to the stats of the worker.
+        """
+        self.cpu_times["model"] += cpu_time
+        self.inferences += 1
+
+    def get_stats(self):
+        """
+        Gets the stats of the worker (CPU seconds of each stage, frames
+        the model was run on and skipped, and the peak memory of the process).
+        """
+        return {
+            "cpu_times": dict(self.cpu_times),
+            "inferences": self.inferences,
+            "skipped": self.motion_gate.skipped,
+            "peak_rss_kb": get_peak_rss(),
+        }
+
+    def has_new_frame(self):
+        """
+        Returns True if a frame the model has not seen has arrived.
+        """
+        return self.queues.frames.get_sequence() != self.last_frame_sequence
+
+    def wait_for_frame(self, timeout):
+        """
+        Blocks until a frame the model has not seen arrives (or the timeout).
+        """
+        return self.queues.frames.wait_for_frame(self.last_frame_sequence, timeout)
 
-            # Get feed from main thread
-            if queues.camera_feed_queue.qsize() > 0:
-                camera_feed = queues.camera_feed_queue.get()
+    def acquire(self):
+        """
+        Holds the newest frame for the model (read in place from shared memory),
+        cropped to the region of interest. Frames without motion are not held,
+        and the last results are republished instead. Frames between model runs
+        are not held either, and the predicted tracks are published instead.
+
+        Returns:
+            True if a frame is held (see feed), which must then be released.
+        """
+        cpu_start = time.process_time()
+        try:
+            return self.acquire_frame()
+        finally:
+            self.cpu_times["acquire"] += time.process_time() - cpu_start
 
-            # Process feed
-            if camera_feed is not None:
-                if queues.object_detection_queue.qsize() >= MAX_ITEMS_IN_MP_QUEUE:
-                    queues.object_detection_queue.get()
+    def acquire_frame(self):
+        """
+        Holds the newest frame for the model (see acquire).
+        """
+        (frame_sequence, camera_feed) = self.queues.frames.acquire_latest()
+        if frame_sequence == self.last_frame_sequence or camera_feed is None:
+            self.queues.frames.release()
+            return False
+        self.last_frame_sequence = frame_sequence
+        self.frame_sequence = frame_sequence
+        (capture_time, queue_time) = self.queues.frames.frame_times
+        dequeue_time = time.monotonic()
+        self.trace_points = (capture_time, queue_time, dequeue_time)
+        self.frame_time = capture_time if capture_time > 0 else dequeue_time
+
+        camera_y, camera_x = camera_feed.shape[:2]
+        if camera_x <= 0 or camera_y <= 0:
+            self.queues.frames.release()
+            return False
+        self.frame_size = (camera_x, camera_y)
+
+        # Only run the model on the region of interest
+        (roi_x, roi_y, roi_xmax, roi_ymax, self.imgsz) = get_roi_crop(
+            self.roi, camera_x, camera_y
+        )
+        self.crop = (roi_x, roi_y, roi_xmax, roi_ymax)
+        self.feed = camera_feed[roi_y:roi_ymax, roi_x:roi_xmax]
+
+        # Between model runs, only predict where the tracks have moved
+        self.frames_since_detection += 1
+        if self.frames_since_detection < self.detection_interval:
+            self.release()
+            self.track()
+            return False
+
+        if not self.motion_gate.check(self.feed, dequeue_time):
+            self.release()
+
+            # Nothing has moved, so republish the last results
+            # (keeping the tracks that were seen alive)
+            timestamp = time.time()
+            self.tracks.refresh(self.last_timestamp, timestamp)
+            self.last_timestamp = timestamp
+            self.publish(timestamp, 0)
+            return False
+
+        self.frames_since_detection = 0
+        return True
+
+    def release(self):
+        """
+        Releases the held frame (allowing the slot to be overwritten).
+        """
+        self.feed = None
+        self.queues.frames.release()
 
-                # Apply black and white filter to frame
+    def publish(self, timestamp, model_time):
+        """
+        Sends the averaged box of every track (including tracks that
+        were not found, which persist for a few seconds) to the camera.
+        """
+        self.queues.detections.publish(
+            self.tracks.get_records(timestamp, OBJECT_PERSISTENCE),
+            self.frame_sequence,
+            self.trace_points + (model_time, time.monotonic()),
+        )
 
-                # (_, camera_feed) = cv.threshold(camera_feed, 15, 255, cv.THRESH_BINARY)
+    def track(self):
+        """
+        Publishes the tracks predicted at the held frame (without the model).
+        """
+        cpu_start = time.process_time()
+        results = self.tracker.predict(self.frame_time)
+        self.cpu_times["tracking"] += time.process_time() - cpu_start
+        self.convert_results(results, 0)
 
-                # Send new model results to queue
-                # queues.object_detection_queue.put(
-                model_results = model.track(camera_feed, verbose=False, persist=True)[0]
-                # )
+    def detect(self, results, model_time):
+        """
+        Matches the model results of the held frame with the tracks,
+        and publishes them.
 
-                camera_y, camera_x = camera_feed.shape[:2]
-                objects = []
+        Arguments:
+            results -- (n, 6) array of detections in the region of interest
+                       (xmin, ymin, xmax, ymax, confidence, class)
+            model_time -- the monotonic time the model finished
+        """
+        cpu_start = time.process_time()
+        # filter out weak detections by ensuring the
+        # confidence is greater than the minimum confidence
+        results = results[results[:, 4] >= MODEL_CONFIDENCE_THRESHOLD]
+
+        # Adjust for region (the tracker works in frame co-ordinates)
+        detections = results.astype(np.float64)
+        detections[:, :4] += self.crop[:2] * 2
+        results = self.tracker.update(detections, self.frame_time)
+        self.cpu_times["tracking"] += time.process_time() - cpu_start
+        self.convert_results(results, model_time)
+
+    def convert_results(self, results, model_time):
+        """
+        Converts the tracked boxes of the held frame into averaged tracks,
+        and publishes them.
 
-                if camera_x <= 0 and camera_y <= 0:
-                    continue
+        Arguments:
+            results -- array of tracked boxes in frame co-ordinates
+                       (xmin, ymin, xmax, ymax, track_id, confidence, class)
+            model_time -- the monotonic time the model finished
+                          (0 if the model was not run on the frame)
+        """
+        cpu_start = time.process_time()
+        try:
+            timestamp = time.time()
+            self.last_timestamp = timestamp
 
+            # Only tracked detections have a track_id column
+            if results.ndim == 2 and results.shape[1] >= 7:
                 # Get scale of camera to screen
-                (scale_x, scale_y) = (screen_x / camera_x, screen_y / camera_y)
-
-                if model_results is not None:
-                    try:
-                        results = model_results.boxes.data.tolist()
-
-                        for data in results:
-                            if len(data) < 7:
-                                continue
-                            confidence = data[5]
-                            # filter out weak detections by ensuring the
-                            # confidence is greater than the minimum confidence
-                            if float(confidence) < MODEL_CONFIDENCE_THRESHOLD:
-                                continue
-
-                            # if the confidence is greater than the minimum confidence,
-                            # assign track_id
-                            track_id = int(data[4])
-
-                            # draw the bounding box on the frame
-                            xmin = int(data[0])
-                            ymin = int(data[1])
-                            xmax = int(data[2])
-                            ymax = int(data[3])
-                            tag = model_results.names[int(data[6])]
-
-                            # Adjust for scale
-                            xmin *= scale_x
-                            xmax *= scale_x
-                            ymin *= scale_y
-                            ymax *= scale_y
-
-                            width = xmax - xmin
-                            height = ymax - ymin
-
-                            # create key with track_id in track_histories,
-                            # to store bottom left(BL) coords associated with the track_id
-                            track_hist = track_histories[track_id]
-                            track_hist.append(
-                                (float(xmin), float(ymin), float(width), float(height))
-                            )
-
-                            # stores the latest 30 coords, removes earliest entry
-                            if len(track_hist) > 5:
-                                track_hist.pop(0)
-
-                            # Create Camera Object
-                            old_object_found = False
-                            if track_id in list(registered_results.keys()):
-                                # Keep old object with new object
-                                old_object_found = True
-                                obj = registered_results[track_id]
-                                latest_average = track_averages[track_id][-1]
-                                obj.x = latest_average[0]
-                                obj.y = latest_average[1]
-                                obj.w = latest_average[
-                                    2
-                                ]  # not sure what to assign, average it as well?
-                                obj.h = latest_average[
-                                    3
-                                ]  # not sure what to assign, average it as well?
-                                obj.date_last_included = datetime.datetime.now()
-                                objects.append(obj)
-                                continue
-
-                            if not old_object_found:
-                                # Create new object with track_id
-                                new_object = CamObject(
-                                    tag,
-                                    (
-                                        xmin,
-                                        ymin,
-                                        xmax - xmin,
-                                        ymax - ymin,
-                                    ),
-                                    track_id,
-                                )
-
-                                registered_results[track_id] = new_object
-
-                                objects.append(new_object)
-
-                            # loop over all store bottom left(BL) coords for track_id
-                            for track_id, track in track_histories.items():
-                                total_x = sum(coord[0] for coord in track)
-                                total_y = sum(coord[1] for coord in track)
-                                total_width = sum(coord[2] for coord in track)
-                                total_height = sum(coord[3] for coord in track)
-
-                                avg_x = total_x / len(track_histories[track_id])
-                                avg_y = total_y / len(track_histories[track_id])
-                                avg_width = total_width / len(track_histories[track_id])
-                                avg_height = total_height / len(
-                                    track_histories[track_id]
-                                )
-
-                                # create key with track_id in track_average, to store
-                                # the average bottom left(BL) coord associated with the track_id
-                                track_avg = track_averages[track_id]
-                                track_avg.append(
-                                    (
-                                        float(avg_x),
-                                        float(avg_y),
-                                        float(avg_width),
-                                        float(avg_height),
-                                    )
-                                )
-
-                                # stores the latest 10 average coord
-                                # removes earliest entry
-                                if len(track_avg) > 10:
-                                    track_avg.pop(0)
-
-                                # to be implemented:
-                                # comparison of current track_avg to newest entry
-                                # if  difference is +-10% then swap to new average
-                                # to combat jitteryness
-
-                        # Make objects persist for some time
-                        for track_id in registered_results.keys():
-                            object = registered_results[track_id]
-                            if (
-                                object not in objects
-                                and (
-                                    datetime.datetime.now() - object.date_last_included
-                                ).total_seconds()
-                                < OBJECT_PERSISTENCE
-                            ):
-                                # Object was not re-added so persist (re-add) until a few seconds pass
-                                objects.append(object)
-
-                        queues.object_detection_queue.put(objects)
-                    except Exception as e:
-                        print("Error with YOLO Conversion: " + str(e))
-
-            time.sleep(0.05)  # Ensure model attempts to run less than 20x a second
+                (camera_x, camera_y) = self.frame_size
+                scale = np.array(
+                    (self.screen_x / camera_x, self.screen_y / camera_y) * 2,
+                    dtype=np.float64,
+                )
+
+                # Adjust for scale, and convert to (x, y, w, h)
+                boxes = results[:, :4] * scale
+                boxes[:, 2:] -= boxes[:, :2]
+
+                self.tracks.update(
+                    results[:, 4].astype(np.int64),
+                    results[:, 6].astype(np.int16),
+                    boxes,
+                    results[:, 5],
+                    timestamp,
+                )
+
+            # Forget tracks that have not been seen for a while
+            self.tracks.evict(timestamp, OBJECT_PERSISTENCE + TRACK_EVICTION_GRACE)
+
+            self.publish(timestamp, model_time)
+        except Exception as e:
+            print("Error with YOLO Conversion: " + str(e))
+        self.cpu_times["conversion"] += time.process_time() - cpu_start
+
+
+def get_default_model_path():
+    """
+    Gets the path of the trained model, or None if it does not exist
+    (and YOLOv8n is used instead).
+    """
+    if os.path.isfile(ASSET_TRAINED_MODEL):
+        return ASSET_TRAINED_MODEL
+    return None
+
+
+def load_detector(path, backend, workers, warmup_inferences=WARMUP_INFERENCES):
+    """
+    Loads the YOLOv8 trained model (or YOLOv8n if path is None),
+    and warms it up, reporting each stage to the cameras of the workers.
+    """
+    print("YOLOv8 Model Initialising...")
+
+    def report(stage):
+        for worker in workers:
+            worker.send(MP_MSG_YOLO_PROGRESS, stage)
+
+    # Load the model from a file
+    model = None
+    if path is not None:
+        model = Detector(path, backend, report)
+    else:
+        model = Detector("yolov8n.pt", backend, report)
+    model.warmup(warmup_inferences, MODEL_IMGSZ, get_roi_sizes())
+
+    print("YOLOv8 Model Initialised.")
+    return model
+
+
+def load_yolo_model(
+    queues,
+    path,
+    backend=BACKEND_AUTO,
+    motion_threshold=MOTION_THRESHOLD,
+    max_staleness=MOTION_MAX_STALENESS,
+    cores=None,
+    warmup_inferences=WARMUP_INFERENCES,
+    detection_interval=DETECTION_INTERVAL,
+):
+    """
+    Loads the YOLOv8 trained model into runtime, and runs it on every
+    few new frames of a camera (tracking objects over every frame).
+    (to be run in the YOLO sub-process of a camera)
+
+    If path is None, then YOLOv8n is loaded.
+
+    Arguments:
+        queues -- the channels shared with the camera (see CameraQueueManager)
+        path -- the path that contains the trained model.
+        backend -- the inference backend to run the model on (see detector.py)
+        motion_threshold -- the perc of changed pixels needed to run the model
+                            (see motion.py, 0 runs the model on every frame)
+        max_staleness -- the max seconds between model runs without motion
+        cores -- the cores the sub-process is pinned to (or None)
+        warmup_inferences -- the blank frames the model is run on once loaded
+        detection_interval -- the frames per model run
+    """
+    pin_process(cores)
+    worker = DetectionWorker(
+        queues, motion_threshold, max_staleness, detection_interval
+    )
+    try:
+        model = load_detector(path, backend, [worker], warmup_inferences)
+
+        # Tell main process that yolo was successfully initialised
+        worker.send(MP_MSG_CLASS_NAMES, model.get_names())
+        worker.send(MP_MSG_YOLO_MODEL_LOADED)
+
+        # Repeatedly get object detection results in this thread
+        while True:
+            # Process messages from main thread
+            if not worker.process_messages():
+                return
+
+            # Block until a frame the model has not seen arrives
+            if not worker.wait_for_frame(FRAME_WAIT_TIMEOUT):
+                continue
+
+            if not worker.acquire():
+                continue
+
+            cpu_start = time.process_time()
+            try:
+                (model_results,) = model.predict(
+                    [worker.feed], verbose=False, imgsz=worker.imgsz
+                )
+            finally:
+                worker.release()
+            worker.add_model_time(time.process_time() - cpu_start)
+
+            worker.detect(model_results.boxes.data.cpu().numpy(), time.monotonic())
     except Exception as e:
         print("Error with YOLOv8 Model: " + str(e))
-        queues.message_yolo_queue.put(Message(MP_MSG_YOLO_ERROR, None))
+        worker.send(MP_MSG_YOLO_ERROR, None)
+
+
+def load_shared_yolo_model(
+    queues_list,
+    path,
+    backend=BACKEND_AUTO,
+    motion_threshold=MOTION_THRESHOLD,
+    max_staleness=MOTION_MAX_STALENESS,
+    batch_window=BATCH_WINDOW,
+    warmup_inferences=WARMUP_INFERENCES,
+    detection_interval=DETECTION_INTERVAL,
+):
+    """
+    Loads the YOLOv8 trained model into runtime once for several cameras,
+    and runs it on batches of their newest frames.
+    (to be run in a YOLO sub-process shared by the cameras)
+
+    A batch is run once every camera has a new frame, or once the batch
+    window has passed since the first frame of the batch arrived.
+    Objects are tracked per camera (see tracker.py).
+
+    Arguments:
+        queues_list -- the channels shared with each camera
+        path -- the path that contains the trained model (or None for YOLOv8n).
+        backend -- the inference backend to run the model on (see detector.py)
+        motion_threshold -- the perc of changed pixels needed to run the model
+        max_staleness -- the max seconds between model runs without motion
+        batch_window -- the max seconds to wait for frames of other cameras
+        warmup_inferences -- the blank frames the model is run on once loaded
+        detection_interval -- the frames per model run (of each camera)
+    """
+    workers = [
+        DetectionWorker(queues, motion_threshold, max_staleness, detection_interval)
+        for queues in queues_list
+    ]
+    try:
+        model = load_detector(path, backend, workers, warmup_inferences)
 
+        # Tell main process that yolo was successfully initialised
+        for worker in workers:
+            worker.send(MP_MSG_CLASS_NAMES, model.get_names())
+            worker.send(MP_MSG_YOLO_MODEL_LOADED)
+
+        while len(workers) > 0:
+            # Process messages from main thread (workers of closed cameras stop)
+            workers = [worker for worker in workers if worker.process_messages()]
+
+            # Collect the newest frame of each camera into a batch
+            batch = []
+            wait_start = time.monotonic()
+            batch_start = None
+            while True:
+                for worker in workers:
+                    if worker in batch or not worker.has_new_frame():
+                        continue
+                    if worker.acquire():
+                        batch.append(worker)
+                        if batch_start is None:
+                            batch_start = time.monotonic()
+
+                now = time.monotonic()
+                if len(batch) == len(workers):
+                    break  # Every camera has a frame
+                if batch_start is not None and now - batch_start >= batch_window:
+                    break  # Run without the cameras that have not caught up
+                if batch_start is None and now - wait_start >= FRAME_WAIT_TIMEOUT:
+                    break  # No frames, check messages again
+                time.sleep(BATCH_POLL_INTERVAL)
+
+            if len(batch) == 0:
+                continue
 
-process_created = False
+            cpu_start = time.process_time()
+            try:
+                results = model.predict(
+                    [worker.feed for worker in batch],
+                    verbose=False,
+                    imgsz=max([worker.imgsz for worker in batch]),
+                )
+            finally:
+                for worker in batch:
+                    worker.release()
+            model_time = time.monotonic()
+
+            # Split the CPU time of the batch between its cameras
+            cpu_time = (time.process_time() - cpu_start) / len(batch)
+            for worker in batch:
+                worker.add_model_time(cpu_time)
+
+            # Route results back to each camera
+            for worker, model_results in zip(batch, results):
+                worker.detect(model_results.boxes.data.cpu().numpy(), model_time)
+    except Exception as e:
+        print("Error with YOLOv8 Model: " + str(e))
+        for worker in workers:
+            worker.send(MP_MSG_YOLO_ERROR, None)
 
 
 class Camera:
@@ -282,30 +650,95 @@ class Camera:
     OpenCV is required, and Torch is required for object recognition.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        camera_no=0,
+        calibration_file=CALIBRATION_FILE,
+        cores=None,
+        backend=BACKEND_AUTO,
+        motion_threshold=MOTION_THRESHOLD,
+        max_staleness=MOTION_MAX_STALENESS,
+        start_worker=True,
+        source=None,
+        record=None,
+        realtime=True,
+        warmup_inferences=WARMUP_INFERENCES,
+        detection_interval=DETECTION_INTERVAL,
+        track_id_offset=0,
+    ):
         """
         Creates a new camera device reference,
         which opens the camera for opencv and pygame use,
         and loads the given YOLOv5 model.
+
+        Arguments:
+            camera_no -- the index of the video device to open
+            calibration_file -- the file calibration settings are stored in
+            cores -- the cores the YOLO sub-process is pinned to (or None)
+            backend -- the inference backend to run the model on (see detector.py)
+            motion_threshold -- the perc of changed pixels needed to run the model
+                                (see motion.py, 0 runs the model on every frame)
+            max_staleness -- the max seconds between model runs without motion
+            start_worker -- False if the YOLO sub-process is started elsewhere
+                            (e.g. shared between cameras, see CameraGroup)
+            source -- a video file, image directory or recording (.rec) to read
+                      frames from instead of the video device (see sources.py)
+            record -- a file (.rec) the camera feed is recorded to (or None),
+                      each camera swapped to is recorded to its own file
+            realtime -- False to play back sources as fast as possible
+            warmup_inferences -- the blank frames the model is run on once loaded
+            detection_interval -- the frames per model run (the tracker predicts
+                                  the frames between, see tracker.py)
+            track_id_offset -- added to the track id of every object, so the
+                               ids of several cameras do not collide
+                               (see CameraGroup)
         """
-        global queues
-        global process_created
         try:
-            queues = CameraQueueManager()
+            self.queues = CameraQueueManager()
             self.active = True
+            self.capture_failed = False  # Set by the capture thread (see update)
+            self.feed_failed = False  # Last frame could not be fed to the model
+            self.feed_lock = threading.Lock()  # Held while feeding or closing queues
             self.loading = True
             self.valid = False
             self.model = None
             self.model_loading = True
+            self.model_progress = None  # Stage the model is loading at
             self.refresh_ready = True
             self.model_results = None
             self.object_results = []
-            self.camera_no = 0
+            self.objects = []  # Calibrated objects of the latest results
+            self.registered_objects = {}  # Objects by track id
+            self.class_names = {}  # Object tags by class id
+            self.detection_sequence = 0
+            self.worker_stats = None  # Latest stats of the YOLO sub-process
+            self.camera_no = camera_no
+            self.calibration_file = calibration_file
+            self.cores = cores
+            self.source = source
+            self.record = record
+            self.recordings = 0  # Sources recorded (each to its own file)
+            self.realtime = realtime
+            self.backend = backend
+            self.motion_threshold = motion_threshold
+            self.max_staleness = max_staleness
+            self.warmup_inferences = warmup_inferences
+            self.detection_interval = detection_interval
+            self.track_id_offset = track_id_offset
+            self.video = None
             self.last_w = 0
             self.last_h = 0
 
             self.filter_enabled = True
             self.dark_threshold = 20
+            # Preallocated (single-channel) frames the filter writes to,
+            # cycled like the capture buffers (see capture.py)
+            self.filter_buffers = [None] * CAPTURE_BUFFERS
+            self.filter_index = 0
+
+            # Scaled camera preview (see get_preview), only redrawn on new frames
+            self.preview = None
+            self.preview_key = None
             # X and Y offsets for center object (as perc of screen)
             self.offset_x = 0
             self.offset_y = 0
@@ -319,26 +752,40 @@ class Camera:
             self.skew_bottom = 0
             self.skew_left = 0
             self.skew_right = 0
+            # Perspective transform fit from calibration points (or None),
+            # applied before the offset, resize and skew settings above
+            self.point_homography = None
+
+            # Key of the calibration settings (and the inverse of the point
+            # transform), recomputed only when the screen size or any
+            # calibration setting changes
+            self.calibration_key = None
+            self.inverse_point_homography = None
+            self.calibrated_key = None  # Results and transform objects were calibrated with
+            self.last_roi = None  # Region of interest last sent to the model
+            self.object_boxes = np.zeros((0, 4))  # Boxes of object_results (x, y, w, h)
 
             # Load last calibration settings
             self.load_calibration()
 
-            self.has_model = os.path.isfile(ASSET_TRAINED_MODEL)
+            self.has_model = get_default_model_path() is not None
             self.last_time_updated = datetime.datetime.now()
             self.current_update = 0  # Alternates between 0 and 1
             self.w = 1920
             self.h = 1080
 
-            # Create thread for opening camera (debug and calibration use only)
+            # Create capture thread, which continuously grabs frames from the
+            # camera and transfers them to the yolo model
+            self.capture = CaptureService(
+                self.filter_frame, self.feed_camera_to_yolo, self.capture_error
+            )
+
+            # Create thread for opening camera
             threading.Thread(target=self.open_camera, args=[]).start()
 
             # Create sub-process for processing camera via YOLO.
-            if not process_created:
-                process_created = True
-                Process(target=self.load_default_model, args=(queues,)).start()
-
-            # Create thread for transferring camera feed to yolo model
-            threading.Thread(target=self.feed_camera_to_yolo, args=[]).start()
+            if start_worker:
+                self.load_default_model()
 
             # Create thread for object conversion from yolo results
             # threading.Thread(target=self.object_conversion, args=[]).start()
@@ -350,10 +797,10 @@ class Camera:
 
     def load_calibration(self):
         """
-        Loads calibration settings from calibration.map
+        Loads calibration settings from the calibration file (e.g. calibration.map)
         """
         try:
-            map = open("calibration.map", "r")
+            map = open(self.calibration_file, "r")
             settings = map.read().split(";")
             self.offset_x = float(settings[0])
             self.offset_y = float(settings[1])
@@ -364,16 +811,21 @@ class Camera:
             self.skew_top = float(settings[6])
             self.skew_bottom = float(settings[7])
             self.dark_threshold = int(settings[8])
+            if len(settings) >= 18:
+                # Optional perspective transform fit from calibration points
+                self.point_homography = np.array(
+                    [float(value) for value in settings[9:18]]
+                ).reshape(3, 3)
             map.close()
         except:
             print("Failed to load calibration settings (may not exist or corrupted)")
 
     def save_calibration(self):
         """
-        Saves calibration settings to calibration.map
+        Saves calibration settings to the calibration file (e.g. calibration.map)
         """
         try:
-            map = open("calibration.map", "w")
+            map = open(self.calibration_file, "w")
             map.write(
                 str(self.offset_x)
                 + ";"
@@ -393,32 +845,59 @@ class Camera:
                 + ";"
                 + str(self.dark_threshold)
             )
+            if self.point_homography is not None:
+                for value in self.point_homography.ravel().tolist():
+                    map.write(";" + str(value))
             map.close()
         except:
             print("Failed to save calibration settings")
 
-    def feed_camera_to_yolo(self):
+    def feed_camera_to_yolo(self, sequence, timestamp, frame):
         """
-        Feeds the camera data to the YOLO sub-process.
+        Feeds a captured frame to the YOLO sub-process.
+        (called from the capture thread for every new frame)
         """
-        global queues
-        if queues.camera_feed_queue.qsize() == 0:
-            queues.camera_feed_queue.put(self.capture_video())
-
-    def load_default_model(self, cross_process_queues):
+        if frame is None:
+            return
+
+        with self.feed_lock:
+            if not self.valid or not self.active:
+                return  # Destroyed (queues may be closed)
+            try:
+                self.queues.frames.write(frame, timestamp)
+                self.feed_failed = False
+            except ValueError as e:
+                if not self.feed_failed:  # Only report once until a frame fits
+                    print("Error feeding camera to YOLO: " + str(e))
+                self.feed_failed = True
+
+    def capture_error(self):
+        """
+        Flags that the device failed to read a frame (e.g. the camera was
+        unplugged or the video ended), so the camera is destroyed on the
+        next update rather than from the capture thread.
+        (called from the capture thread)
         """
-        Loads the default trained model if it exists.
+        self.capture_failed = True
 
-        Arguments:
-            path -- the path that contains the trained model.
-        """
-        global queues
-        queues = cross_process_queues
-        model_path = ASSET_TRAINED_MODEL
-        if not self.has_model:
-            model_path = None
-        load_yolo_model(model_path)
-        return
+    def load_default_model(self):
+        """
+        Loads the default trained model if it exists (else YOLOv8n),
+        in a new YOLO sub-process.
+        """
+        Process(
+            target=load_yolo_model,
+            args=(
+                self.queues,
+                get_default_model_path(),
+                self.backend,
+                self.motion_threshold,
+                self.max_staleness,
+                self.cores,
+                self.warmup_inferences,
+                self.detection_interval,
+            ),
+        ).start()
 
     def open_camera(self):
         """
@@ -426,9 +905,11 @@ class Camera:
         """
         try:
             print("Camera initializing...")
-            self.video = cv.VideoCapture(self.camera_no, cv.CAP_DSHOW)
+            self.video = self.open_source(self.source)
             # Ensure video camera is opened.
             self.valid = self.video is None or self.video.isOpened()
+            if self.valid:
+                self.capture.set_source(self.video)
             print("Camera initialized.")
             self.loading = False
         except:
@@ -436,6 +917,21 @@ class Camera:
             self.valid = False
             self.loading = False
 
+    def open_source(self, path):
+        """
+        Opens the source frames are read from, recording it if enabled.
+
+        Arguments:
+            path -- a video file, image directory or recording (.rec),
+                    or None to open the video device (camera_no).
+        """
+        video = open_source(path, self.camera_no, self.realtime)
+        if self.record is not None and video.isOpened():
+            path = get_swap_recording_file(self.record, self.recordings)
+            self.recordings += 1
+            video = RecordedSource(video, RecordingWriter(path))
+        return video
+
     def init_next_camera(self):
         """
         Creates a new thread to swap the next camera
@@ -443,6 +939,7 @@ class Camera:
         self.valid = False
         self.loading = True
         self.object_results = None
+        self.capture.set_source(None)  # Wait for capture thread to stop reading
         if self.video is not None:
             self.video.release()
         self.video = None
@@ -458,10 +955,12 @@ class Camera:
             while self.valid:
                 pass  # Wait until main thread catches up
             self.camera_no += 1
-            self.video = cv.VideoCapture(self.camera_no)
+            self.video = self.open_source(None)
 
             # Ensure video camera is opened.
             self.valid = self.video is None or self.video.isOpened()
+            if self.valid:
+                self.capture.set_source(self.video)
             self.loading = False
             if not self.valid:
                 # Open initial camera
@@ -474,27 +973,51 @@ class Camera:
             # Open initial camera
             self.open_camera()
 
+    def filter_frame(self, frame):
+        """
+        Applies the black and white filter to a raw camera frame (if enabled).
+        (called from the capture thread for every new frame)
+        """
+        if self.filter_enabled:
+            buffer = self.filter_buffers[self.filter_index]
+            if buffer is None or buffer.shape != frame.shape[:2]:
+                buffer = np.empty(frame.shape[:2], dtype=np.uint8)
+                self.filter_buffers[self.filter_index] = buffer
+            self.filter_index = (self.filter_index + 1) % CAPTURE_BUFFERS
+
+            # Perform black and white filter (in place, kept single-channel,
+            # the frame is only converted to BGR for the model)
+            cv.cvtColor(frame, cv.COLOR_BGR2GRAY, dst=buffer)
+            cv.threshold(
+                buffer, self.dark_threshold, 255, cv.THRESH_BINARY, dst=buffer
+            )
+            frame = buffer
+        return frame
+
     def capture_video(self):
         """
-        Captures the standard webcam footage.
+        Gets the latest (filtered) webcam footage from the capture thread,
+        without waiting for the camera.
         """
         if self.valid:
-            ret, frame = self.video.read()  # Get frame
-
-            if not ret:
-                self.destroy()  # Video cam error (or ended)
-
-            if self.filter_enabled:
-                # Perform black and white filter
-                frame = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
-                (_, frame) = cv.threshold(
-                    frame, self.dark_threshold, 255, cv.THRESH_BINARY
-                )
-                # Convert to format for YOLOv8
-                frame = cv.cvtColor(frame, cv.COLOR_GRAY2BGR)
+            (sequence, timestamp, frame) = self.capture.get_latest_frame()
             return frame
         return None
 
+    def wrap_frame(self, frame) -> pygame.Surface:
+        """
+        Wraps a frame as a pygame image without copying it
+        (the image shares the memory of the frame).
+        """
+        # Convert to pygame image (current shape is (height,width))
+        #                         (required shape is (width,height))
+        if frame.ndim == 2:
+            # Filtered frame (single-channel)
+            image = pygame.image.frombuffer(frame, frame.shape[1::-1], "P")
+            image.set_palette(GRAY_PALETTE)
+            return image
+        return pygame.image.frombuffer(frame, frame.shape[1::-1], "BGR")
+
     def capture_video_pygame(self) -> pygame.image:
         """
         Captures the standard webcam footage, as a pygame
@@ -504,43 +1027,72 @@ class Camera:
             frame = self.capture_video()
 
             if frame is not None:
-                # Convert to pygame image (current shape is (height,width))
-                #                         (required shape is (width,height))
-                return pygame.image.frombuffer(
-                    frame.tobytes(), frame.shape[1::-1], "BGR"
-                )
+                return self.wrap_frame(frame)
         return None
 
+    def get_preview(self, size, alpha=None) -> pygame.Surface:
+        """
+        Gets the latest webcam footage scaled to the given size.
+
+        The same surface is reused, and only redrawn when a new frame
+        has been captured (or the size or alpha changes).
+
+        Arguments:
+            size -- the size (w, h) of the preview.
+            alpha -- the alpha (0-255) of the preview, or None for opaque.
+        """
+        if not self.valid:
+            return None
+
+        (sequence, timestamp, frame) = self.capture.get_latest_frame()
+        if frame is None:
+            return None
+
+        size = (int(size[0]), int(size[1]))
+        key = (sequence, size, frame.ndim, alpha)
+        if key == self.preview_key:
+            return self.preview
+        self.preview_key = key
+
+        image = self.wrap_frame(frame)
+        if (
+            self.preview is None
+            or self.preview.get_size() != size
+            or self.preview.get_bitsize() != image.get_bitsize()
+        ):
+            # Scaling requires the same pixel format
+            self.preview = pygame.Surface(size, 0, image)
+        if frame.ndim == 2:
+            self.preview.set_palette(GRAY_PALETTE)
+
+        pygame.transform.scale(image, size, self.preview)
+        self.preview.set_alpha(alpha)
+        return self.preview
+
     def display_to_screen(self, controller, screen: pygame.Surface):
         """
         Displays the camera to the screen (full-screen), with the given
         calibration settings.
         """
 
-        frame = self.capture_video_pygame()
         (screen_w, screen_h) = controller.get_screen_size()
-        if frame is not None:
-            # Find camera dimensions and offset
-            camera_w = screen_w * self.scale_x
-            camera_h = screen_h * self.scale_y
 
-            camera_x = screen_w / 2 - (camera_w * (1 - self.offset_x) / 2)
-            camera_y = screen_h / 2 - (camera_h * (1 - self.offset_y) / 2)
+        # Find camera dimensions and offset
+        camera_w = screen_w * self.scale_x
+        camera_h = screen_h * self.scale_y
 
-            screen.blit(
-                pygame.transform.scale(frame, (camera_w, camera_h)),
-                (camera_x, camera_y),
-            )
+        camera_x = screen_w / 2 - (camera_w * (1 - self.offset_x) / 2)
+        camera_y = screen_h / 2 - (camera_h * (1 - self.offset_y) / 2)
+
+        frame = self.get_preview((camera_w, camera_h))
+        if frame is not None:
+            screen.blit(frame, (camera_x, camera_y))
 
-    def old_object_conversion(self):
+    def object_conversion(self):
         """
-        Continuously converts model results into usable camera objects.
-        (to be run in another thread - see __init__)
+        nigel test object_conversion
         """
 
-        registered_results = {}
-        all_track_ids = []
-
         while self.active:
             time.sleep(0.1)  # Only update 50ms or so to prevent computer lag
 
@@ -555,13 +1107,13 @@ class Camera:
 
             # Get width and height of cvframe
             if self.video is None:
-                return
+                continue
 
             camera_x = self.video.get(cv.CAP_PROP_FRAME_WIDTH)
             camera_y = self.video.get(cv.CAP_PROP_FRAME_HEIGHT)
 
             if camera_x <= 0 and camera_y <= 0:
-                return
+                continue
 
             # Get scale of camera to screen
             (screen_x, screen_y) = (self.w, self.h)
@@ -571,234 +1123,279 @@ class Camera:
             if cvframe is None:
                 # Set objects to empty list
                 self.object_results = []
-                return
-
-            # Extract model results from queue
-            if queues.object_detection_queue.qsize() > 0:
-                self.model_results = queues.object_detection_queue.get()
-                self.model_loading = False
+                continue
 
             # Convert Object Detection results from model
             if self.model_results is not None:
                 # loop over the detections
-                try:
-                    track_ids = self.model_results.boxes.id.int().cpu().tolist()
-                    for data, track_id in zip(
-                        self.model_results.boxes.data.tolist(), track_ids
-                    ):
-                        # extract the confidence (i.e., probability) associated with the detection
-                        confidence = data[4]
-
-                        # filter out weak detections by ensuring the
-                        # confidence is greater than the minimum confidence
-                        if float(confidence) < MODEL_CONFIDENCE_THRESHOLD:
-                            continue
-
-                        # if the confidence is greater than the minimum confidence,
-                        # draw the bounding box on the frame
-                        screen_xmin = int(data[0])
-                        screen_xmax = int(data[2])
-                        screen_ymin = int(data[1])
-                        screen_ymax = int(data[3])
-                        tag = self.model_results.names[int(data[5])]
-
-                        # Adjust for scale
-                        screen_xmin *= scale_x
-                        screen_xmax *= scale_x
-                        screen_ymin *= scale_y
-                        screen_ymax *= scale_y
-
-                        # Create Camera Object
-                        old_object_found = False
-                        if track_id in all_track_ids:
-                            # Keep old object with new object
-                            obj = registered_results[track_id]
-                            obj.x = screen_xmin
-                            old_object_found = True
-                            obj.y = screen_ymin
-                            obj.w = screen_xmax - screen_xmin
-                            obj.h = screen_ymax - screen_ymin
-                            obj.date_last_included = datetime.datetime.now()
-                            objects.append(obj)
-                            break
-
-                        if not old_object_found:
-                            # Create new object with track_id
-                            new_object = CamObject(
-                                tag,
-                                (
-                                    screen_xmin,
-                                    screen_ymin,
-                                    screen_xmax - screen_xmin,
-                                    screen_ymax - screen_ymin,
-                                ),
-                                track_id,
-                            )
-
-                            registered_results[track_id] = new_object
-                            all_track_ids.append(track_id)
-
-                            objects.append(new_object)
-                except:
-                    print("Error;303 camera.py")
-
+                pass  # moved to load yolo model
             self.object_results = objects
             self.refresh_ready = True
 
-    def object_conversion(self):
+    def convert_records(self, records):
         """
-        nigel test object_conversion
-        """
-        global queues
-
-        while self.active:
-            time.sleep(0.1)  # Only update 50ms or so to prevent computer lag
-
-            if not self.valid or self.model is None:
-                # Set objects to empty list
-                self.object_results = []
-                continue  # Continue to next iteration
+        Converts detection records from the YOLO sub-process into camera objects.
 
-            objects = []
-            old_results = self.object_results
-            cvframe = self.capture_video()
+        Objects are kept between results (by track id), so that attributes
+        set by controls remain on the object.
 
-            # Get width and height of cvframe
-            if self.video is None:
-                continue
+        Arguments:
+            records -- an array of detection records (see DETECTION_DTYPE)
+        """
+        objects = []
+        registered_objects = {}
+        for track_id, class_id, bbox, confidence, timestamp in zip(
+            records["track_id"].tolist(),
+            records["class_id"].tolist(),
+            records["bbox"].tolist(),
+            records["confidence"].tolist(),
+            records["timestamp"].tolist(),
+        ):
+            tag = self.class_names.get(class_id, str(class_id))
+            object = self.registered_objects.get(track_id)
+            if object is None or object.tag != tag:
+                object = CamObject(
+                    tag, bbox, self.track_id_offset + track_id, confidence
+                )
+            else:
+                (object.base_x, object.base_y, object.base_w, object.base_h) = bbox
+                object.confidence = confidence
+            object.date_last_included = datetime.datetime.fromtimestamp(timestamp)
+            registered_objects[track_id] = object
+            objects.append(object)
+
+        self.registered_objects = registered_objects
+        self.object_boxes = records["bbox"].astype(np.float64)
+        return objects
+
+    def get_calibration_key(self):
+        """
+        Gets the key of the current calibration settings, recomputing the
+        inverse of the point transform only if any setting has changed.
+        """
+        point_key = (
+            None
+            if self.point_homography is None
+            else tuple(self.point_homography.ravel().tolist())
+        )
+        key = (
+            self.w,
+            self.h,
+            self.offset_x,
+            self.offset_y,
+            self.scale_x,
+            self.scale_y,
+            self.skew_left,
+            self.skew_right,
+            self.skew_top,
+            self.skew_bottom,
+            point_key,
+        )
+        if key != self.calibration_key:
+            self.calibration_key = key
+            self.inverse_point_homography = (
+                None
+                if self.point_homography is None
+                else np.linalg.inv(self.point_homography)
+            )
+        return self.calibration_key
 
-            camera_x = self.video.get(cv.CAP_PROP_FRAME_WIDTH)
-            camera_y = self.video.get(cv.CAP_PROP_FRAME_HEIGHT)
+    def get_roi(self, controller):
+        """
+        Gets the region of interest of the model (as perc of frame), i.e.
+        the play area of the controller mapped back through the calibration.
 
-            if camera_x <= 0 and camera_y <= 0:
-                continue
+        Returns None if the model should run on the full frame.
+        """
+        play_area = controller.get_play_area()
+        if play_area is None or self.w <= 0 or self.h <= 0:
+            return None
+
+        self.get_calibration_key()
+        (x, y, w, h) = play_area
+        ((x, y), (x2, y2)) = uncalibrate_points(
+            [(x, y), (x + w, y + h)],
+            self.w,
+            self.h,
+            self.offset_x,
+            self.offset_y,
+            self.skew_left,
+            self.skew_right,
+            self.skew_top,
+            self.skew_bottom,
+        )
+        (x, y, w, h) = (x, y, x2 - x, y2 - y)
+        if self.inverse_point_homography is not None:
+            ((x, y, w, h),) = transform_boxes(
+                [(x, y, w, h)], self.inverse_point_homography
+            )
+        margin_x = self.w * ROI_MARGIN
+        margin_y = self.h * ROI_MARGIN
+        roi = (
+            max(0.0, (x - margin_x) / self.w),
+            max(0.0, (y - margin_y) / self.h),
+            min(1.0, (x + w + margin_x) / self.w),
+            min(1.0, (y + h + margin_y) / self.h),
+        )
+        return tuple([round(value, 3) for value in roi])
+
+    def fit_calibration_points(self, camera_points, screen_points):
+        """
+        Fits the perspective transform of the calibration to the given point
+        correspondences (e.g. calibration circles). The offset, resize and
+        skew settings are kept, and the transform is fit so the points land
+        on screen with those settings applied on top.
 
-            # Get scale of camera to screen
-            (screen_x, screen_y) = (self.w, self.h)
-            (scale_x, scale_y) = (screen_x / camera_x, screen_y / camera_y)
+        Arguments:
+            camera_points -- the uncalibrated positions of the points
+            screen_points -- the positions of the points on screen
 
-            # Check to make sure feed is valid
-            if cvframe is None:
-                # Set objects to empty list
-                self.object_results = []
-                continue
+        Returns:
+            True if the calibration was fit (else it is left unchanged).
+        """
+        screen_points = uncalibrate_points(
+            screen_points,
+            self.w,
+            self.h,
+            self.offset_x,
+            self.offset_y,
+            self.skew_left,
+            self.skew_right,
+            self.skew_top,
+            self.skew_bottom,
+        )
+        homography = fit_point_homography(camera_points, screen_points)
+        if homography is None:
+            return False
+
+        self.point_homography = homography
+        return True
+
+    def reset_calibration_points(self):
+        """
+        Clears the perspective transform fit from calibration points
+        (leaving only the offset, resize and skew settings).
+        """
+        self.point_homography = None
 
-            # Convert Object Detection results from model
-            if self.model_results is not None:
-                # loop over the detections
-                pass  # moved to load yolo model
-            self.object_results = objects
-            self.refresh_ready = True
+    def calibrate_objects(self, objects):
+        """
+        Applies the calibration settings to the bounds of the given objects
+        (in the same order as self.object_boxes) in a single batch.
+        """
+        boxes = self.object_boxes
+        if self.point_homography is not None:
+            boxes = transform_boxes(boxes, self.point_homography)
+        boxes = calibrate_boxes(
+            boxes,
+            self.w,
+            self.h,
+            self.offset_x,
+            self.offset_y,
+            self.scale_x,
+            self.scale_y,
+            self.skew_left,
+            self.skew_right,
+            self.skew_top,
+            self.skew_bottom,
+        )
+        for object, (x, y, w, h) in zip(objects, boxes.tolist()):
+            (object.x, object.y, object.w, object.h) = (x, y, w, h)
 
     def update(self, controller):
         """
-        Updates by detecting the objects from the frame, outputting
-        to the controller's object list.
+        Updates by detecting the objects from the frame.
+
+        Returns:
+            the (calibrated) objects of the latest results.
         """
-        global queues
         # Check to make sure camera and model is initialized.
         time_passed = (datetime.datetime.now() - self.last_time_updated).total_seconds()
         (self.w, self.h) = controller.get_screen_size()
 
+        if self.capture_failed:
+            self.capture_failed = False
+            self.destroy()  # Video cam error (or ended)
+        if not self.active:
+            return self.objects
+
+        connection = self.queues.message_camera_connection
         try:
             if self.w != self.last_w:
                 self.last_w = self.w
-                queues.message_camera_queue.put(
-                    Message(MP_MSG_SIZEX, self.w), block=False
-                )
+                connection.send(Message(MP_MSG_SIZEX, self.w))
 
             if self.h != self.last_h:
                 self.last_h = self.h
-                queues.message_camera_queue.put(
-                    Message(MP_MSG_SIZEY, self.h), block=False
-                )
+                connection.send(Message(MP_MSG_SIZEY, self.h))
+
+            roi = self.get_roi(controller)
+            if roi != self.last_roi:
+                self.last_roi = roi
+                connection.send(Message(MP_MSG_ROI, roi))
 
         except:
             pass  # Process is still catching up
         # Process YOLO message events
-        while queues.message_yolo_queue.qsize() > 0:
-            msg = queues.message_yolo_queue.get()
+        while connection.poll():
+            msg = connection.recv()
             if msg.type == MP_MSG_YOLO_ERROR:
                 self.model = None
                 self.model_loading = False
             elif msg.type == MP_MSG_YOLO_MODEL_LOADED:
                 self.model = msg.data
                 self.model_loading = False
-
-        # Extract model results from queue
-        if queues.object_detection_queue.qsize() > 0:
-            self.object_results = queues.object_detection_queue.get()
-
-        if (datetime.datetime.now() - self.last_time_updated).total_seconds() >= 0.05:
-            self.last_time_updated = datetime.datetime.now()
-            self.current_update = 1 - self.current_update
-            self.feed_camera_to_yolo()
+            elif msg.type == MP_MSG_CLASS_NAMES:
+                self.class_names = msg.data
+            elif msg.type == MP_MSG_YOLO_PROGRESS:
+                self.model_progress = msg.data
+            elif msg.type == MP_MSG_STATS:
+                self.worker_stats = msg.data
+
+        # Extract latest model results from mailbox (older results are skipped)
+        (sequence, records, trace) = self.queues.detections.take(
+            self.detection_sequence
+        )
+        if records is not None:
+            self.detection_sequence = sequence
+            (trace_id, trace_points) = trace
+            controller.tracer.begin(trace_id, trace_points)
+            self.object_results = self.convert_records(records)
 
         # Update camera objects to given results from conversion thread.
         if self.object_results is not None:
             objects = self.object_results.copy()
-            for object in objects:
-                xmin = object.base_x
-                xmax = xmin + object.base_w
-                ymin = object.base_y
-                ymax = ymin + object.base_h
-
-                # Apply calibration settings (center offset)
-                adj_x = self.w * self.offset_x
-                adj_y = self.h * self.offset_y
-                xmin += adj_x
-                ymin += adj_y
-                xmax += adj_x
-                ymax += adj_y
-
-                # Apply calibration settings (resize)
-                obj_w = xmax - xmin
-                obj_h = ymax - ymin
-
-                new_w = obj_w * self.scale_x
-                new_h = obj_h * self.scale_y
-
-                diff_w = new_w - obj_w
-                diff_h = new_h - obj_h
-                xmin -= diff_w / 2
-                ymin -= diff_h / 2
-                xmax += diff_w / 2
-                ymax += diff_h / 2
-
-                # Apply calibration settings (skew)
-                center_x = (xmin + xmax) / 2
-                center_y = (ymin + ymax) / 2
-                offset_x = 0
-                offset_y = 0
-                if center_x + 8 < self.w / 2:
-                    offset_x -= self.skew_left * (center_x - self.w / 2)
-                if center_x - 8 > self.w / 2:
-                    offset_x += self.skew_right * -(center_x - self.w / 2)
-                if center_y + 8 < self.h / 2:
-                    offset_y -= self.skew_top * (center_y - self.h / 2)
-                if center_y - 8 > self.h / 2:
-                    offset_y += self.skew_bottom * -(center_y - self.h / 2)
-                xmin += offset_x
-                xmax += offset_x
-                ymin += offset_y
-                ymax += offset_y
-
-                # Update bounds on object
-                object.x = xmin
-                object.y = ymin
-                object.w = xmax - xmin
-                object.h = ymax - ymin
-
-            controller.set_cam_objects(objects)
+
+            # Only recalibrate on new results or calibration settings
+            key = (self.detection_sequence, self.get_calibration_key())
+            if key != self.calibrated_key:
+                self.calibrated_key = key
+                self.calibrate_objects(objects)
+
+            self.objects = objects
+
+        return self.objects
+
+    def request_stats(self):
+        """
+        Asks the YOLO sub-process for its stats (see DetectionWorker.get_stats),
+        which are received into worker_stats on a later update.
+        """
+        self.queues.message_camera_connection.send(Message(MP_MSG_STATS, 0))
 
     def destroy(self):
         """
         Releases the video capture reference and YOLO model
         """
-        global queues
-        self.active = False
+        if not self.active:
+            return  # Already destroyed (e.g. after a capture error)
+        with self.feed_lock:
+            self.active = False  # Waits for a frame being fed, and stops feeding
+        self.capture.stop()  # Waits for the frame in progress
+        self.capture.set_source(None)  # Wait for capture thread to stop reading
         if self.valid:
             self.video.release()
         self.model = None
         self.valid = False
-        queues.message_camera_queue.put(Message(MP_MSG_QUIT, 0))
\ No newline at end of file
+        self.queues.message_camera_connection.send(Message(MP_MSG_QUIT, 0))
+        self.queues.close()
\ No newline at end of file
@@ -0,0 +1,305 @@
+"""
+    camera_group.py - hosts the CameraGroup class, which runs several
+    cameras at once and merges their objects.
+"""
+
+import os
+import numpy as np
+import pygame
+from multiprocessing import Process
+from .camera import (
+    Camera,
+    CALIBRATION_FILE,
+    BATCH_WINDOW,
+    get_default_model_path,
+    load_shared_yolo_model,
+)
+
+DUPLICATE_IOU = 0.5  # Overlap (IoU) at which objects of two cameras are the same object
+CAMERA_TRACK_IDS = 1 << 32  # Track ids of camera n start at n * CAMERA_TRACK_IDS
+
+
+def get_calibration_file(camera_no):
+    """
+    Gets the calibration file of a camera
+    (the first camera keeps calibration.map).
+    """
+    if camera_no == 0:
+        return CALIBRATION_FILE
+    return "calibration_" + str(camera_no) + ".map"
+
+
+def get_recording_file(path, index):
+    """
+    Gets the recording file of a camera
+    (e.g. recording.rec, recording_1.rec, ...).
+    """
+    if path is None or index == 0:
+        return path
+    (base, extension) = os.path.splitext(path)
+    return base + "_" + str(index) + extension
+
+
+def get_worker_cores(index, count):
+    """
+    Gets the cores the YOLO sub-process of a camera is pinned to,
+    splitting the available cores evenly between cameras.
+
+    Arguments:
+        index -- the index of the camera in the group
+        count -- the number of cameras in the group
+
+    Returns:
+        a list of cores, or None if there is only one camera.
+    """
+    if count <= 1:
+        return None
+
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+
+    if len(cores) < count:
+        return [cores[index % len(cores)]]
+    per_camera = len(cores) // count
+    return cores[index * per_camera : (index + 1) * per_camera]
+
+
+def suppress_duplicates(objects, sources, threshold=DUPLICATE_IOU):
+    """
+    Removes objects seen by more than one camera (where the cameras overlap),
+    keeping the most confident object.
+
+    Arguments:
+        objects -- the objects of every camera (in screen co-ordinates)
+        sources -- the index of the camera each object is from
+        threshold -- the IoU at which two objects of the same tag are the same
+
+    Returns:
+        the list of objects that were kept.
+    """
+    if len(objects) <= 1:
+        return list(objects)
+
+    boxes = np.array([(o.x, o.y, o.w, o.h) for o in objects], dtype=np.float64)
+    tags = np.array([o.tag for o in objects], dtype=object)
+    confidences = np.array([o.confidence for o in objects])
+    sources = np.asarray(sources)
+
+    # IoU of every pair of objects
+    top_left = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+    bottom_right = np.minimum(
+        boxes[:, None, :2] + boxes[:, None, 2:], boxes[None, :, :2] + boxes[None, :, 2:]
+    )
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    areas = boxes[:, 2] * boxes[:, 3]
+    union = areas[:, None] + areas[None, :] - intersection
+    iou = np.divide(intersection, union, out=np.zeros_like(union), where=union > 0)
+
+    # Only objects of the same tag from different cameras are duplicates
+    duplicate = (
+        (iou > threshold)
+        & (tags[:, None] == tags[None, :])
+        & (sources[:, None] != sources[None, :])
+    )
+
+    kept = []
+    removed = np.zeros(len(objects), dtype=bool)
+    for i in np.argsort(-confidences, kind="stable").tolist():
+        if removed[i]:
+            continue
+        kept.append(objects[i])
+        removed |= duplicate[i]
+    return kept
+
+
+class CameraGroup:
+    """
+    Runs one or more cameras at once, each with its own capture thread,
+    YOLO sub-process (pinned to its own cores) and calibration.
+    Alternatively, the cameras can share a single YOLO sub-process that
+    runs the model on batches of their frames (see load_shared_yolo_model).
+
+    The objects of every camera are merged into a single list, with
+    duplicates (objects seen by more than one camera) suppressed. Track ids
+    are kept apart per camera (see CAMERA_TRACK_IDS), so merged objects of
+    different cameras never share an id.
+
+    Calibration, the camera feed and swapping cameras act on the
+    active camera (see get_active()).
+    """
+
+    def __init__(
+        self,
+        camera_numbers=None,
+        shared_worker=False,
+        batch_window=BATCH_WINDOW,
+        sources=None,
+        record=None,
+        **camera_options
+    ):
+        """
+        Creates and opens every camera.
+
+        Arguments:
+            camera_numbers -- the indices of the video devices to open
+                              (the first device if None)
+            shared_worker -- True to run the model of every camera in a single
+                             YOLO sub-process (in batches)
+            batch_window -- the max seconds the shared sub-process waits for
+                            frames of other cameras before running a batch
+            sources -- the file each camera reads frames from (see sources.py),
+                       cameras without a file (or all if None) read from their
+                       video device
+            record -- a file (.rec) each camera's feed is recorded to
+                      (numbered after the first camera), or None
+            camera_options -- keyword arguments every camera is created with
+        """
+        if camera_numbers is None:
+            camera_numbers = [0]
+        if sources is None:
+            sources = []
+        shared_worker = shared_worker and len(camera_numbers) > 1
+
+        self.cameras = []
+        for index, camera_no in enumerate(camera_numbers):
+            cores = None
+            if not shared_worker:
+                cores = get_worker_cores(index, len(camera_numbers))
+            self.cameras.append(
+                Camera(
+                    camera_no,
+                    get_calibration_file(camera_no),
+                    cores,
+                    start_worker=not shared_worker,
+                    source=sources[index] if index < len(sources) else None,
+                    record=get_recording_file(record, index),
+                    track_id_offset=index * CAMERA_TRACK_IDS,
+                    **camera_options
+                )
+            )
+        self.active = 0
+
+        if shared_worker:
+            camera = self.cameras[0]
+            Process(
+                target=load_shared_yolo_model,
+                args=(
+                    [camera.queues for camera in self.cameras],
+                    get_default_model_path(),
+                    camera.backend,
+                    camera.motion_threshold,
+                    camera.max_staleness,
+                    batch_window,
+                    camera.warmup_inferences,
+                    camera.detection_interval,
+                ),
+            ).start()
+
+    def get_active(self) -> Camera:
+        """
+        Gets the active camera (the camera being calibrated or displayed).
+        """
+        return self.cameras[self.active]
+
+    def get_cameras(self):
+        """
+        Gets every camera of the group.
+        """
+        return self.cameras
+
+    def is_loading(self):
+        """
+        Returns True if any camera is still opening.
+        """
+        return any([camera.loading for camera in self.cameras])
+
+    def is_model_loading(self):
+        """
+        Returns True if the model of any camera is still loading.
+        """
+        return any([camera.model_loading for camera in self.cameras])
+
+    def get_model_progress(self):
+        """
+        Gets the stage the model of the first loading camera is at
+        (or None if no stage has been reported).
+        """
+        for camera in self.cameras:
+            if camera.model_loading:
+                return camera.model_progress
+        return None
+
+    def has_model(self):
+        """
+        Returns True if the model of every camera is loaded.
+        """
+        return all([camera.model is not None for camera in self.cameras])
+
+    def set_filter_enabled(self, enabled):
+        """
+        Enables or disables the black and white filter of every camera.
+        """
+        for camera in self.cameras:
+            camera.filter_enabled = enabled
+
+    def save_calibration(self):
+        """
+        Saves the calibration settings of every camera.
+        """
+        for camera in self.cameras:
+            camera.save_calibration()
+
+    def init_next_camera(self):
+        """
+        Makes the next camera active, or swaps the video device
+        if there is only a single camera.
+        """
+        if len(self.cameras) == 1:
+            self.cameras[0].init_next_camera()
+        else:
+            self.active = (self.active + 1) % len(self.cameras)
+
+    def capture_video(self):
+        """
+        Gets the latest footage of the active camera.
+        """
+        return self.get_active().capture_video()
+
+    def get_preview(self, size, alpha=None) -> pygame.Surface:
+        """
+        Gets the latest footage of the active camera scaled to the given size.
+        """
+        return self.get_active().get_preview(size, alpha)
+
+    def display_to_screen(self, controller, screen: pygame.Surface):
+        """
+        Displays the active camera to the screen.
+        """
+        self.get_active().display_to_screen(controller, screen)
+
+    def update(self, controller):
+        """
+        Updates every camera, outputting the merged objects
+        to the controller's object list.
+        """
+        objects = []
+        sources = []
+        for index, camera in enumerate(self.cameras):
+            camera_objects = camera.update(controller)
+            objects.extend(camera_objects)
+            sources.extend([index] * len(camera_objects))
+
+        if len(self.cameras) > 1:
+            objects = suppress_duplicates(objects, sources)
+
+        controller.set_cam_objects(objects)
+        controller.tracer.stamp("camera")
+
+    def destroy(self):
+        """
+        Releases every camera and YOLO model.
+        """
+        for camera in self.cameras:
+            camera.destroy()
@@ -0,0 +1,162 @@
+"""
+    capture.py - hosts the CaptureService class.
+"""
+
+import threading
+import time
+
+CAPTURE_BUFFERS = 3  # Number of preallocated frame buffers cycled by the capture thread
+CAPTURE_IDLE_DELAY = 0.05  # Seconds to wait when there is no device to read from
+CAPTURE_STOP_TIMEOUT = 2.0  # Max seconds to wait for the capture thread to stop
+
+
+class CaptureService:
+    """
+    Continuously grabs frames from a video device in a dedicated thread.
+
+    Every frame is stamped with a monotonic timestamp and a sequence
+    number, and consumers read the latest frame without touching the
+    device (so they never block on camera I/O).
+    """
+
+    def __init__(self, frame_filter=None, on_frame=None, on_error=None):
+        """
+        Creates and starts the capture thread (with no device attached).
+
+        Arguments:
+            frame_filter -- a function applied to every raw frame, returning the
+                            frame that is published (or None to publish raw frames)
+            on_frame -- a function called with (sequence, timestamp, frame)
+                        from the capture thread for every published frame.
+            on_error -- a function called from the capture thread when the
+                        device fails to read a frame.
+        """
+        self.frame_filter = frame_filter
+        self.on_frame = on_frame
+        self.on_error = on_error
+
+        self.source = None
+        self.source_lock = threading.Lock()  # Held while reading from the source
+
+        # Preallocated buffers that the device reads into
+        self.buffers = [None] * CAPTURE_BUFFERS
+        self.buffer_index = 0
+
+        # Latest published frame
+        self.frame_condition = threading.Condition()
+        self.frame = None
+        self.sequence = 0
+        self.timestamp = 0.0
+        self.cpu_time = 0.0  # CPU seconds the thread spent reading and filtering
+
+        self.running = True
+        self.thread = threading.Thread(target=self.capture_loop, args=[])
+        self.thread.daemon = True
+        self.thread.start()
+
+    def set_source(self, source):
+        """
+        Sets the device (e.g. cv.VideoCapture) frames are read from.
+        Waits for any read in progress, so the old device can be released
+        safely afterwards.
+
+        Arguments:
+            source -- the device to read from, or None to stop reading.
+        """
+        with self.source_lock:
+            self.source = source
+            self.buffers = [None] * CAPTURE_BUFFERS
+
+        with self.frame_condition:
+            self.frame = None
+
+    def capture_loop(self):
+        """
+        Continuously reads frames from the device into the preallocated buffers.
+        (to be run in another thread - see __init__)
+        """
+        while self.running:
+            failed = False
+            frame = None
+            cpu_start = time.thread_time()
+            with self.source_lock:
+                if self.source is not None:
+                    buffer = self.buffers[self.buffer_index]
+                    ret, frame = self.source.read(buffer)
+                    timestamp = time.monotonic()
+                    if not ret or frame is None:
+                        # Video cam error (or ended)
+                        self.source = None
+                        failed = True
+                    elif frame is not buffer:
+                        # First frame (or new frame size), keep for later reads
+                        self.buffers[self.buffer_index] = frame
+
+            if failed:
+                if self.on_error is not None:
+                    self.on_error()
+                continue
+
+            if frame is None:
+                time.sleep(CAPTURE_IDLE_DELAY)
+                continue
+
+            # Next read goes into a different buffer, so consumers holding
+            # this frame are not overwritten.
+            self.buffer_index = (self.buffer_index + 1) % CAPTURE_BUFFERS
+
+            if self.frame_filter is not None:
+                frame = self.frame_filter(frame)
+            self.cpu_time += time.thread_time() - cpu_start
+
+            with self.frame_condition:
+                self.sequence += 1
+                self.timestamp = timestamp
+                self.frame = frame
+                sequence = self.sequence
+                self.frame_condition.notify_all()
+
+            if self.on_frame is not None:
+                self.on_frame(sequence, timestamp, frame)
+
+    def get_latest_frame(self):
+        """
+        Returns the latest frame without touching the device.
+
+        The frame is shared with other consumers and must not be modified.
+
+        Returns:
+            a tuple (sequence, timestamp, frame), where frame is None if
+            no frame was captured.
+        """
+        with self.frame_condition:
+            return (self.sequence, self.timestamp, self.frame)
+
+    def wait_for_frame(self, last_sequence, timeout=None):
+        """
+        Waits until a frame newer than last_sequence is captured.
+
+        Returns:
+            a tuple (sequence, timestamp, frame) as in get_latest_frame().
+        """
+        with self.frame_condition:
+            self.frame_condition.wait_for(
+                lambda: self.sequence != last_sequence or not self.running, timeout
+            )
+            return (self.sequence, self.timestamp, self.frame)
+
+    def stop(self):
+        """
+        Stops the capture thread, and waits for it to finish the frame in
+        progress (including its on_frame call), unless called from it.
+
+        Returns:
+            True if the capture thread has stopped.
+        """
+        self.running = False
+        with self.frame_condition:
+            self.frame_condition.notify_all()
+
+        if threading.current_thread() is not self.thread:
+            self.thread.join(CAPTURE_STOP_TIMEOUT)
+        return not self.thread.is_alive()
@@ -0,0 +1,242 @@
+"""
+    detector.py - hosts the Detector class, which runs the YOLO model
+    on one of the available inference backends.
+"""
+
+import os
+import hashlib
+import importlib.util
+import cv2 as cv
+import numpy as np
+from ultralytics import YOLO
+
+BACKEND_AUTO = "auto"  # Fastest backend available (falls back to PyTorch)
+BACKEND_PYTORCH = "pytorch"
+BACKEND_ONNX = "onnx"  # ONNX Runtime (requires onnxruntime)
+BACKEND_OPENVINO = "openvino"  # Intel OpenVINO (requires openvino)
+BACKENDS = [BACKEND_AUTO, BACKEND_PYTORCH, BACKEND_ONNX, BACKEND_OPENVINO]
+
+# Backends tried in order by BACKEND_AUTO (fastest on CPU first)
+AUTO_BACKENDS = [BACKEND_OPENVINO, BACKEND_ONNX, BACKEND_PYTORCH]
+
+# Python module each exported backend requires at runtime
+BACKEND_MODULES = {
+    BACKEND_ONNX: "onnxruntime",
+    BACKEND_OPENVINO: "openvino",
+}
+
+MODEL_HASH_LENGTH = 12  # Characters of the model hash kept in exported file names
+MODEL_HASH_CHUNK = 1 << 20  # Bytes hashed at a time
+
+
+def get_model_hash(path):
+    """
+    Gets the (shortened) SHA-256 hash of a model file,
+    or None if the file does not exist.
+    """
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(MODEL_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:MODEL_HASH_LENGTH]
+
+
+def get_exported_path(path, backend):
+    """
+    Gets the path the given model is cached at once exported for a backend,
+    keyed by the hash of the model (e.g. assets/model.pt is cached at
+    assets/model.<hash>.onnx), so a changed model is exported again.
+
+    Arguments:
+        path -- the path of the PyTorch model.
+        backend -- the backend exported for.
+
+    Returns:
+        the path, or None if the model does not exist (yet).
+    """
+    if backend == BACKEND_PYTORCH:
+        return path
+    model_hash = get_model_hash(path)
+    if model_hash is None:
+        return None
+
+    (base, _) = os.path.splitext(path)
+    if backend == BACKEND_ONNX:
+        return base + "." + model_hash + ".onnx"
+    elif backend == BACKEND_OPENVINO:
+        return base + "." + model_hash + "_openvino_model"
+    return path
+
+
+class Detector:
+    """
+    Runs a YOLOv8 model on the given backend.
+
+    Models for exported backends (ONNX / OpenVINO) are exported next to
+    the PyTorch model the first time they are used (and cached by the hash
+    of the model). If a backend cannot be loaded (or fails while running),
+    the detector falls back to PyTorch.
+
+    Results are the same ultralytics results on every backend
+    (i.e. results.boxes.data).
+    """
+
+    def __init__(self, path, backend=BACKEND_AUTO, progress=None):
+        """
+        Loads the model onto the first backend that works.
+
+        Arguments:
+            path -- the path of the PyTorch model (.pt).
+            backend -- one of BACKENDS.
+            progress -- a function called with a description of each
+                        loading stage (or None)
+        """
+        self.path = path
+        self.model = None
+        self.backend = None
+        self.color_buffers = []  # Preallocated BGR frames for single-channel frames
+        self.progress = progress
+
+        if backend == BACKEND_AUTO:
+            candidates = AUTO_BACKENDS
+        elif backend in BACKENDS:
+            candidates = [backend, BACKEND_PYTORCH]
+        else:
+            print("Unknown inference backend " + str(backend) + ", using PyTorch")
+            candidates = [BACKEND_PYTORCH]
+
+        for candidate in candidates:
+            if self.load(candidate):
+                break
+
+        if self.model is None:
+            raise RuntimeError("Failed to load model " + str(path))
+
+    def report(self, stage):
+        """
+        Reports a loading stage (see progress).
+        """
+        if self.progress is not None:
+            self.progress(stage)
+
+    def load(self, backend):
+        """
+        Loads the model onto the given backend, exporting it if necessary.
+
+        Returns:
+            True if the model was loaded.
+        """
+        try:
+            if backend == BACKEND_PYTORCH:
+                self.report("Loading model")
+                self.model = YOLO(self.path)
+            else:
+                # Do not try exporting for a runtime that is not installed
+                if importlib.util.find_spec(BACKEND_MODULES[backend]) is None:
+                    return False
+
+                exported_path = get_exported_path(self.path, backend)
+                if exported_path is None or not os.path.exists(exported_path):
+                    self.report("Exporting model for " + backend)
+                    print("Exporting model for " + backend + "...")
+                    # Dynamic input size, so regions of interest can be run
+                    # at a smaller size (see load_yolo_model)
+                    model = YOLO(self.path)
+                    exported = model.export(format=backend, dynamic=True)
+
+                    # Cache the export by the hash of the model
+                    # (the model only exists once downloaded, e.g. YOLOv8n)
+                    exported_path = get_exported_path(self.path, backend)
+                    if exported_path is None:
+                        exported_path = exported
+                    elif exported != exported_path:
+                        os.replace(exported, exported_path)
+
+                self.report("Loading " + backend + " model")
+                self.model = YOLO(exported_path, task="detect")
+
+            self.backend = backend
+            print("Using " + backend + " inference backend")
+            return True
+        except Exception as e:
+            print("Failed to load " + backend + " inference backend: " + str(e))
+            return False
+
+    def warmup(self, count, imgsz, sizes=()):
+        """
+        Runs the model on blank frames, so that the first frames of
+        the camera are not slowed down by caches and kernels warming up.
+
+        Exported backends take any input size (see load), but compile each
+        size on its first run, so the model is also run once at every other
+        size it may be run at (e.g. on regions of interest).
+
+        Arguments:
+            count -- the number of frames to run the model on (0 to skip)
+            imgsz -- the input size of the model
+            sizes -- the other input sizes the model may be run at
+        """
+        if count <= 0:
+            return
+
+        runs = [imgsz] * count
+        if self.backend != BACKEND_PYTORCH:
+            runs += [size for size in sizes if size != imgsz]
+        for i, size in enumerate(runs):
+            self.report(
+                "Warming up model (" + str(i + 1) + "/" + str(len(runs)) + ")"
+            )
+            blank = np.zeros((size, size, 3), dtype=np.uint8)
+            self.predict([blank], verbose=False, imgsz=size)
+
+    def get_names(self):
+        """
+        Gets the class names of the model (by class id).
+        """
+        return dict(self.model.names)
+
+    def to_color(self, frame, index=0):
+        """
+        Converts a single-channel frame into a BGR frame (the input every
+        model takes), reusing the same buffer between frames.
+
+        Arguments:
+            frame -- the frame to convert.
+            index -- the index of the frame in its batch (each has its own buffer)
+        """
+        if frame.ndim == 3:
+            return frame
+
+        while len(self.color_buffers) <= index:
+            self.color_buffers.append(None)
+        shape = frame.shape + (3,)
+        buffer = self.color_buffers[index]
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self.color_buffers[index] = buffer
+        cv.cvtColor(frame, cv.COLOR_GRAY2BGR, dst=buffer)
+        return buffer
+
+    def predict(self, frames, **kwargs):
+        """
+        Runs the model (without object tracking) on a batch of frames at once.
+
+        Arguments:
+            frames -- the frames to run the model on (BGR or single-channel).
+            kwargs -- arguments passed to the ultralytics model.
+
+        Returns:
+            the ultralytics results of each frame.
+        """
+        frames = [self.to_color(frame, index) for index, frame in enumerate(frames)]
+        try:
+            return self.model.predict(frames, **kwargs)
+        except Exception as e:
+            if self.backend == BACKEND_PYTORCH:
+                raise
+            print("Inference backend failed, falling back to PyTorch: " + str(e))
+            if not self.load(BACKEND_PYTORCH):
+                raise
+            return self.model.predict(frames, **kwargs)
@@ -0,0 +1,225 @@
+"""
+    homography.py - hosts the functions that apply the camera calibration
+    settings and the perspective transform (homography) fit from
+    calibration points.
+"""
+
+import cv2 as cv
+import numpy as np
+
+MIN_CALIBRATION_POINTS = 4  # Least point correspondences a homography can be fit from
+SKEW_DEAD_ZONE = 8  # Pixels around the center of the screen that are not skewed
+MAX_REPROJECTION_ERROR = 20  # Most pixels a fit may misplace a calibration point by
+MIN_CALIBRATION_AREA = 0.1  # Least area (perc of bounding box) the points must span
+
+
+def get_skew(shift, skew_low, skew_high):
+    """
+    Returns the skewing of each offset from the center of the screen
+    along one axis (no skew within SKEW_DEAD_ZONE of the center).
+
+    Arguments:
+        shift -- array of offsets from the center of the screen
+        skew_low, skew_high -- the skewing of the left/top and right/bottom half
+    """
+    return np.where(
+        shift < -SKEW_DEAD_ZONE,
+        skew_low,
+        np.where(shift > SKEW_DEAD_ZONE, skew_high, 0),
+    )
+
+
+def calibrate_boxes(
+    boxes,
+    w,
+    h,
+    offset_x,
+    offset_y,
+    scale_x,
+    scale_y,
+    skew_left,
+    skew_right,
+    skew_top,
+    skew_bottom,
+):
+    """
+    Applies the calibration settings (see Camera) to a batch of boxes.
+
+    Each box is moved by the center offset and resized about its center,
+    then its center is skewed away from or towards the center of the screen
+    (the same piecewise mapping the settings were always tuned against).
+
+    Arguments:
+        boxes -- (n, 4) array of boxes (x, y, w, h)
+        w, h -- the size of the screen
+        offset_x, offset_y -- the center offset (as perc of screen)
+        scale_x, scale_y -- the resizing of every box (perc of box)
+        skew_* -- the skewing of each half of the screen (perc of half-screen)
+
+    Returns:
+        an (n, 4) array of boxes (x, y, w, h)
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    if len(boxes) == 0:
+        return boxes.copy()
+
+    center = boxes[:, :2] + boxes[:, 2:] / 2 + (w * offset_x, h * offset_y)
+    size = boxes[:, 2:] * (scale_x, scale_y)
+    shift = center - (w / 2, h / 2)
+    skew = np.stack(
+        [
+            get_skew(shift[:, 0], skew_left, skew_right),
+            get_skew(shift[:, 1], skew_top, skew_bottom),
+        ],
+        axis=1,
+    )
+    center -= skew * shift
+    return np.concatenate([center - size / 2, size], axis=1)
+
+
+def uncalibrate_points(
+    points, w, h, offset_x, offset_y, skew_left, skew_right, skew_top, skew_bottom
+):
+    """
+    Maps points on screen back through the calibration offset and skew
+    settings (the inverse of calibrate_boxes for the center of a box).
+
+    Arguments:
+        points -- (n, 2) array of points on screen
+        w, h -- the size of the screen
+        offset_x, offset_y -- the center offset (as perc of screen)
+        skew_* -- the skewing of each half of the screen (perc of half-screen)
+
+    Returns:
+        an (n, 2) array of points
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    shift = points - (w / 2, h / 2)
+
+    # A skewed offset is (1 - skew) times the offset (outside the dead zone)
+    factor = 1 - np.stack(
+        [
+            np.where(shift[:, 0] < 0, skew_left, skew_right),
+            np.where(shift[:, 1] < 0, skew_top, skew_bottom),
+        ],
+        axis=1,
+    )
+    unskewed = shift / np.where(factor > 0, factor, 1)
+    shift = np.where(np.abs(unskewed) > SKEW_DEAD_ZONE, unskewed, shift)
+    return shift + (w / 2, h / 2) - (w * offset_x, h * offset_y)
+
+
+def get_reprojection_error(src, dst, homography):
+    """
+    Returns the largest distance (in pixels) between the given screen
+    points and their camera points transformed by the homography.
+
+    Arguments:
+        src -- (n, 2) array of points as seen by the camera
+        dst -- (n, 2) array of the matching points on screen
+        homography -- the 3x3 perspective transform
+    """
+    projected = cv.perspectiveTransform(src.reshape(-1, 1, 2), homography)
+    return float(np.linalg.norm(projected.reshape(-1, 2) - dst, axis=1).max())
+
+
+def is_degenerate(src, homography):
+    """
+    Checks if a homography is unusable for the given camera points, i.e.
+    the points are (nearly) collinear, or the transform is singular or
+    folds the points over the horizon (where the points would be flipped).
+
+    Arguments:
+        src -- (n, 2) array of points as seen by the camera
+        homography -- the 3x3 perspective transform
+    """
+    if homography is None or not np.all(np.isfinite(homography)):
+        return True
+
+    # The points must span an area (else the fit is underdetermined)
+    hull = cv.convexHull(src.astype(np.float32))
+    extent = src.max(axis=0) - src.min(axis=0)
+    if cv.contourArea(hull) < MIN_CALIBRATION_AREA * extent[0] * extent[1]:
+        return True
+
+    # Every point must stay on the same side of the horizon
+    scale = np.concatenate([src, np.ones((len(src), 1))], axis=1) @ homography[2]
+    if not (np.all(scale > 0) or np.all(scale < 0)):
+        return True
+    return abs(np.linalg.det(homography / np.abs(homography).max())) < 1e-12
+
+
+def fit_point_homography(src, dst):
+    """
+    Returns the 3x3 perspective transform mapping the given camera points
+    onto their screen points, or None if it cannot be fit, is degenerate,
+    or misplaces any point by more than MAX_REPROJECTION_ERROR.
+
+    Arguments:
+        src -- (n, 2) array of points as seen by the camera
+        dst -- (n, 2) array of the matching points on screen
+    """
+    src = np.asarray(src, dtype=np.float64).reshape(-1, 2)
+    dst = np.asarray(dst, dtype=np.float64).reshape(-1, 2)
+    if len(src) < MIN_CALIBRATION_POINTS or len(src) != len(dst):
+        print(
+            "Calibration needs at least "
+            + str(MIN_CALIBRATION_POINTS)
+            + " points (found "
+            + str(len(src))
+            + ")"
+        )
+        return None
+
+    (homography, _) = cv.findHomography(src, dst, 0)
+    if is_degenerate(src, homography):
+        print("Calibration points are degenerate, keeping last calibration")
+        return None
+
+    error = get_reprojection_error(src, dst, homography)
+    if error > MAX_REPROJECTION_ERROR:
+        print(
+            "Calibration points misplaced by "
+            + str(round(error, 1))
+            + " px, keeping last calibration"
+        )
+        return None
+    return homography
+
+
+def transform_boxes(boxes, homography, scale_x=1, scale_y=1):
+    """
+    Transforms a batch of boxes onto the screen.
+
+    Each box is resized about its center, then its corners are transformed
+    by the homography, and the bounding box of the corners is returned.
+
+    Arguments:
+        boxes -- (n, 4) array of boxes (x, y, w, h)
+        homography -- the 3x3 perspective transform
+        scale_x, scale_y -- the resizing of every box (perc of box)
+
+    Returns:
+        an (n, 4) array of boxes (x, y, w, h)
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    if len(boxes) == 0:
+        return boxes.copy()
+
+    center = boxes[:, :2] + boxes[:, 2:] / 2
+    half = boxes[:, 2:] * (scale_x, scale_y) / 2
+    corners = np.stack(
+        [
+            center - half,
+            center + half * (1, -1),
+            center + half * (-1, 1),
+            center + half,
+        ],
+        axis=1,
+    )
+
+    corners = cv.perspectiveTransform(corners.reshape(-1, 1, 2), homography)
+    corners = corners.reshape(-1, 4, 2)
+    top_left = corners.min(axis=1)
+    bottom_right = corners.max(axis=1)
+    return np.concatenate([top_left, bottom_right - top_left], axis=1)
@@ -0,0 +1,90 @@
+"""
+    motion.py - hosts the MotionGate class, which decides whether a
+    frame has changed enough to run the model on it.
+"""
+
+import cv2 as cv
+import numpy as np
+
+MOTION_DOWNSAMPLE = 8  # Frames are shrunk by this factor before being compared
+MOTION_PIXEL_DELTA = 32  # Difference (0-255) at which a pixel is considered changed
+MOTION_THRESHOLD = 0.002  # Perc of changed pixels at which a frame has motion
+MOTION_MAX_STALENESS = 1.0  # Max seconds between model runs, even without motion
+
+
+class MotionGate:
+    """
+    Compares frames against the last frame the model was run on
+    (shrunk down, so the comparison is cheap), and only lets frames
+    through if enough pixels have changed, or if the last model run
+    is older than the max staleness.
+    """
+
+    def __init__(self, threshold=MOTION_THRESHOLD, max_staleness=MOTION_MAX_STALENESS):
+        """
+        Creates the gate (the first frame always passes).
+
+        Arguments:
+            threshold -- the perc of changed pixels at which a frame passes
+                         (0 lets every frame through).
+            max_staleness -- the max seconds between frames that pass.
+        """
+        self.threshold = threshold
+        self.max_staleness = max_staleness
+        self.frame_shape = None  # Shape and dtype of the frames compared
+        self.reference = None  # Shrunk frame the model last ran on
+        self.small = None  # Shrunk current frame
+        self.diff = None
+        self.last_passed = 0.0
+        self.skipped = 0  # Number of frames that did not pass
+
+    def reset(self):
+        """
+        Forgets the last frame the model was run on, so the next frame passes.
+        """
+        self.frame_shape = None
+        self.reference = None
+        self.small = None
+        self.diff = None
+
+    def check(self, frame, timestamp):
+        """
+        Checks whether the model should run on the given frame. If so, the
+        frame becomes the one later frames are compared against.
+
+        Arguments:
+            frame -- the frame (or region of the frame) the model would run on.
+            timestamp -- the time of the frame (seconds).
+
+        Returns:
+            True if the model should run on the frame.
+        """
+        if self.threshold <= 0:
+            return True
+
+        (h, w) = frame.shape[:2]
+        size = (max(1, w // MOTION_DOWNSAMPLE), max(1, h // MOTION_DOWNSAMPLE))
+        if (frame.shape, frame.dtype) != self.frame_shape:
+            # Frame size, channels (e.g. filter toggled) or region changed,
+            # so reallocate and let the frame through
+            self.reset()
+            self.frame_shape = (frame.shape, frame.dtype)
+            self.small = cv.resize(frame, size, interpolation=cv.INTER_AREA)
+            self.reference = self.small.copy()
+            self.diff = np.empty_like(self.small)
+            self.last_passed = timestamp
+            return True
+
+        cv.resize(frame, size, dst=self.small, interpolation=cv.INTER_AREA)
+
+        if timestamp - self.last_passed < self.max_staleness:
+            cv.absdiff(self.small, self.reference, dst=self.diff)
+            changed = np.count_nonzero(self.diff > MOTION_PIXEL_DELTA)
+            if changed < self.diff.size * self.threshold:
+                self.skipped += 1
+                return False
+
+        # Swap buffers, so the current frame becomes the reference
+        (self.reference, self.small) = (self.small, self.reference)
+        self.last_passed = timestamp
+        return True
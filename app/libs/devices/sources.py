@@ -0,0 +1,454 @@
+"""
+    sources.py - hosts the camera sources frames can be captured from
+    (video devices, video files, image directories, recordings and
+    generated frames),
+    and the RecordingWriter class, which records a source to a file.
+
+    Every source reads like cv.VideoCapture (read, isOpened, release),
+    so it can be given to the CaptureService.
+"""
+
+import os
+import sys
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import cv2 as cv
+import numpy as np
+
+SOURCE_FPS = 30  # Playback rate of sources without their own rate (e.g. images)
+SYNTHETIC_SOURCE = "synthetic"  # Generated frames (e.g. synthetic:1280x720)
+SYNTHETIC_SIZE = (1280, 720)  # Default size of generated frames
+SYNTHETIC_SHAPES = 6  # Number of shapes moving around generated frames
+IMAGE_EXTENSIONS = [".png", ".jpg", ".jpeg", ".bmp"]
+RECORDING_EXTENSION = ".rec"
+RECORDING_MAGIC = b"FIDREC02"  # Start of every recording file
+RECORDING_QUEUE_SIZE = 8  # Frames waiting to be recorded before frames are dropped
+RECORDING_ENCODERS = max(1, min(4, (os.cpu_count() or 1) // 2))  # Encoder threads
+RECORDING_CODEC = ".png"  # Lossless, so replays see exactly the recorded frames
+RECORDING_COMPRESSION = 1  # PNG compression level (fastest, still ~2-10x smaller)
+
+# Header in front of every frame of a recording (followed by the encoded frame)
+RECORDING_RECORD_DTYPE = np.dtype([("timestamp", "<f8"), ("length", "<u4")])
+
+
+def get_device_backend():
+    """
+    Gets the OpenCV capture backend for video devices on this platform.
+    """
+    if sys.platform.startswith("win"):
+        return cv.CAP_DSHOW
+    elif sys.platform.startswith("linux"):
+        return cv.CAP_V4L2
+    return cv.CAP_ANY
+
+
+def encode_recording_frame(frame):
+    """
+    Compresses a frame for a recording (see RECORDING_CODEC).
+
+    Returns:
+        the bytes of the encoded frame, or None if it could not be encoded.
+    """
+    (ret, data) = cv.imencode(
+        RECORDING_CODEC, frame, [cv.IMWRITE_PNG_COMPRESSION, RECORDING_COMPRESSION]
+    )
+    return data.tobytes() if ret else None
+
+
+def index_recording(data):
+    """
+    Finds every frame of a recording (without decoding any frame).
+
+    Arguments:
+        data -- the bytes of the recording file (e.g. mapped)
+
+    Returns:
+        a list of tuples (timestamp, offset, length) of every complete frame
+        (a frame cut short by the recording ending abruptly is ignored).
+    """
+    frames = []
+    offset = len(RECORDING_MAGIC)
+    while offset + RECORDING_RECORD_DTYPE.itemsize <= len(data):
+        record = np.frombuffer(
+            data, dtype=RECORDING_RECORD_DTYPE, count=1, offset=offset
+        )[0]
+        offset += RECORDING_RECORD_DTYPE.itemsize
+        length = int(record["length"])
+        if offset + length > len(data):
+            break
+        frames.append((float(record["timestamp"]), offset, length))
+        offset += length
+    return frames
+
+
+def get_swap_recording_file(path, count):
+    """
+    Gets the recording file of a source opened after others were recorded
+    (e.g. recording.rec, recording_swap1.rec, ...), so each is kept.
+    """
+    if count == 0:
+        return path
+    (base, extension) = os.path.splitext(path)
+    return base + "_swap" + str(count) + extension
+
+
+def open_source(path, camera_no=0, realtime=True):
+    """
+    Opens a camera source.
+
+    Arguments:
+        path -- a video file, image directory, recording (.rec) or generated
+                frames (synthetic or synthetic:WxH), or None to open a video device.
+        camera_no -- the index of the video device (if path is None)
+        realtime -- True to play files back at their original rate,
+                    False to play them back as fast as possible.
+    """
+    if path is None:
+        return cv.VideoCapture(camera_no, get_device_backend())
+    elif path.startswith(SYNTHETIC_SOURCE):
+        size = SYNTHETIC_SIZE
+        if ":" in path:
+            size = tuple([int(value) for value in path.split(":")[1].split("x")])
+        return SyntheticSource(size, realtime)
+    elif os.path.isdir(path):
+        return ImageDirectorySource(path, realtime)
+    elif path.endswith(RECORDING_EXTENSION):
+        return RecordingSource(path, realtime)
+    return VideoFileSource(path, realtime)
+
+
+class FrameSource:
+    """
+    Base class of file-backed sources, which plays frames back at their
+    original timestamps (or as fast as possible).
+    """
+
+    def __init__(self, realtime=True):
+        """
+        Arguments:
+            realtime -- True to play frames back at their original rate.
+        """
+        self.realtime = realtime
+        self.start_time = None  # Monotonic time the first frame was read
+        self.first_timestamp = 0.0
+
+    def wait_for(self, timestamp):
+        """
+        Waits until the frame with the given timestamp (seconds)
+        is due to be played back.
+        """
+        if not self.realtime:
+            return
+
+        now = time.monotonic()
+        if self.start_time is None:
+            self.start_time = now
+            self.first_timestamp = timestamp
+            return
+
+        delay = (timestamp - self.first_timestamp) - (now - self.start_time)
+        if delay > 0:
+            time.sleep(delay)
+
+    def read(self, buffer=None):
+        """
+        Reads the next frame (as cv.VideoCapture.read).
+
+        Returns:
+            a tuple (ret, frame), where ret is False once the source has ended.
+        """
+        return (False, None)
+
+    def isOpened(self):
+        """
+        Returns True if the source was opened.
+        """
+        return True
+
+    def release(self):
+        """
+        Closes the source.
+        """
+        pass
+
+
+class VideoFileSource(FrameSource):
+    """
+    Plays back a video file.
+    """
+
+    def __init__(self, path, realtime=True):
+        super().__init__(realtime)
+        self.video = cv.VideoCapture(path)
+        self.fps = self.video.get(cv.CAP_PROP_FPS)
+        if not self.fps or self.fps <= 0:
+            self.fps = SOURCE_FPS
+        self.index = 0
+
+    def read(self, buffer=None):
+        (ret, frame) = self.video.read(buffer)
+        if ret:
+            self.wait_for(self.index / self.fps)
+            self.index += 1
+        return (ret, frame)
+
+    def isOpened(self):
+        return self.video.isOpened()
+
+    def release(self):
+        self.video.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """
+    Plays back every image in a directory (in order of name).
+    """
+
+    def __init__(self, path, realtime=True, fps=SOURCE_FPS):
+        super().__init__(realtime)
+        self.files = sorted(
+            [
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+            ]
+        )
+        self.fps = fps
+        self.index = 0
+
+    def read(self, buffer=None):
+        while self.index < len(self.files):
+            frame = cv.imread(self.files[self.index])
+            self.index += 1
+            if frame is not None:
+                self.wait_for(self.index / self.fps)
+                return (True, frame)
+        return (False, None)
+
+    def isOpened(self):
+        return len(self.files) > 0
+
+
+class RecordingSource(FrameSource):
+    """
+    Plays back a recording made by the RecordingWriter, at the
+    timestamps the frames were originally captured at.
+
+    The recording is mapped (not loaded into memory) and indexed when
+    opened, and each frame is only decoded when it is read.
+    """
+
+    def __init__(self, path, realtime=True):
+        super().__init__(realtime)
+        self.data = None
+        self.frames = []
+        try:
+            if os.path.getsize(path) < len(RECORDING_MAGIC):
+                raise ValueError("not a recording")
+            self.data = np.memmap(path, dtype=np.uint8, mode="r")
+            if self.data[: len(RECORDING_MAGIC)].tobytes() != RECORDING_MAGIC:
+                raise ValueError("not a recording")
+            self.frames = index_recording(self.data)
+        except Exception as e:
+            print("Failed to load recording " + path + ": " + str(e))
+            self.data = None
+        self.index = 0
+
+    def read(self, buffer=None):
+        while self.data is not None and self.index < len(self.frames):
+            (timestamp, offset, length) = self.frames[self.index]
+            self.index += 1
+            frame = cv.imdecode(
+                self.data[offset : offset + length], cv.IMREAD_UNCHANGED
+            )
+            if frame is None:
+                continue  # Corrupted frame
+
+            self.wait_for(timestamp)
+            if buffer is not None and buffer.shape == frame.shape:
+                np.copyto(buffer, frame)
+                frame = buffer
+            return (True, frame)
+        return (False, None)
+
+    def isOpened(self):
+        return self.data is not None and len(self.frames) > 0
+
+    def release(self):
+        self.data = None
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generates frames of white shapes moving over a dark background
+    (for running without a camera, e.g. benchmarks).
+    """
+
+    def __init__(self, size=SYNTHETIC_SIZE, realtime=True, fps=SOURCE_FPS):
+        super().__init__(realtime)
+        (self.width, self.height) = size
+        self.fps = fps
+        self.index = 0
+
+        # Start position and velocity (pixels per frame) of each shape
+        random = np.random.default_rng(0)
+        self.positions = random.uniform(0, 1, (SYNTHETIC_SHAPES, 2)) * size
+        self.velocities = random.uniform(-8, 8, (SYNTHETIC_SHAPES, 2))
+        self.radius = max(8, min(size) // 16)
+
+    def read(self, buffer=None):
+        shape = (self.height, self.width, 3)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+        buffer.fill(0)
+
+        # Shapes bounce off the edges of the frame
+        size = np.array([self.width, self.height])
+        positions = (self.positions + self.velocities * self.index) % (2 * size)
+        positions = np.where(positions > size, 2 * size - positions, positions)
+        for i, (x, y) in enumerate(positions.astype(int).tolist()):
+            if i % 2 == 0:
+                cv.circle(buffer, (x, y), self.radius, (255, 255, 255), -1)
+            else:
+                cv.rectangle(
+                    buffer,
+                    (x - self.radius, y - self.radius),
+                    (x + self.radius, y + self.radius),
+                    (255, 255, 255),
+                    -1,
+                )
+
+        self.wait_for(self.index / self.fps)
+        self.index += 1
+        return (True, buffer)
+
+
+class RecordingWriter:
+    """
+    Records frames (with their timestamps) into a recording from background
+    threads, so capture is not slowed down.
+
+    Frames are compressed (see RECORDING_CODEC) by a pool of encoder threads,
+    then appended to the file (and flushed) in order as they are encoded, so a
+    recording is kept up to the last frame written even if the app stops
+    abruptly. A recording is RECORDING_MAGIC followed by the frames, each a
+    header (see RECORDING_RECORD_DTYPE) and the encoded frame.
+    """
+
+    def __init__(self, path):
+        """
+        Creates and starts the writer thread.
+
+        Arguments:
+            path -- the file the recording is written to (.rec).
+        """
+        self.path = path
+        self.frames = 0  # Frames written
+        self.bytes = 0  # Bytes of encoded frames written
+        self.dropped = 0  # Frames dropped because the writer fell behind
+        self.dropping = False  # True while frames are being dropped
+        self.encoders = ThreadPoolExecutor(RECORDING_ENCODERS)
+        self.queue = queue.Queue(RECORDING_QUEUE_SIZE)  # Frames being encoded
+        self.thread = threading.Thread(target=self.write_loop, args=[])
+        self.thread.daemon = True
+        self.thread.start()
+
+    def add(self, frame, timestamp):
+        """
+        Adds a frame to the recording (the frame is copied).
+        """
+        if self.queue.full():
+            if not self.dropping:
+                print("Recording " + self.path + " fell behind, dropping frames")
+            self.dropping = True
+            self.dropped += 1
+            return
+
+        encoded = self.encoders.submit(encode_recording_frame, frame.copy())
+        self.queue.put((encoded, timestamp))
+        self.dropping = False
+
+    def write_loop(self):
+        """
+        Writes encoded frames (in order) until the writer is closed.
+        (to be run in another thread - see __init__)
+        """
+        file = None
+        try:
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+                (encoded, timestamp) = item
+                data = encoded.result()
+                if data is None:
+                    continue
+
+                if file is None:
+                    file = open(self.path, "wb")
+                    file.write(RECORDING_MAGIC)
+
+                record = np.zeros(1, dtype=RECORDING_RECORD_DTYPE)
+                record["timestamp"] = timestamp
+                record["length"] = len(data)
+                file.write(record.tobytes())
+                file.write(data)
+                file.flush()
+                self.frames += 1
+                self.bytes += len(data)
+        except Exception as e:
+            print("Failed to write recording " + self.path + ": " + str(e))
+        finally:
+            if file is not None:
+                file.close()
+
+        if self.frames > 0:
+            print(
+                "Recorded "
+                + str(self.frames)
+                + " frames ("
+                + str(round(self.bytes / 1e6, 1))
+                + " MB) to "
+                + self.path
+                + " ("
+                + str(self.dropped)
+                + " dropped)"
+            )
+
+    def close(self):
+        """
+        Stops recording and waits for the queued frames to be written.
+        """
+        self.queue.put(None)
+        self.thread.join()
+        self.encoders.shutdown()
+
+
+class RecordedSource:
+    """
+    Records every frame read from another source.
+    """
+
+    def __init__(self, source, writer):
+        """
+        Arguments:
+            source -- the source frames are read from.
+            writer -- the RecordingWriter frames are recorded with.
+        """
+        self.source = source
+        self.writer = writer
+
+    def read(self, buffer=None):
+        (ret, frame) = self.source.read(buffer)
+        if ret and frame is not None:
+            self.writer.add(frame, time.monotonic())
+        return (ret, frame)
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def release(self):
+        self.source.release()
+        self.writer.close()
@@ -0,0 +1,286 @@
+"""
+    tracker.py - hosts the KalmanTracker class, which assigns track ids to
+    detections and predicts where tracks are between detector passes.
+"""
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+DETECTION_INTERVAL = 3  # Frames per model run (the tracker predicts the frames between)
+TRACKER_IOU_THRESHOLD = 0.3  # Least overlap (IoU) for a detection to continue a track
+TRACKER_MAX_DISTANCE = 1.0  # Or farthest its centre is from the track's (in box sizes)
+TRACKER_MAX_MISSED = 30  # Detector passes a track can go unmatched before it is dropped
+
+# Noise of the constant-velocity model (in pixels, per second of prediction)
+KALMAN_POSITION_NOISE = 4.0  # Variance of box centre and size changes
+KALMAN_VELOCITY_NOISE = 400.0  # Variance of velocity changes
+KALMAN_MEASUREMENT_NOISE = 4.0  # Variance of detected boxes
+KALMAN_INITIAL_VELOCITY = 10000.0  # Variance of the (unknown) velocity of new tracks
+KALMAN_MAX_PREDICTION = 0.5  # Max seconds tracks are predicted ahead of their last box
+
+
+def get_iou(boxes_a, boxes_b):
+    """
+    Gets the IoU of every pair of boxes.
+
+    Arguments:
+        boxes_a -- (n, 4) array of boxes (xmin, ymin, xmax, ymax)
+        boxes_b -- (m, 4) array of boxes (xmin, ymin, xmax, ymax)
+
+    Returns:
+        an (n, m) array of IoUs.
+    """
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(union), where=union > 0)
+
+
+def get_distance(boxes_a, boxes_b):
+    """
+    Gets the distance between the centres of every pair of boxes,
+    relative to the size (longest side) of the second box.
+
+    Arguments:
+        boxes_a -- (n, 4) array of boxes (xmin, ymin, xmax, ymax)
+        boxes_b -- (m, 4) array of boxes (xmin, ymin, xmax, ymax)
+
+    Returns:
+        an (n, m) array of distances (in sizes of boxes_b).
+    """
+    centres_a = (boxes_a[:, :2] + boxes_a[:, 2:]) / 2
+    centres_b = (boxes_b[:, :2] + boxes_b[:, 2:]) / 2
+    distances = np.linalg.norm(centres_a[:, None, :] - centres_b[None, :, :], axis=2)
+    sizes = np.max(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    return np.divide(
+        distances,
+        sizes[None, :],
+        out=np.full_like(distances, np.inf),
+        where=sizes[None, :] > 0,
+    )
+
+
+def to_state(boxes):
+    """
+    Converts (n, 4) boxes (xmin, ymin, xmax, ymax) into (n, 4)
+    measurements (centre x, centre y, width, height).
+    """
+    return np.column_stack(
+        [(boxes[:, :2] + boxes[:, 2:]) / 2, boxes[:, 2:] - boxes[:, :2]]
+    )
+
+
+def to_boxes(states):
+    """
+    Converts (n, >=4) states (centre x, centre y, width, height, ...)
+    into (n, 4) boxes (xmin, ymin, xmax, ymax).
+    """
+    sizes = np.maximum(states[:, 2:4], 0)
+    return np.column_stack([states[:, :2] - sizes / 2, states[:, :2] + sizes / 2])
+
+
+class KalmanTracker:
+    """
+    Assigns track ids to detections by matching them with the tracks of
+    previous detector passes (optimally, by overlap, distance and class), and
+    predicts the box of every track on frames the detector is not run on.
+
+    Each track is a constant-velocity Kalman filter over its box
+    (centre x, centre y, width, height and their velocities), with the
+    state of every track stored in numpy arrays (one row per track).
+    """
+
+    def __init__(
+        self,
+        iou_threshold=TRACKER_IOU_THRESHOLD,
+        max_distance=TRACKER_MAX_DISTANCE,
+        max_missed=TRACKER_MAX_MISSED,
+    ):
+        """
+        Creates a tracker with no tracks.
+
+        Arguments:
+            iou_threshold -- the least IoU for a detection to continue a track
+            max_distance -- or the farthest a detection's centre can be from
+                            the track's (in sizes of the track's box)
+            max_missed -- the detector passes a track can go unmatched
+                          before it is dropped
+        """
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.next_id = 1
+        self.states = np.zeros((0, 8))  # Box and velocity of each track
+        self.covariances = np.zeros((0, 8, 8))
+        self.classes = np.zeros(0)
+        self.confidences = np.zeros(0)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.missed = np.zeros(0, dtype=np.int64)
+        self.last_seen = np.zeros(0)  # Time each track was last detected
+        self.timestamp = None  # Time the states were predicted to
+
+        self.measurement = np.eye(4, 8)  # Measured part of the state (the box)
+        self.measurement_noise = np.eye(4) * KALMAN_MEASUREMENT_NOISE
+
+    def __len__(self):
+        """
+        Returns the number of tracks.
+        """
+        return len(self.ids)
+
+    def advance(self, timestamp):
+        """
+        Predicts the state of every track at the given time
+        (tracks are not predicted further than KALMAN_MAX_PREDICTION
+        ahead of their last detection).
+        """
+        if self.timestamp is None:
+            self.timestamp = timestamp
+        dt = np.clip(
+            np.minimum(timestamp, self.last_seen + KALMAN_MAX_PREDICTION)
+            - self.timestamp,
+            0,
+            None,
+        )
+        self.timestamp = max(self.timestamp, timestamp)
+        if len(self.ids) == 0:
+            return
+
+        # Transition of each track (position += velocity * dt)
+        transitions = np.tile(np.eye(8), (len(self.ids), 1, 1))
+        transitions[:, range(4), range(4, 8)] = dt[:, None]
+        noise = np.zeros((len(self.ids), 8))
+        noise[:, :4] = KALMAN_POSITION_NOISE
+        noise[:, 4:] = KALMAN_VELOCITY_NOISE
+        noise *= dt[:, None]
+
+        self.states = np.einsum("nij,nj->ni", transitions, self.states)
+        self.covariances = np.einsum(
+            "nij,njk,nlk->nil", transitions, self.covariances, transitions
+        )
+        self.covariances[:, range(8), range(8)] += noise
+
+    def correct(self, rows, measurements):
+        """
+        Corrects the state of the given tracks with their detected boxes.
+
+        Arguments:
+            rows -- the rows of the tracks
+            measurements -- (n, 4) array of detected boxes
+                            (centre x, centre y, width, height)
+        """
+        H = self.measurement
+        covariances = self.covariances[rows]
+        residuals = measurements - self.states[rows, :4]
+        innovation = H @ covariances @ H.T + self.measurement_noise
+        gains = covariances @ H.T @ np.linalg.inv(innovation)
+        self.states[rows] += np.einsum("nij,nj->ni", gains, residuals)
+        self.covariances[rows] = (np.eye(8) - gains @ H) @ covariances
+
+    def predict(self, timestamp):
+        """
+        Predicts the box of every track that was detected in the last
+        detector pass (for frames the detector is not run on).
+
+        Arguments:
+            timestamp -- the time of the frame (seconds)
+
+        Returns:
+            an (n, 7) array of tracked boxes
+            (xmin, ymin, xmax, ymax, track_id, confidence, class)
+        """
+        self.advance(timestamp)
+        rows = np.flatnonzero(self.missed == 0)
+        return np.column_stack(
+            [
+                to_boxes(self.states[rows]),
+                self.ids[rows],
+                self.confidences[rows],
+                self.classes[rows],
+            ]
+        )
+
+    def update(self, detections, timestamp):
+        """
+        Matches the detections of a frame with the tracks, and
+        corrects the matched tracks.
+
+        A detection continues a track (of the same class) if it overlaps
+        the track's predicted box, or if its centre is close to the box:
+        objects can move further than their overlap between detector
+        passes, especially new tracks whose velocity is not known yet.
+
+        Arguments:
+            detections -- (n, 6) array of detections
+                          (xmin, ymin, xmax, ymax, confidence, class)
+            timestamp -- the time of the frame (seconds)
+
+        Returns:
+            an (n, 7) array of tracked detections
+            (xmin, ymin, xmax, ymax, track_id, confidence, class)
+        """
+        detections = np.asarray(detections, dtype=np.float64).reshape(-1, 6)
+        self.advance(timestamp)
+        rows = np.full(len(detections), -1, dtype=np.int64)
+
+        if len(detections) > 0 and len(self.ids) > 0:
+            boxes = to_boxes(self.states)
+            iou = get_iou(detections[:, :4], boxes)
+            distance = get_distance(detections[:, :4], boxes)
+            valid = (iou >= self.iou_threshold) | (distance <= self.max_distance)
+            valid &= detections[:, 5][:, None] == self.classes[None, :]
+
+            # Match detections to tracks, maximising overlap and closeness
+            cost = np.where(valid, np.minimum(distance, self.max_distance) - iou, 1e6)
+            (matched_detections, matched_rows) = linear_sum_assignment(cost)
+            valid = valid[matched_detections, matched_rows]
+            rows[matched_detections[valid]] = matched_rows[valid]
+
+        matched = rows[rows >= 0]
+        measurements = to_state(detections[:, :4])
+        if len(matched) > 0:
+            self.correct(matched, measurements[rows >= 0])
+            self.confidences[matched] = detections[rows >= 0, 4]
+            self.last_seen[matched] = timestamp
+
+        # Drop tracks that have gone unmatched for too long
+        seen = np.zeros(len(self.ids), dtype=bool)
+        seen[matched] = True
+        self.missed[seen] = 0
+        self.missed[~seen] += 1
+        kept = self.missed <= self.max_missed
+        ids = np.zeros(len(detections), dtype=np.int64)
+        ids[rows >= 0] = self.ids[matched]
+
+        # Unmatched detections start new tracks (with an unknown velocity)
+        new = rows < 0
+        count = np.count_nonzero(new)
+        ids[new] = np.arange(self.next_id, self.next_id + count)
+        self.next_id += count
+        states = np.zeros((count, 8))
+        states[:, :4] = measurements[new]
+        covariances = np.zeros((count, 8, 8))
+        covariances[:, range(4), range(4)] = KALMAN_MEASUREMENT_NOISE
+        covariances[:, range(4, 8), range(4, 8)] = KALMAN_INITIAL_VELOCITY
+
+        self.states = np.concatenate([self.states[kept], states])
+        self.covariances = np.concatenate([self.covariances[kept], covariances])
+        self.classes = np.concatenate([self.classes[kept], detections[new, 5]])
+        self.confidences = np.concatenate([self.confidences[kept], detections[new, 4]])
+        self.ids = np.concatenate([self.ids[kept], ids[new]])
+        self.missed = np.concatenate(
+            [self.missed[kept], np.zeros(count, dtype=np.int64)]
+        )
+        self.last_seen = np.concatenate(
+            [self.last_seen[kept], np.full(count, float(timestamp))]
+        )
+
+        # Matched detections keep their filtered box
+        boxes = detections[:, :4].copy()
+        if len(matched) > 0:
+            rows_kept = np.cumsum(kept) - 1
+            boxes[rows >= 0] = to_boxes(self.states[rows_kept[matched]])
+        return np.column_stack([boxes, ids, detections[:, 4], detections[:, 5]])
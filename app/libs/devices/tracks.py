@@ -0,0 +1,200 @@
+"""
+    tracks.py - hosts the TrackTable class, which smooths tracked detections.
+"""
+
+import numpy as np
+from ..mp import DETECTION_DTYPE
+
+TRACK_HISTORY = 5  # Number of latest boxes averaged for each track
+TRACK_CAPACITY = 32  # Number of tracks space is initially allocated for
+MAX_TRACKS = 256  # Most tracks stored at once (least recently seen are evicted)
+
+
+class TrackTable:
+    """
+    Stores the state of every track from the object tracker in
+    preallocated numpy arrays (one row per track).
+
+    Each track keeps a ring buffer of its latest boxes along with a
+    rolling sum, so the average box of every track is updated in a
+    single vectorized pass per frame.
+
+    Tracks that have not been seen for a while are evicted (see evict()),
+    so memory and per-frame cost stay flat over long sessions.
+    """
+
+    def __init__(
+        self, capacity=TRACK_CAPACITY, history=TRACK_HISTORY, max_tracks=MAX_TRACKS
+    ):
+        """
+        Allocates the track arrays.
+
+        Arguments:
+            capacity -- the number of tracks to allocate space for.
+            history -- the number of latest boxes averaged for each track.
+            max_tracks -- the most tracks stored at once.
+        """
+        self.history = history
+        self.max_tracks = max(capacity, max_tracks)
+        self.rows = {}  # Row of each track id
+        self.capacity = 0
+        self.evictions = 0  # Number of tracks evicted so far
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        """
+        Allocates (or grows) the track arrays to hold the given number of tracks.
+        """
+        old_capacity = self.capacity
+        arrays = {
+            "track_ids": np.full(capacity, -1, dtype=np.int64),
+            "class_ids": np.zeros(capacity, dtype=np.int16),
+            "confidences": np.zeros(capacity, dtype=np.float32),
+            "boxes": np.zeros((capacity, self.history, 4), dtype=np.float64),
+            "box_sums": np.zeros((capacity, 4), dtype=np.float64),
+            "counts": np.zeros(capacity, dtype=np.int64),
+            "heads": np.zeros(capacity, dtype=np.int64),
+            "last_seen": np.zeros(capacity, dtype=np.float64),
+        }
+        for name, array in arrays.items():
+            if old_capacity > 0:
+                array[:old_capacity] = getattr(self, name)
+            setattr(self, name, array)
+
+        self.free_rows = list(range(capacity - 1, old_capacity - 1, -1))
+        self.capacity = capacity
+
+    def __len__(self):
+        """
+        Returns the number of tracks stored.
+        """
+        return len(self.rows)
+
+    def __contains__(self, track_id):
+        """
+        Returns True if the track is stored.
+        """
+        return track_id in self.rows
+
+    def get_evictions(self):
+        """
+        Returns the number of tracks evicted so far.
+        """
+        return self.evictions
+
+    def free_row(self, row):
+        """
+        Removes the track in the given row, allowing the row to be reused.
+        """
+        self.rows.pop(int(self.track_ids[row]), None)
+        self.track_ids[row] = -1
+        self.counts[row] = 0
+        self.free_rows.append(row)
+        self.evictions += 1
+
+    def evict(self, timestamp, max_age):
+        """
+        Evicts every track that has not been seen within max_age seconds.
+
+        Arguments:
+            timestamp -- the current time (seconds)
+            max_age -- the number of seconds until an unseen track is evicted
+
+        Returns:
+            the number of tracks evicted.
+        """
+        rows = np.flatnonzero(
+            (self.counts > 0) & (timestamp - self.last_seen > max_age)
+        )
+        for row in rows.tolist():
+            self.free_row(row)
+        return len(rows)
+
+    def refresh(self, last_timestamp, timestamp):
+        """
+        Marks every track seen at last_timestamp as seen again at timestamp
+        (e.g. when the frame has not changed since the tracks were seen).
+        """
+        self.last_seen[
+            (self.counts > 0) & (self.last_seen == last_timestamp)
+        ] = timestamp
+
+    def get_rows(self, track_ids, class_ids):
+        """
+        Gets the rows of the given tracks, creating rows for new tracks.
+        """
+        rows = np.empty(len(track_ids), dtype=np.int64)
+        for i, track_id in enumerate(track_ids.tolist()):
+            row = self.rows.get(track_id)
+            if row is None:
+                if not self.free_rows:
+                    if self.capacity < self.max_tracks:
+                        self.allocate(min(self.capacity * 2, self.max_tracks))
+                    else:
+                        # Full, so evict the least recently seen track
+                        # (that is not part of this update)
+                        ages = np.where(self.counts > 0, self.last_seen, np.inf)
+                        ages[rows[:i]] = np.inf
+                        self.free_row(int(np.argmin(ages)))
+                row = self.free_rows.pop()
+                self.rows[track_id] = row
+
+                # Reset row for the new track
+                self.track_ids[row] = track_id
+                self.class_ids[row] = class_ids[i]
+                self.boxes[row] = 0
+                self.box_sums[row] = 0
+                self.counts[row] = 0
+                self.heads[row] = 0
+            rows[i] = row
+        return rows
+
+    def update(self, track_ids, class_ids, boxes, confidences, timestamp):
+        """
+        Adds the detections of a single frame to their tracks.
+
+        Arguments:
+            track_ids -- array of track ids (one per detection)
+            class_ids -- array of class ids (only used for new tracks)
+            boxes -- (n, 4) array of boxes (x, y, w, h)
+            confidences -- array of detection confidences
+            timestamp -- the time the detections were made (seconds)
+        """
+        if len(track_ids) == 0:
+            return
+
+        rows = self.get_rows(track_ids, class_ids)
+        heads = self.heads[rows]
+
+        # Replace the oldest box in each ring buffer, keeping the sums rolling
+        self.box_sums[rows] -= self.boxes[rows, heads]
+        self.boxes[rows, heads] = boxes
+        self.box_sums[rows] += boxes
+        self.heads[rows] = (heads + 1) % self.history
+        self.counts[rows] = np.minimum(self.counts[rows] + 1, self.history)
+
+        self.confidences[rows] = confidences
+        self.last_seen[rows] = timestamp
+
+    def get_records(self, timestamp, persistence):
+        """
+        Gets the average box of every track seen within the persistence time.
+
+        Arguments:
+            timestamp -- the current time (seconds)
+            persistence -- the number of seconds a track persists once not seen
+
+        Returns:
+            an array of detection records (see DETECTION_DTYPE)
+        """
+        rows = np.flatnonzero(
+            (self.counts > 0) & (timestamp - self.last_seen < persistence)
+        )
+
+        records = np.zeros(len(rows), dtype=DETECTION_DTYPE)
+        records["track_id"] = self.track_ids[rows]
+        records["class_id"] = self.class_ids[rows]
+        records["bbox"] = self.box_sums[rows] / self.counts[rows, None]
+        records["confidence"] = self.confidences[rows]
+        records["timestamp"] = self.last_seen[rows]
+        return records
@@ -1,7 +1,56 @@
 """
-    mp.py - Hosts the Message class.
+    mp.py - Hosts the Message class and the shared memory frame/detection transports.
 """
 
+import multiprocessing
+import time
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from .trace import WORKER_TRACE_POINTS
+
+FRAME_SLOTS = 3  # Number of frame slots in the ring (at least 3, see FrameRingBuffer)
+FRAME_MAX_WIDTH = 1920  # Largest frame width that fits in a slot
+FRAME_MAX_HEIGHT = 1080  # Largest frame height that fits in a slot
+FRAME_MAX_CHANNELS = 3  # Largest number of channels that fits in a slot
+
+# Header layout of the frame ring buffer (int64 values)
+HEADER_SEQUENCE = 0  # Sequence number of the last written frame
+HEADER_LATEST_SLOT = 1  # Slot holding the newest frame (-1 if none)
+HEADER_READING_SLOT = 2  # Slot currently held by the reader (-1 if none)
+HEADER_FIELDS = 3
+
+# Per-slot header layout (int64 values)
+SLOT_SEQUENCE = 0
+SLOT_HEIGHT = 1
+SLOT_WIDTH = 2
+SLOT_CHANNELS = 3
+SLOT_FIELDS = 4
+
+# Per-slot trace timestamps (float64 values)
+SLOT_CAPTURE_TIME = 0  # Monotonic time the frame was captured
+SLOT_WRITE_TIME = 1  # Monotonic time the frame was written to the buffer
+SLOT_TIMES = 2
+
+MAX_DETECTIONS = 128  # Largest number of detections sent in one result
+
+# Fixed layout of a single detection record (bbox is x, y, w, h)
+DETECTION_DTYPE = np.dtype(
+    [
+        ("track_id", np.int32),
+        ("class_id", np.int16),
+        ("bbox", np.float32, (4,)),
+        ("confidence", np.float32),
+        ("timestamp", np.float64),
+    ]
+)
+
+# Header layout of the detection mailbox (int64 values)
+MAILBOX_SEQUENCE = 0  # Sequence number of the last published result
+MAILBOX_COUNT = 1  # Number of records in the last published result
+MAILBOX_TRACE_ID = 2  # Frame sequence number the last result was made from
+MAILBOX_FIELDS = 3
+
+
 class Message:
     """
     Provides a simple message structure between processes
@@ -10,3 +59,360 @@ class Message:
     def __init__(self, type, data=0):
         self.type = type
         self.data = data
+
+
+class FrameRingBuffer:
+    """
+    A fixed ring of preallocated frame slots in shared memory, used to
+    hand camera frames to another process without pickling them.
+
+    There is a single writer (the camera) and a single reader (the YOLO
+    worker). The writer never overwrites the newest slot or the slot
+    held by the reader, so the reader can use a frame in place (no copy)
+    until it is released.
+    """
+
+    def __init__(
+        self,
+        slots=FRAME_SLOTS,
+        max_shape=(FRAME_MAX_HEIGHT, FRAME_MAX_WIDTH, FRAME_MAX_CHANNELS),
+    ):
+        """
+        Allocates the shared memory for the frame slots.
+
+        Arguments:
+            slots -- the number of frame slots (minimum of 3).
+            max_shape -- the largest (height, width, channels) frame accepted.
+        """
+        self.slots = max(3, slots)
+        self.slot_size = int(np.prod(max_shape))
+        self.lock = multiprocessing.Lock()
+        self.new_frame = multiprocessing.Condition(self.lock)
+        self.header_memory = SharedMemory(
+            create=True,
+            size=(HEADER_FIELDS + self.slots * (SLOT_FIELDS + SLOT_TIMES)) * 8,
+        )
+        self.frame_memory = SharedMemory(create=True, size=self.slot_size * self.slots)
+        self.owner = True
+        self.attach()
+
+        self.header[:] = 0
+        self.header[HEADER_LATEST_SLOT] = -1
+        self.header[HEADER_READING_SLOT] = -1
+
+    def attach(self):
+        """
+        Creates the numpy views over the shared memory blocks.
+        """
+        self.closed = False
+        self.header = np.ndarray(
+            (HEADER_FIELDS + self.slots * SLOT_FIELDS,),
+            dtype=np.int64,
+            buffer=self.header_memory.buf,
+        )
+        self.slot_header = self.header[HEADER_FIELDS:].reshape(
+            (self.slots, SLOT_FIELDS)
+        )
+        self.slot_times = np.ndarray(
+            (self.slots, SLOT_TIMES),
+            dtype=np.float64,
+            buffer=self.header_memory.buf,
+            offset=(HEADER_FIELDS + self.slots * SLOT_FIELDS) * 8,
+        )
+        self.frame_times = (0.0, 0.0)  # Trace timestamps of the held frame
+        self.frame_data = np.ndarray(
+            (self.slots, self.slot_size), dtype=np.uint8, buffer=self.frame_memory.buf
+        )
+
+    def __getstate__(self):
+        """
+        Only the names of the shared memory blocks are sent to other processes.
+        """
+        return {
+            "slots": self.slots,
+            "slot_size": self.slot_size,
+            "lock": self.lock,
+            "new_frame": self.new_frame,
+            "header_name": self.header_memory.name,
+            "frame_name": self.frame_memory.name,
+        }
+
+    def __setstate__(self, state):
+        """
+        Re-attaches to the shared memory blocks in another process.
+        """
+        self.slots = state["slots"]
+        self.slot_size = state["slot_size"]
+        self.lock = state["lock"]
+        self.new_frame = state["new_frame"]
+        self.header_memory = SharedMemory(name=state["header_name"])
+        self.frame_memory = SharedMemory(name=state["frame_name"])
+        self.owner = False
+        self.attach()
+
+    def get_sequence(self):
+        """
+        Returns the sequence number of the last written frame (0 if none).
+        """
+        return int(self.header[HEADER_SEQUENCE])
+
+    def write(self, frame: np.ndarray, timestamp=0.0):
+        """
+        Copies the frame into a free slot and publishes it as the newest frame.
+        Raises a ValueError if the frame is not uint8 or does not fit in a slot.
+
+        Arguments:
+            frame -- the frame to write (uint8 array).
+            timestamp -- the monotonic time the frame was captured.
+
+        Returns:
+            the sequence number of the frame, or 0 if the buffer is closed.
+        """
+        if self.closed or frame is None:
+            return 0
+
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_size:
+            raise ValueError(
+                "Frame "
+                + str(frame.shape)
+                + " "
+                + str(frame.dtype)
+                + " does not fit in the shared frame buffer"
+            )
+
+        # Pick the next slot that is neither the newest nor held by the reader
+        with self.lock:
+            latest = int(self.header[HEADER_LATEST_SLOT])
+            reading = int(self.header[HEADER_READING_SLOT])
+            slot = latest
+            for _ in range(self.slots):
+                slot = (slot + 1) % self.slots
+                if slot != latest and slot != reading:
+                    break
+
+        # Copy outside of the lock (reader may keep reading the newest slot)
+        np.copyto(self.frame_data[slot, : frame.nbytes].reshape(frame.shape), frame)
+
+        with self.new_frame:
+            sequence = int(self.header[HEADER_SEQUENCE]) + 1
+            height = frame.shape[0]
+            width = frame.shape[1]
+            channels = frame.shape[2] if frame.ndim > 2 else 0
+            self.slot_header[slot] = (sequence, height, width, channels)
+            self.slot_times[slot] = (timestamp, time.monotonic())
+            self.header[HEADER_SEQUENCE] = sequence
+            self.header[HEADER_LATEST_SLOT] = slot
+            self.new_frame.notify_all()  # Wake the reader
+        return sequence
+
+    def wait_for_frame(self, last_sequence, timeout=None):
+        """
+        Blocks until a frame newer than last_sequence is written.
+
+        Arguments:
+            last_sequence -- the sequence number of the last frame read.
+            timeout -- the maximum number of seconds to wait (None to wait forever).
+
+        Returns:
+            True if a newer frame exists, False if the wait timed out.
+        """
+        if self.closed:
+            return False
+
+        with self.new_frame:
+            return self.new_frame.wait_for(
+                lambda: self.header[HEADER_SEQUENCE] != last_sequence, timeout
+            )
+
+    def acquire_latest(self):
+        """
+        Holds the newest slot for reading, and returns its frame in place.
+
+        The frame must not be used after release() is called. The capture
+        and write times of the frame are kept in frame_times.
+
+        Returns:
+            a tuple (sequence, frame), or (0, None) if no frame was written.
+        """
+        if self.closed:
+            return (0, None)
+
+        with self.lock:
+            slot = int(self.header[HEADER_LATEST_SLOT])
+            if slot < 0:
+                return (0, None)
+            self.header[HEADER_READING_SLOT] = slot
+            (sequence, height, width, channels) = self.slot_header[slot].tolist()
+            self.frame_times = tuple(self.slot_times[slot].tolist())
+
+        shape = (height, width, channels) if channels > 0 else (height, width)
+        size = height * width * max(channels, 1)
+        return (sequence, self.frame_data[slot, :size].reshape(shape))
+
+    def release(self):
+        """
+        Releases the slot held by the reader, allowing it to be overwritten.
+        """
+        if self.closed:
+            return
+
+        with self.lock:
+            self.header[HEADER_READING_SLOT] = -1
+
+    def close(self):
+        """
+        Detaches from the shared memory, and frees it if this process created it.
+        """
+        if self.closed:
+            return
+        self.closed = True
+
+        # Views must be removed before the memory can be closed
+        self.header = None
+        self.slot_header = None
+        self.slot_times = None
+        self.frame_data = None
+        for memory in (self.header_memory, self.frame_memory):
+            try:
+                memory.close()
+                if self.owner:
+                    memory.unlink()
+            except (BufferError, FileNotFoundError):
+                pass  # Frame still in use elsewhere, freed on exit
+
+
+class DetectionMailbox:
+    """
+    A single-slot mailbox in shared memory holding the latest detection
+    results as fixed-layout records (see DETECTION_DTYPE).
+
+    Publishing replaces the previous result ("latest wins"), so a slow
+    reader never builds up a backlog of stale results.
+    """
+
+    def __init__(self, capacity=MAX_DETECTIONS):
+        """
+        Allocates the shared memory for the mailbox.
+
+        Arguments:
+            capacity -- the largest number of records in one result.
+        """
+        self.capacity = capacity
+        self.lock = multiprocessing.Lock()
+        self.memory = SharedMemory(
+            create=True,
+            size=(MAILBOX_FIELDS + WORKER_TRACE_POINTS) * 8
+            + capacity * DETECTION_DTYPE.itemsize,
+        )
+        self.owner = True
+        self.attach()
+        self.header[:] = 0
+
+    def attach(self):
+        """
+        Creates the numpy views over the shared memory block.
+        """
+        self.closed = False
+        self.header = np.ndarray(
+            (MAILBOX_FIELDS,), dtype=np.int64, buffer=self.memory.buf
+        )
+        self.trace_points = np.ndarray(
+            (WORKER_TRACE_POINTS,),
+            dtype=np.float64,
+            buffer=self.memory.buf,
+            offset=MAILBOX_FIELDS * 8,
+        )
+        self.records = np.ndarray(
+            (self.capacity,),
+            dtype=DETECTION_DTYPE,
+            buffer=self.memory.buf,
+            offset=(MAILBOX_FIELDS + WORKER_TRACE_POINTS) * 8,
+        )
+
+    def __getstate__(self):
+        """
+        Only the name of the shared memory block is sent to other processes.
+        """
+        return {
+            "capacity": self.capacity,
+            "lock": self.lock,
+            "name": self.memory.name,
+        }
+
+    def __setstate__(self, state):
+        """
+        Re-attaches to the shared memory block in another process.
+        """
+        self.capacity = state["capacity"]
+        self.lock = state["lock"]
+        self.memory = SharedMemory(name=state["name"])
+        self.owner = False
+        self.attach()
+
+    def publish(self, records: np.ndarray, trace_id=0, trace_points=None):
+        """
+        Replaces the mailbox contents with the given records.
+
+        Arguments:
+            records -- an array of detection records (see DETECTION_DTYPE).
+            trace_id -- the sequence number of the frame the records are from.
+            trace_points -- the monotonic timestamps of the trace points the
+                            frame has passed (see libs/trace.py).
+
+        Returns:
+            the sequence number of the published result.
+        """
+        if self.closed:
+            return 0
+
+        count = min(len(records), self.capacity)
+        with self.lock:
+            self.records[:count] = records[:count]
+            self.header[MAILBOX_COUNT] = count
+            self.header[MAILBOX_TRACE_ID] = trace_id
+            self.trace_points[:] = 0
+            if trace_points is not None:
+                self.trace_points[: len(trace_points)] = trace_points
+            self.header[MAILBOX_SEQUENCE] += 1
+            return int(self.header[MAILBOX_SEQUENCE])
+
+    def take(self, last_sequence=0):
+        """
+        Gets the latest result if it is newer than last_sequence.
+
+        Returns:
+            a tuple (sequence, records, trace), where records is a copy of the
+            latest result (or None if nothing newer was published), and trace
+            is a tuple (trace_id, trace_points) of the result.
+        """
+        if self.closed:
+            return (last_sequence, None, None)
+
+        with self.lock:
+            sequence = int(self.header[MAILBOX_SEQUENCE])
+            if sequence == last_sequence:
+                return (sequence, None, None)
+            return (
+                sequence,
+                self.records[: self.header[MAILBOX_COUNT]].copy(),
+                (int(self.header[MAILBOX_TRACE_ID]), self.trace_points.tolist()),
+            )
+
+    def close(self):
+        """
+        Detaches from the shared memory, and frees it if this process created it.
+        """
+        if self.closed:
+            return
+        self.closed = True
+
+        # Views must be removed before the memory can be closed
+        self.header = None
+        self.trace_points = None
+        self.records = None
+        try:
+            self.memory.close()
+            if self.owner:
+                self.memory.unlink()
+        except (BufferError, FileNotFoundError):
+            pass  # Still in use elsewhere, freed on exit
@@ -40,7 +40,7 @@ class CamObject:
     Represents an object that is recognised from the camera.
     """
 
-    def __init__(self, tag: Tag, bounds, track_id=0):
+    def __init__(self, tag: Tag, bounds, track_id=0, confidence=1.0):
         """
         Constructs a camera recognised object from the given
         tag and bounds.
@@ -50,6 +50,8 @@ class CamObject:
         the ratio of camera feed to screen size)
 
         The tag should be the recognised object name (e.g. star)
+
+        The confidence is the model's confidence in the detection (0-1)
         """
 
         self.tag = tag
@@ -61,6 +63,7 @@ class CamObject:
             self.base_h,
         ) = bounds  # For recalibrating
         self.track_id = track_id
+        self.confidence = confidence
         self.attributes = {}  # Attribute list for controls
         self.date_created = datetime.datetime.now()
         self.date_last_included = datetime.datetime.now()
@@ -0,0 +1,138 @@
+"""
+    render.py - hosts the DirtyRenderer class, which repaints only the
+    regions of the screen the controls changed since the last frame.
+"""
+
+import pygame
+
+DIRTY_MAX_RECTS = 8  # Most separate regions updated before they are merged into one
+DIRTY_MAX_AREA = 0.6  # Fraction of the screen repainted before all of it is redrawn
+BACKGROUND_COLOUR = (0, 0, 0)
+
+
+def merge_rects(rects):
+    """
+    Merges overlapping rectangles, so no region is drawn twice.
+
+    Arguments:
+        rects -- a list of pygame.Rect
+
+    Returns:
+        a list of pygame.Rect that do not overlap each other.
+    """
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        # Absorb every merged rectangle the rectangle overlaps (until none do)
+        overlapping = rect.collidelist(merged)
+        while overlapping >= 0:
+            rect.union_ip(merged.pop(overlapping))
+            overlapping = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+    """
+    Renders the controls of the app, repainting and updating only the
+    regions of the screen the controls report as changed
+    (see Control.get_dirty_rects).
+
+    Each control is rendered at most once per frame: the area spanning all
+    changed regions is repainted in one pass (clipped to that area), then
+    only the changed regions are updated on the display.
+
+    The whole screen is redrawn on the first frame, when the screen or
+    controls change, when any control may draw anywhere, or when most
+    of the screen would be repainted.
+    """
+
+    def __init__(self):
+        self.screen_size = None
+        self.controls = []  # Controls rendered in the last frame (in order)
+        self.full_redraws = 0  # Frames the whole screen was redrawn
+        self.partial_redraws = 0  # Frames only changed regions were redrawn
+
+    def get_dirty_rects(self, controller, controls, screen_rect):
+        """
+        Gets the regions of the screen the controls changed.
+
+        Returns:
+            a list of pygame.Rect, or None if the whole screen must be redrawn.
+        """
+        rects = []
+        full_redraw = False
+        for control in controls:
+            # Every control is asked, so each keeps track of its last frame
+            control_rects = control.get_dirty_rects(controller)
+            if control_rects is None:
+                full_redraw = True
+                continue
+            for rect in control_rects:
+                rect = screen_rect.clip(pygame.Rect(rect))
+                if rect.width > 0 and rect.height > 0:
+                    rects.append(rect)
+
+        if full_redraw:
+            return None
+
+        rects = merge_rects(rects)
+        if len(rects) > DIRTY_MAX_RECTS:
+            rects = [rects[0].unionall(rects[1:])]
+
+        # The area spanning all regions is repainted
+        if len(rects) > 0:
+            area = rects[0].unionall(rects[1:])
+            if area.width * area.height > DIRTY_MAX_AREA * (
+                screen_rect.width * screen_rect.height
+            ):
+                return None
+        return rects
+
+    def render(self, controller, screen: pygame.Surface):
+        """
+        Renders a single frame of all controls (then static controls) and
+        updates the changed regions of the display.
+
+        Arguments:
+            controller -- the app controller the controls run from
+            screen -- the surface the controls are drawn on
+
+        Returns:
+            True if the display was updated, or False if nothing changed.
+        """
+        controls = list(controller.get_controls()) + list(
+            controller.get_static_controls()
+        )
+        screen_rect = screen.get_rect()
+
+        rects = self.get_dirty_rects(controller, controls, screen_rect)
+        if screen_rect.size != self.screen_size or controls != self.controls:
+            rects = None
+        self.screen_size = screen_rect.size
+        self.controls = controls
+
+        if rects is None:
+            self.full_redraws += 1
+            screen.fill(BACKGROUND_COLOUR)
+            for control in controls:
+                control.render(controller, screen)
+            pygame.display.flip()
+            return True
+
+        if len(rects) == 0:
+            return False  # Nothing changed
+        self.partial_redraws += 1
+
+        # Repaint the area spanning all regions with the controls that draw
+        # in it (once each), then update only the changed regions
+        area = rects[0].unionall(rects[1:])
+        screen.set_clip(area)
+        screen.fill(BACKGROUND_COLOUR, area)
+        for control in controls:
+            bounds = control.render_bounds
+            if bounds is None or area.colliderect(pygame.Rect(bounds)):
+                control.render(controller, screen)
+        screen.set_clip(None)
+        pygame.display.update(rects)
+        return True
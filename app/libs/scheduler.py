@@ -0,0 +1,155 @@
+"""
+    scheduler.py - hosts the FrameScheduler class, which paces the update
+    loop and the render thread, and hands each updated frame to the renderer.
+"""
+
+import threading
+import time
+
+DEFAULT_TICK_RATE = 60  # Iterations per second of the update loop (0 = unlimited)
+DEFAULT_FPS = 30  # Frames rendered per second (0 = every update)
+FRAME_WAIT_TIMEOUT = 0.1  # Max seconds the renderer waits for an update at once
+
+
+class FrameScheduler:
+    """
+    Paces the update loop to a target tick rate and the render thread to a
+    target FPS, sleeping (rather than spinning) for the rest of each budget.
+
+    The update loop hands each updated frame to the renderer through a
+    condition variable, so the renderer only draws once something was updated.
+    Ticks and frames that overrun their budget are counted, as are frames the
+    renderer missed while it fell behind (dropped frames).
+    """
+
+    def __init__(self, tick_rate=DEFAULT_TICK_RATE, fps=DEFAULT_FPS):
+        """
+        Creates a scheduler.
+
+        Arguments:
+            tick_rate -- the target iterations per second of the update loop
+            fps -- the target frames per second of the renderer
+        """
+        self.condition = threading.Condition()
+        self.running = True
+        self.tick = 0  # Number of the latest updated frame
+        self.rendered_tick = 0  # Number of the latest updated frame rendered
+        self.set_tick_rate(tick_rate)
+        self.set_fps(fps)
+
+        self.next_tick_time = None  # Time the next update is due
+        self.next_frame_time = None  # Time the next frame is due
+        self.tick_start = None
+        self.frame_start = None
+        self.tick_time = 0.0  # Seconds the last update took
+        self.frame_time = 0.0  # Seconds the last frame took to render
+        self.late_ticks = 0  # Updates that took longer than their budget
+        self.late_frames = 0  # Frames that took longer than their budget
+        self.dropped_frames = 0  # Frames the renderer missed while behind
+
+    def set_tick_rate(self, tick_rate):
+        """
+        Sets the target iterations per second of the update loop (0 = unlimited).
+        """
+        self.tick_rate = tick_rate
+        self.tick_budget = 1 / tick_rate if tick_rate > 0 else 0.0
+
+    def set_fps(self, fps):
+        """
+        Sets the target frames per second of the renderer (0 = every update).
+        """
+        self.fps = fps
+        self.frame_budget = 1 / fps if fps > 0 else 0.0
+
+    def pace(self, due, budget):
+        """
+        Sleeps until the given time is due.
+
+        Arguments:
+            due -- the (monotonic) time the next tick or frame is due
+            budget -- the seconds between ticks or frames
+
+        Returns:
+            a tuple (next_due, missed) of when the following tick or frame is
+            due, and how many were missed (if the time was already past).
+        """
+        now = time.monotonic()
+        if due is None:
+            return (now + budget, 0)
+
+        if due > now:
+            time.sleep(due - now)
+            return (due + budget, 0)
+
+        # Behind, so skip the missed ticks or frames (rather than catching up)
+        missed = int((now - due) / budget) if budget > 0 else 0
+        return (due + (missed + 1) * budget, missed)
+
+    def begin_tick(self):
+        """
+        Starts an iteration of the update loop.
+        """
+        self.tick_start = time.monotonic()
+
+    def end_tick(self):
+        """
+        Ends an iteration of the update loop, handing its frame to the
+        renderer and sleeping for the rest of the iteration's budget.
+        """
+        with self.condition:
+            self.tick += 1
+            self.condition.notify_all()
+
+        if self.tick_start is not None:
+            self.tick_time = time.monotonic() - self.tick_start
+            if self.tick_budget > 0 and self.tick_time > self.tick_budget:
+                self.late_ticks += 1
+
+        if self.tick_budget > 0:
+            (self.next_tick_time, _) = self.pace(self.next_tick_time, self.tick_budget)
+
+    def wait_for_frame(self):
+        """
+        Waits until the next frame is due and has been updated
+        (to be called by the renderer before rendering).
+
+        Returns:
+            True if a frame should be rendered, or False if there was no
+            update (within FRAME_WAIT_TIMEOUT) or the scheduler stopped.
+        """
+        if self.frame_budget > 0:
+            (self.next_frame_time, missed) = self.pace(
+                self.next_frame_time, self.frame_budget
+            )
+            self.dropped_frames += missed
+
+        with self.condition:
+            updated = self.condition.wait_for(
+                lambda: self.tick > self.rendered_tick or not self.running,
+                FRAME_WAIT_TIMEOUT,
+            )
+            if not updated or not self.running:
+                return False
+            self.rendered_tick = self.tick
+
+        self.frame_start = time.monotonic()
+        return True
+
+    def end_frame(self):
+        """
+        Ends the rendering of a frame.
+        """
+        if self.frame_start is None:
+            return
+
+        self.frame_time = time.monotonic() - self.frame_start
+        if self.frame_budget > 0 and self.frame_time > self.frame_budget:
+            self.late_frames += 1
+
+    def stop(self):
+        """
+        Stops the scheduler, waking the renderer.
+        """
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
@@ -219,24 +219,28 @@ class Sound:
 
         Args:
             wave (Wave): a wave object
+
+        Returns:
+            bool: True if a new sound started playing
         """
         if wave is None:
-            return
+            return False
 
         if wave in self.playing.values():
-            return
+            return False
 
         channel = self.get_next_channel()
         self.playing[channel] = wave
 
         if wave.buffer is None:
-            return  # NOTE: Now using sound_controller's buffer generation
+            return False  # NOTE: Now using sound_controller's buffer generation
             # do not halt any other sounds
 
         pygame_sound = pygame.mixer.Sound(wave.buffer)
         pygame_sound.set_volume(wave.volume)
         channel.play(pygame_sound, loops=-1)
         channel.queue(pygame_sound)
+        return True
 
     def cleanup(self, waves: list):
         """Stop playing all active Waves that are not in waves.
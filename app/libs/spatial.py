@@ -0,0 +1,100 @@
+"""
+    spatial.py - hosts the SpatialGrid class, which indexes objects by
+    position so objects within bounds are found without a full scan.
+"""
+
+GRID_CELL_SIZE = 64  # Size (pixels) of each square cell of the grid
+
+
+class SpatialGrid:
+    """
+    Buckets objects into a uniform grid of square cells by their center,
+    so the objects within some bounds are found by only checking the
+    objects of the cells the bounds overlap.
+
+    Objects are found in the order they were added.
+    """
+
+    def __init__(self, cell_size=GRID_CELL_SIZE):
+        """
+        Creates an empty grid.
+
+        Arguments:
+            cell_size -- the size (pixels) of each cell
+        """
+        self.cell_size = cell_size
+        self.cells = {}  # Indices of the objects in each cell (by cell)
+        self.objects = []
+
+    def __len__(self):
+        """
+        Returns the number of objects in the grid.
+        """
+        return len(self.objects)
+
+    def get_cell(self, x, y):
+        """
+        Gets the cell (column, row) containing the given point.
+        """
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def build(self, objects):
+        """
+        Replaces the objects of the grid.
+
+        Arguments:
+            objects -- the objects to index (any with a get_center method)
+        """
+        self.cells = {}
+        self.objects = []
+        for object in objects:
+            self.add(object)
+
+    def add(self, object):
+        """
+        Adds a single object to the grid.
+        """
+        (x, y) = object.get_center()
+        try:
+            cell = self.get_cell(x, y)
+        except (ValueError, OverflowError):
+            cell = None  # Invalid position (never within any bounds)
+        self.cells.setdefault(cell, []).append(len(self.objects))
+        self.objects.append(object)
+
+    def query(self, bounds):
+        """
+        Gets the objects whose center is within the given bounds
+        (as CamObject.within).
+
+        Arguments:
+            bounds -- the bounds (x, y, w, h) to search
+
+        Returns:
+            a list of objects (in the order they were added).
+        """
+        (x, y, w, h) = bounds
+        (xmin, ymin) = self.get_cell(x, y)
+        (xmax, ymax) = self.get_cell(x + w, y + h)
+
+        indices = []
+        if (xmax - xmin + 1) * (ymax - ymin + 1) > len(self.cells):
+            # Bounds cover more cells than are filled, so check each filled cell
+            for cell, cell_indices in self.cells.items():
+                if (
+                    cell is not None
+                    and xmin <= cell[0] <= xmax
+                    and ymin <= cell[1] <= ymax
+                ):
+                    indices.extend(cell_indices)
+        else:
+            for column in range(xmin, xmax + 1):
+                for row in range(ymin, ymax + 1):
+                    indices.extend(self.cells.get((column, row), ()))
+
+        indices.sort()
+        return [
+            self.objects[index]
+            for index in indices
+            if self.objects[index].within(bounds)
+        ]
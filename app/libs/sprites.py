@@ -0,0 +1,61 @@
+"""
+    sprites.py - hosts the SpriteCache class, which keeps prebuilt
+    surfaces so they are not created again on every frame.
+"""
+
+from collections import OrderedDict
+
+SPRITE_CACHE_SIZE = 512  # Most sprites kept before the least recently used are dropped
+
+
+class SpriteCache:
+    """
+    Keeps prebuilt surfaces (sprites) by key, building each lazily on
+    first use and dropping the least recently used once full.
+    """
+
+    def __init__(self, build, max_size=SPRITE_CACHE_SIZE):
+        """
+        Creates an empty cache.
+
+        Arguments:
+            build -- the function that builds the sprite of a key
+            max_size -- the most sprites kept
+        """
+        self.build = build
+        self.max_size = max_size
+        self.sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """
+        Returns the number of sprites in the cache.
+        """
+        return len(self.sprites)
+
+    def get(self, key):
+        """
+        Gets the sprite of a key (building it if it is not cached).
+
+        Arguments:
+            key -- the (hashable) key the sprite is built from
+        """
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+            return sprite
+
+        self.misses += 1
+        sprite = self.build(key)
+        self.sprites[key] = sprite
+        if len(self.sprites) > self.max_size:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        """
+        Drops every sprite.
+        """
+        self.sprites.clear()
@@ -0,0 +1,192 @@
+"""
+    trace.py - hosts the LatencyTracer class, which measures how long each
+    stage takes from camera capture to sound onset.
+"""
+
+import json
+import time
+import numpy as np
+
+try:
+    import resource  # Optional (peak memory, not available on Windows)
+except ImportError:
+    resource = None
+
+# Points every frame passes through, in order. The latency of a stage is the
+# time between a point and the point before it (e.g. "model" is the time
+# between the frame being read by the model process and inference finishing).
+TRACE_POINTS = [
+    "capture",  # Frame grabbed by the capture thread
+    "queue",  # Frame written to the shared frame buffer
+    "dequeue",  # Frame read by the YOLO sub-process
+    "model",  # Detector.predict finished (not stamped on frames the model skips)
+    "conversion",  # Detection records published
+    "camera",  # Records received by Camera.update
+    "zone",  # Zone.update finished
+    "sound_controller",  # SoundController.update started
+    "sound_play",  # Sound.play started a new sound
+]
+WORKER_TRACE_POINTS = 5  # Points stamped before the results leave the sub-process
+TRACE_TOTAL = "total"  # Stage measuring capture to the last point reached
+
+# Histogram buckets (log-spaced, from 0.1ms to 10s)
+HISTOGRAM_EDGES = np.geomspace(0.0001, 10, 51)
+
+DEFAULT_TRACE_FILE = "latency_trace.jsonl"
+
+
+def get_peak_rss():
+    """
+    Gets the peak resident memory of the current process (in KB),
+    or None if it cannot be measured on this platform.
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class LatencyTracer:
+    """
+    Collects per-stage latency histograms of traced frames.
+
+    A trace is started when detection results of a frame reach the main
+    process (see begin()), stamped as the results pass through each stage,
+    and recorded at the end of the main loop iteration (see finish()).
+    """
+
+    def __init__(self, path=None):
+        """
+        Creates empty histograms for every stage.
+
+        Arguments:
+            path -- a JSON-lines file every finished trace is written to
+                    (or None to keep histograms in-process only).
+        """
+        self.stages = TRACE_POINTS[1:] + [TRACE_TOTAL]
+        self.counts = {
+            stage: np.zeros(len(HISTOGRAM_EDGES) + 1, dtype=np.int64)
+            for stage in self.stages
+        }
+        self.totals = {stage: 0.0 for stage in self.stages}
+        self.maximums = {stage: 0.0 for stage in self.stages}
+
+        self.trace_id = None
+        self.points = {}
+
+        self.file = None
+        if path is not None:
+            try:
+                self.file = open(path, "a")
+            except:
+                print("Failed to open latency trace file " + path)
+
+    def begin(self, trace_id, points):
+        """
+        Starts tracing a frame, discarding any unfinished trace.
+
+        Arguments:
+            trace_id -- the id of the traced frame (its sequence number).
+            points -- the monotonic timestamps of the points already passed
+                      (in order of TRACE_POINTS, 0 if not stamped).
+        """
+        self.trace_id = trace_id
+        self.points = {
+            name: timestamp
+            for (name, timestamp) in zip(TRACE_POINTS, points)
+            if timestamp > 0
+        }
+
+    def stamp(self, point):
+        """
+        Stamps the current time on a point of the trace (if tracing).
+        A point stamped more than once keeps the latest time.
+        """
+        if self.trace_id is not None:
+            self.points[point] = time.monotonic()
+
+    def finish(self):
+        """
+        Records the latency of each stage of the current trace.
+        """
+        if self.trace_id is None:
+            return
+
+        stages = {}
+        last = None
+        for point in TRACE_POINTS:
+            timestamp = self.points.get(point)
+            if timestamp is None:
+                continue
+            if last is not None:
+                stages[point] = max(0.0, timestamp - last)
+            last = timestamp
+
+        if "capture" in self.points and last is not None:
+            stages[TRACE_TOTAL] = max(0.0, last - self.points["capture"])
+
+        for stage, latency in stages.items():
+            self.record(stage, latency)
+
+        if self.file is not None:
+            self.file.write(
+                json.dumps({"trace_id": self.trace_id, "latency": stages}) + "\n"
+            )
+
+        self.trace_id = None
+        self.points = {}
+
+    def record(self, stage, latency):
+        """
+        Adds a single latency (in seconds) to the histogram of a stage.
+        """
+        if stage not in self.counts:
+            return
+        self.counts[stage][np.searchsorted(HISTOGRAM_EDGES, latency)] += 1
+        self.totals[stage] += latency
+        self.maximums[stage] = max(self.maximums[stage], latency)
+
+    def get_histograms(self):
+        """
+        Returns the bucket edges (seconds) and the histogram counts of each stage.
+        Bucket i counts latencies between edges[i - 1] and edges[i].
+        """
+        return (HISTOGRAM_EDGES, self.counts)
+
+    def get_percentile(self, stage, percentile):
+        """
+        Returns an estimate of the given percentile (0-100) of a stage in
+        seconds (the upper edge of the bucket it falls in).
+        """
+        counts = self.counts[stage]
+        total = counts.sum()
+        if total == 0:
+            return 0.0
+        bucket = int(np.searchsorted(np.cumsum(counts), total * percentile / 100))
+        if bucket >= len(HISTOGRAM_EDGES):
+            return self.maximums[stage]
+        return min(float(HISTOGRAM_EDGES[bucket]), self.maximums[stage])
+
+    def get_summary(self):
+        """
+        Returns the count, mean, percentiles and maximum of each stage (seconds).
+        """
+        summary = {}
+        for stage in self.stages:
+            count = int(self.counts[stage].sum())
+            summary[stage] = {
+                "count": count,
+                "mean": self.totals[stage] / count if count > 0 else 0.0,
+                "p50": self.get_percentile(stage, 50),
+                "p95": self.get_percentile(stage, 95),
+                "p99": self.get_percentile(stage, 99),
+                "max": self.maximums[stage],
+            }
+        return summary
+
+    def close(self):
+        """
+        Closes the trace file (if any).
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,65 @@
+"""
+    test_tracker.py - tests that the KalmanTracker keeps the track id of
+    moving objects while the detector only runs every DETECTION_INTERVAL frames.
+"""
+
+import numpy as np
+
+from libs.devices.tracker import KalmanTracker, DETECTION_INTERVAL
+from libs.devices.sources import SyntheticSource, SYNTHETIC_SHAPES, SOURCE_FPS
+
+
+def track(boxes_per_frame):
+    """
+    Runs a tracker over the boxes of every frame the way the detection
+    worker does (detections on every DETECTION_INTERVAL-th frame,
+    predictions on the frames between).
+
+    Arguments:
+        boxes_per_frame -- iterable of (n, 4) arrays of boxes
+                           (xmin, ymin, xmax, ymax), one per frame
+
+    Returns:
+        the set of track ids that were output.
+    """
+    tracker = KalmanTracker()
+    ids = set()
+    for (index, boxes) in enumerate(boxes_per_frame):
+        timestamp = index / SOURCE_FPS
+        if index % DETECTION_INTERVAL != 0:
+            results = tracker.predict(timestamp)
+        else:
+            detections = np.column_stack(
+                [boxes, np.full(len(boxes), 0.9), np.zeros(len(boxes))]
+            )
+            results = tracker.update(detections, timestamp)
+        ids.update(results[:, 4].astype(int).tolist())
+    return ids
+
+
+def test_fast_object_keeps_its_id():
+    # A 40 px box moving 10 px per frame (about the speed of the synthetic
+    # shapes) overlaps its previous detection by less than
+    # TRACKER_IOU_THRESHOLD between detector passes
+    start = np.array([100.0, 100.0])
+    boxes = []
+    for index in range(90):
+        centre = start + index * np.array([8.0, 6.0])
+        boxes.append(np.concatenate([centre - 20, centre + 20])[None, :])
+
+    assert track(boxes) == {1}
+
+
+def test_synthetic_shapes_keep_their_ids():
+    source = SyntheticSource(realtime=False)
+    size = np.array([source.width, source.height])
+    boxes = []
+    for index in range(600):
+        # Same bouncing motion as SyntheticSource.read
+        positions = (source.positions + source.velocities * index) % (2 * size)
+        positions = np.where(positions > size, 2 * size - positions, positions)
+        boxes.append(
+            np.column_stack([positions - source.radius, positions + source.radius])
+        )
+
+    assert len(track(boxes)) == SYNTHETIC_SHAPES